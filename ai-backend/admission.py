@@ -0,0 +1,108 @@
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot start before its deadline"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Per-endpoint concurrency limit with a bounded FIFO queue and a queue-wait prediction from service times"""
+
+    def __init__(self, name: str, limit: int = 8, max_queue: int = 32, window: int = 64,
+                 default_service_seconds: float = 2.0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.default_service_seconds = default_service_seconds
+        self._active = 0
+        self._waiting = deque()
+        self._service_times = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.counters = {'admitted': 0, 'queued': 0, 'queue_full': 0, 'deadline': 0, 'timeout': 0}
+
+    def service_seconds(self) -> float:
+        """Mean recent time a request holds a slot (lock held)"""
+        if not self._service_times:
+            return self.default_service_seconds
+        return sum(self._service_times) / len(self._service_times)
+
+    def expected_wait(self, position: int) -> float:
+        """Predicted seconds until the request at this queue position gets a slot (lock held)"""
+        if self._active < self.limit and position == 0:
+            return 0.0
+        return math.ceil((position + 1) / self.limit) * self.service_seconds()
+
+    def acquire(self, deadline_seconds: float) -> float:
+        """Take a slot, queueing while the predicted wait still leaves time to serve; returns the queue wait"""
+        started = time.monotonic()
+        with self._lock:
+            position = len(self._waiting)
+            expected = self.expected_wait(position)
+            if expected == 0.0:
+                self._active += 1
+                self.counters['admitted'] += 1
+                return 0.0
+            if position >= self.max_queue:
+                self.counters['queue_full'] += 1
+                raise Overloaded('queue_full', expected)
+            service = self.service_seconds()
+            if expected + service > deadline_seconds:
+                self.counters['deadline'] += 1
+                raise Overloaded('deadline', expected)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            self.counters['queued'] += 1
+            give_up = started + deadline_seconds - service
+            try:
+                while self._waiting[0] is not ticket or self._active >= self.limit:
+                    remaining = give_up - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['timeout'] += 1
+                        raise Overloaded('timeout', self.expected_wait(self._waiting.index(ticket)))
+                    self._changed.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                # The next waiter may be able to go now that the head has moved
+                self._changed.notify_all()
+            self._active += 1
+            self.counters['admitted'] += 1
+            return time.monotonic() - started
+
+    def release(self, service_seconds: float):
+        with self._lock:
+            self._active -= 1
+            self._service_times.append(service_seconds)
+            self._changed.notify_all()
+
+    @contextmanager
+    def admitted(self, deadline_seconds: float):
+        """Hold a slot for the block; yields the queue wait"""
+        waited = self.acquire(deadline_seconds)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counters,
+                'active': self._active,
+                'waiting': len(self._waiting),
+                'limit': self.limit,
+                'max_queue': self.max_queue,
+                'service_seconds': round(self.service_seconds(), 3)
+            }
@@ -1,15 +1,49 @@
 import os
+import re
+import hmac
 import json
+import time
+import uuid
+import queue
 import logging
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict, field, replace
 
-from flask import Flask, request, jsonify
+IMPORT_STARTED = time.monotonic()
+
+import httpx
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from groq import Groq
-from langdetect import detect
+
+from admission import AdmissionGate, Overloaded
+from compression import COMPRESSIBLE_TYPES, PreparedBody, accepted_encoding, compress, strong_etag
+from language_detection import detect_language as detect_script_language, warm_up as warm_up_language_detection
+from cache import AnalysisCache, make_cache_key, normalize_message
+from jobs import JobStore, JobWorkers
+from history import AnalysisHistory, normalize_wallet
+from proofs import DEFAULT_CHUNK_BYTES, DEFAULT_DAG_WIDTH, CIDBuilder, ProofIndex, TextExtractor
+from sessions import ChatSession, SessionStore
+from similarity import NearDuplicateIndex
+from long_input import split_into_chunks
+from generation import STOP_SEQUENCES, SectionParser, TokenBudgets, normalize_section, section_complete
+from local_engine import HEADINGS as LOCAL_HEADINGS, analyze as analyze_locally
+from routing import ModelRouter, QUALITY_LEVELS, current_route, routing_options
+from metrics import Registry
+from profiler import ProfileExchange, SamplingProfiler
+from tracing import RequestIdFilter, current_trace, end_trace, new_request_id, record_span, span, start_trace
+from resilience import CircuitBreaker, CircuitOpenError, Hedger
+from scheduler import (
+    GroqScheduler, RateLimitExceeded, SingleFlight, estimate_tokens, request_priority, submit_with_context,
+    PRIORITY_ANALYZE, PRIORITY_CHAT, PRIORITY_BATCH
+)
 
 # Load environment variables
 load_dotenv()
@@ -17,21 +51,316 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+# Every log line carries the id of the request it was written for ('-' outside requests)
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+# Tamil, Kannada and Telugu text sent as UTF-8 instead of \u escapes is half the size
+app.json.ensure_ascii = False
 
 # Configure CORS
 cors_origins = os.getenv('CORS_ORIGINS', '*').split(',')
-CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type'])
+CORS(app, origins=cors_origins, methods=['GET', 'POST', 'OPTIONS'],
+     allow_headers=['Content-Type', 'If-None-Match', 'X-Request-ID'],
+     expose_headers=['ETag', 'Retry-After', 'Server-Timing', 'X-Request-ID'])
+
+# Response encoding: strong ETags (weak for /analyze) answered with 304 on If-None-Match, gzip/brotli above COMPRESS_MIN_BYTES
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', 1))
 
 # Configure Groq client
 groq_client = None
 if os.getenv('GROQ_API_KEY'):
-    groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+    groq_client = Groq(
+        api_key=os.getenv('GROQ_API_KEY'),
+        max_retries=int(os.getenv('GROQ_MAX_RETRIES', 2)),
+        # The client's default 5s keep-alive would close pre-warmed connections before traffic arrives
+        http_client=httpx.Client(limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=float(os.getenv('GROQ_KEEPALIVE_SECONDS', 60))
+        ))
+    )
+
+# Fail fast while Groq is down instead of waiting out a timeout per request and section
+groq_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('GROQ_BREAKER_FAILURE_THRESHOLD', 5)),
+    reset_seconds=float(os.getenv('GROQ_BREAKER_RESET_SECONDS', 30)),
+    half_open_probes=int(os.getenv('GROQ_BREAKER_HALF_OPEN_PROBES', 1))
+)
+
+# Optional hedged requests: a second attempt after the observed latency percentile
+groq_hedger = None
+if os.getenv('GROQ_HEDGE_ENABLED', 'False').lower() == 'true':
+    groq_hedger = Hedger(
+        percentile=float(os.getenv('GROQ_HEDGE_PERCENTILE', 95)),
+        min_delay_seconds=float(os.getenv('GROQ_HEDGE_MIN_DELAY_MS', 200)) / 1000,
+        max_hedge_ratio=float(os.getenv('GROQ_HEDGE_MAX_RATIO', 0.1))
+    )
+
+# Every chat completion goes through the scheduler so bursts respect Groq's RPM/TPM limits
+groq_scheduler = GroqScheduler(
+    groq_client,
+    rpm=int(os.getenv('GROQ_RPM_LIMIT', 30)),
+    tpm=int(os.getenv('GROQ_TPM_LIMIT', 30000)),
+    max_wait_seconds=float(os.getenv('GROQ_MAX_QUEUE_WAIT_SECONDS', 10)),
+    coalesce=os.getenv('GROQ_COALESCE_REQUESTS', 'True').lower() == 'true',
+    breaker=groq_breaker,
+    hedger=groq_hedger
+)
+
+# Identical analyses in flight at the same time share one run
+analysis_flights = SingleFlight()
+
+# Per-call model choice; GROQ_MODELS lists the candidates from fastest to highest quality
+model_router = ModelRouter(
+    [model.strip() for model in os.getenv('GROQ_MODELS', 'llama3-8b-8192,llama3-70b-8192').split(',') if model.strip()],
+    os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+    window=int(os.getenv('ROUTER_LATENCY_WINDOW', 64))
+)
+
+# Section execution: 'concurrent' issues all six completions in parallel, 'sequential' runs them in order
+ANALYSIS_EXECUTION_MODE = os.getenv('ANALYSIS_EXECUTION_MODE', 'concurrent').lower()
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv('ANALYSIS_DEADLINE_SECONDS', 20))
+SECTION_TIMEOUT_SECONDS = float(os.getenv('SECTION_TIMEOUT_SECONDS', 15))
+
+# Analysis engine: 'sections' makes one completion per section, 'json' asks for every section in one completion
+ANALYSIS_ENGINES = ('sections', 'json', 'fast')
+ANALYSIS_ENGINE = os.getenv('ANALYSIS_ENGINE', 'sections').lower()
+
+# Section keys in the order they appear in AnalysisResult, with the heading each one must start with
+SECTION_HEADINGS = {
+    'fairness': 'Fairness Analysis',
+    'impact': 'Impact Analysis',
+    'resource': 'Resource Analysis',
+    'sustainability': 'Sustainability Analysis',
+    'disadvantages': 'Potential Disadvantages',
+    'ai_suggestion': 'AI Suggestion'
+}
+
+# AnalysisResult field holding each section
+SECTION_FIELDS = {
+    'fairness': 'fairness_analysis',
+    'impact': 'impact_analysis',
+    'resource': 'resource_analysis',
+    'sustainability': 'sustainability_analysis',
+    'disadvantages': 'disadvantages',
+    'ai_suggestion': 'ai_suggestion'
+}
+
+# 'stop' adds stop sequences and normalizes the output; 'stream' also cuts each section off as soon as its heading,
+# two bullets and truthfulness value are in, but streamed calls are neither coalesced nor hedged; 'off' disables both
+GENERATION_CONTROL = os.getenv('GENERATION_CONTROL', 'stop').lower()
+
+# Per-section completion budgets, learned per language from the length of complete sections
+section_budgets = TokenBudgets(
+    {key: int(os.getenv('MAX_TOKENS', 200 if key == 'ai_suggestion' else 150)) for key in SECTION_FIELDS},
+    window=int(os.getenv('GENERATION_BUDGET_WINDOW', 128))
+)
+
+# Bump whenever build_prompts or the JSON engine prompt changes so cached analyses are not reused
+PROMPT_TEMPLATE_VERSION = '2'
+
+# Content-addressed cache of Groq analyses; set ANALYSIS_CACHE_DB to share a SQLite tier across workers
+analysis_cache = None
+if os.getenv('ANALYSIS_CACHE_ENABLED', 'True').lower() == 'true':
+    analysis_cache = AnalysisCache(
+        max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 1024)),
+        ttl_seconds=float(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', 3600)),
+        db_path=os.getenv('ANALYSIS_CACHE_DB') or None
+    )
+
+# Long inputs are condensed once (chunk summaries in parallel) before the section prompts see them
+LONG_INPUT_THRESHOLD_TOKENS = int(os.getenv('LONG_INPUT_THRESHOLD_TOKENS', 1200))
+LONG_INPUT_CHUNK_TOKENS = int(os.getenv('LONG_INPUT_CHUNK_TOKENS', 1000))
+LONG_INPUT_CHUNK_OVERLAP_TOKENS = int(os.getenv('LONG_INPUT_CHUNK_OVERLAP_TOKENS', 100))
+LONG_INPUT_SUMMARY_MAX_TOKENS = int(os.getenv('LONG_INPUT_SUMMARY_MAX_TOKENS', 200))
+LONG_INPUT_MAX_ROUNDS = int(os.getenv('LONG_INPUT_MAX_ROUNDS', 3))
+
+# Bump whenever the chunk summary prompt changes so cached condensed inputs are not reused
+CONDENSE_PROMPT_VERSION = '1'
+
+# Condensed long inputs by content hash; shares the analysis cache's SQLite file when one is set
+condensed_cache = AnalysisCache(
+    max_entries=int(os.getenv('LONG_INPUT_CACHE_MAX_ENTRIES', 256)),
+    ttl_seconds=float(os.getenv('LONG_INPUT_CACHE_TTL_SECONDS', 86400)),
+    db_path=os.getenv('ANALYSIS_CACHE_DB') or None
+)
+
+# Reuse analyses for near-copies of earlier messages (different names, account numbers, wording)
+near_duplicate_index = None
+if os.getenv('NEAR_DUPLICATE_ENABLED', 'True').lower() == 'true':
+    near_duplicate_index = NearDuplicateIndex(
+        threshold=float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.8)),
+        max_entries=int(os.getenv('NEAR_DUPLICATE_MAX_ENTRIES', 10000)),
+        db_path=os.getenv('NEAR_DUPLICATE_DB') or ':memory:',
+        # An analysis past the cache TTL is recomputed, however it is matched
+        ttl_seconds=float(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', 3600))
+    )
+
+# Pivot mode: analyse once in PIVOT_LANGUAGE and translate the finished sections into the other languages
+ANALYSIS_PIVOT_MODE = os.getenv('ANALYSIS_PIVOT_MODE', 'False').lower() == 'true'
+PIVOT_LANGUAGE = os.getenv('PIVOT_LANGUAGE', 'en')
+# 'per_language' sends one translation call per language side by side; 'batched' sends a single call for all
+TRANSLATION_MODE = os.getenv('TRANSLATION_MODE', 'per_language').lower()
+TRANSLATION_MAX_TOKENS = int(os.getenv('TRANSLATION_MAX_TOKENS', 1200))
+
+# Bump whenever the translation prompt changes so cached translations are not reused
+TRANSLATION_PROMPT_VERSION = '1'
+
+# Shared, bounded pool so concurrent requests cannot spawn unbounded threads
+section_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SECTION_MAX_WORKERS', 12)),
+    thread_name_prefix='groq-section'
+)
+
+# Batch analysis runs whole analyses on their own pool so it cannot starve the section pool
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 4))
+batch_executor = ThreadPoolExecutor(
+    max_workers=BATCH_MAX_CONCURRENCY,
+    thread_name_prefix='batch-analysis'
+)
+
+# Asynchronous analysis jobs; set JOB_WORKERS=0 to leave the queue to job_worker.py processes
+job_store = JobStore(
+    os.getenv('JOB_STORE_DB', 'jobs.db'),
+    lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', 120)),
+    max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+    retention_seconds=float(os.getenv('JOB_RETENTION_SECONDS', 86400))
+)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_MAX_WAIT_SECONDS = float(os.getenv('JOB_MAX_WAIT_SECONDS', 30))
+
+# Every served analysis is kept for GET /analyses by a background writer; set ANALYSIS_HISTORY_DB= to turn it off
+analysis_history = None
+if os.getenv('ANALYSIS_HISTORY_DB', 'history.db'):
+    analysis_history = AnalysisHistory(
+        os.getenv('ANALYSIS_HISTORY_DB', 'history.db'),
+        max_pending=int(os.getenv('ANALYSIS_HISTORY_MAX_PENDING', 10000)),
+        max_rows=int(os.getenv('ANALYSIS_HISTORY_MAX_ROWS', 1000000)),
+        retention_seconds=float(os.getenv('ANALYSIS_HISTORY_RETENTION_DAYS', 0)) * 86400
+    )
+ANALYSES_PAGE_SIZE = int(os.getenv('ANALYSES_PAGE_SIZE', 20))
+ANALYSES_MAX_PAGE_SIZE = int(os.getenv('ANALYSES_MAX_PAGE_SIZE', 100))
+
+# Proof uploads are read in fixed-size chunks that feed the CID computation, text extraction and optional spool file
+proof_index = ProofIndex(os.getenv('PROOF_INDEX_DB', 'proofs.db'))
+PROOF_STORE_DIR = os.getenv('PROOF_STORE_DIR', '')
+PROOF_READ_CHUNK_BYTES = int(os.getenv('PROOF_READ_CHUNK_BYTES', 1048576))
+PROOF_MAX_BYTES = int(os.getenv('PROOF_MAX_BYTES', 1073741824))
+# Room for the boundaries and form fields around a multipart upload's file
+PROOF_FORM_OVERHEAD_BYTES = 1048576
+# No request body may be larger than the largest proof: Werkzeug refuses a larger Content-Length and stops
+# reading a chunked body at the limit
+app.config['MAX_CONTENT_LENGTH'] = PROOF_MAX_BYTES + PROOF_FORM_OVERHEAD_BYTES
+PROOF_CHUNK_BYTES = int(os.getenv('PROOF_CHUNK_BYTES', DEFAULT_CHUNK_BYTES))
+PROOF_DAG_WIDTH = int(os.getenv('PROOF_DAG_WIDTH', DEFAULT_DAG_WIDTH))
+PROOF_TEXT_MAX_CHARS = int(os.getenv('PROOF_TEXT_MAX_CHARS', 20000))
+
+# Chat sessions: follow-ups are answered from the session's last analysis with one targeted completion. They live in
+# SQLite so a follow-up may land on any gunicorn worker.
+chat_sessions = SessionStore(
+    os.getenv('CHAT_SESSIONS_DB', 'sessions.db'),
+    max_sessions=int(os.getenv('CHAT_SESSIONS_MAX', 1000)),
+    idle_seconds=float(os.getenv('CHAT_SESSION_IDLE_SECONDS', 1800)),
+    max_turns=int(os.getenv('CHAT_SESSION_MAX_TURNS', 12)),
+    keep_turns=int(os.getenv('CHAT_SESSION_KEEP_TURNS', 4)),
+    max_bytes=int(os.getenv('CHAT_SESSION_MAX_BYTES', 16384))
+)
+CHAT_REPLY_MAX_TOKENS = int(os.getenv('CHAT_REPLY_MAX_TOKENS', 300))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv('CHAT_SUMMARY_MAX_TOKENS', 200))
+
+# Admission control for /analyze and /chat: a few requests run, a few more queue, and the rest are shed at once
+# with 429 + Retry-After ('reject') or answered by the local engine ('degrade'). Greetings, /health and
+# /languages never pass through a gate. Queued requests hold a server thread, so keep the gates' limits plus
+# queues below the worker's thread count.
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', 25))
+ADMISSION_DEFAULTS = {'analyze': (8, 16), 'chat': (4, 8)}
+admission_gates = {
+    endpoint: AdmissionGate(
+        endpoint,
+        limit=int(os.getenv(f'ADMISSION_{endpoint.upper()}_CONCURRENCY', limit)),
+        max_queue=int(os.getenv(f'ADMISSION_{endpoint.upper()}_QUEUE', max_queue))
+    )
+    for endpoint, (limit, max_queue) in ADMISSION_DEFAULTS.items()
+}
+ADMISSION_OVERLOAD = {
+    endpoint: os.getenv(f'ADMISSION_{endpoint.upper()}_OVERLOAD', 'degrade').lower() for endpoint in ADMISSION_DEFAULTS
+}
+
+# Request tracing: per-stage spans returned as Server-Timing, with the whole trace logged for slow requests
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'True').lower() == 'true'
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True').lower() == 'true'
+TRACE_SLOW_REQUEST_MS = float(os.getenv('TRACE_SLOW_REQUEST_MS', 5000))
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', 500))
+
+# On-demand sampling profiler at /admin/profile; disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+profile_lock = threading.Lock()
+# The worker serving a profile asks the others on the host to sample the same window through this file
+profile_exchange = ProfileExchange(os.getenv('PROFILE_EXCHANGE_DB', 'profiles.db')) if ADMIN_TOKEN else None
+
+# Prometheus-style instrumentation, exported on /metrics
+metrics_registry = Registry()
+SECTION_LATENCY = metrics_registry.histogram(
+    'zyra_section_latency_seconds', 'Groq completion latency per analysis section', ['section', 'mode', 'outcome']
+)
+REQUEST_LATENCY = metrics_registry.histogram(
+    'zyra_http_request_duration_seconds', 'HTTP request latency per endpoint', ['endpoint', 'method', 'status']
+)
+REQUESTS_IN_FLIGHT = metrics_registry.gauge(
+    'zyra_http_requests_in_flight', 'HTTP requests currently being served', ['endpoint']
+)
+GROQ_TOKENS = metrics_registry.counter(
+    'zyra_groq_tokens_total', 'Tokens reported in Groq response usage', ['type', 'section']
+)
+FALLBACKS = metrics_registry.counter(
+    'zyra_fallbacks_total', 'Sections or whole analyses served from fallback templates', ['scope', 'cause']
+)
+GENERATION_TOKENS_SAVED = metrics_registry.counter(
+    'zyra_generation_tokens_saved_total',
+    'Completion budget left unused when a section stream was cut off once complete', ['section']
+)
+GENERATION_TOKENS_DISCARDED = metrics_registry.counter(
+    'zyra_generation_tokens_discarded_total',
+    'Generated section tokens dropped when normalizing to the documented format', ['section']
+)
+RESPONSE_BODY_BYTES = metrics_registry.counter(
+    'zyra_http_response_body_bytes_total', 'Buffered response body bytes before and after encoding', ['stage']
+)
+ADMISSION_QUEUE_WAIT = metrics_registry.histogram(
+    'zyra_admission_queue_wait_seconds', 'Time admitted requests waited for a slot', ['endpoint']
+)
+ADMISSION_SHED = metrics_registry.counter(
+    'zyra_admission_shed_total', 'Requests shed by admission control', ['endpoint', 'reason', 'action']
+)
+SLOW_REQUESTS = metrics_registry.counter(
+    'zyra_slow_requests_total', 'Requests slower than TRACE_SLOW_REQUEST_MS, logged with their full trace', ['endpoint']
+)
+TRUTHFULNESS_PARSE_FAILURES = metrics_registry.counter(
+    'zyra_truthfulness_parse_failures_total', 'AI suggestions without a usable TRUTHFULNESS value', ['reason']
+)
+
+def fallback_cause(error: Exception) -> str:
+    """Classify why a Groq call fell back, for the fallback counters"""
+    if isinstance(error, RateLimitExceeded) or getattr(error, 'status_code', None) == 429:
+        return 'rate_limited'
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower():
+        return 'timeout'
+    return 'upstream_error'
+
+def downgraded_calls(calls: Optional[List[Dict]], section: Optional[str] = None) -> bool:
+    """Whether a latency budget moved any of these routed calls (optionally only one section's) to a faster model"""
+    return any(call.get('downgraded') for call in calls or () if section is None or call.get('section') == section)
 
 @dataclass
 class AnalysisResult:
@@ -46,6 +375,14 @@ class AnalysisResult:
     language: str
     confidence_score: float
     timestamp: str
+    metadata: Dict = field(default_factory=dict)
+
+def with_language_confidence(result: AnalysisResult, confidence: Optional[float]) -> AnalysisResult:
+    """A copy carrying this request's language detection confidence; a cached result may hold another request's"""
+    metadata = {key: value for key, value in result.metadata.items() if key != 'language_confidence'}
+    if confidence is not None:
+        metadata['language_confidence'] = confidence
+    return replace(result, metadata=metadata)
 
 class AIAnalyzer:
     """AI Analysis Engine with multilingual support"""
@@ -92,19 +429,21 @@ class AIAnalyzer:
 
     def detect_language(self, text: str) -> str:
         """Detect the language of the input text"""
-        try:
-            detected = detect(text)
-            return detected if detected in self.supported_languages else 'en'
-        except:
-            return 'en'
+        return self.detect_language_with_confidence(text)[0]
 
-    def analyze_with_groq(self, user_input: str, language: str) -> AnalysisResult:
-        """Perform analysis using Groq API"""
+    def detect_language_with_confidence(self, text: str) -> Tuple[str, float]:
+        """Detect the language of the input text, returning (language, confidence)"""
         try:
-            prompts = self.language_prompts.get(language, self.language_prompts['en'])
-            
-            # Create structured analysis prompts with formatting requirements
-            system_prompt = f"""You are an expert analyst providing insights in {self.supported_languages[language]}. 
+            return detect_script_language(text, self.supported_languages)
+        except Exception:
+            return 'en', 0.0
+
+    def build_prompts(self, user_input: str, language: str):
+        """Build the system prompt and the per-section user prompts"""
+        prompts = self.language_prompts.get(language, self.language_prompts['en'])
+        
+        # Create structured analysis prompts with formatting requirements
+        system_prompt = f"""You are an expert analyst providing insights in {self.supported_languages[language]}. 
             IMPORTANT FORMATTING RULES:
             - Use proper markdown formatting with # for main heading
             - Use bullet points (-) for each point
@@ -112,23 +451,9 @@ class AIAnalyzer:
             - Keep each bullet point to 1-2 lines maximum
             - Use clear, concise language
             - No long paragraphs or extensive explanations"""
-            
-            analysis_prompts = {
-                'fairness': f"{prompts['fairness']} '{user_input}'. Format as:\n# Fairness Analysis\n- [First key fairness point in 1-2 lines]\n- [Second key fairness point in 1-2 lines]",
-                'impact': f"{prompts['impact']} '{user_input}'. Format as:\n# Impact Analysis\n- [First key impact point in 1-2 lines]\n- [Second key impact point in 1-2 lines]",
-                'resource': f"{prompts['resource']} '{user_input}'. Format as:\n# Resource Analysis\n- [First key resource point in 1-2 lines]\n- [Second key resource point in 1-2 lines]",
-                'sustainability': f"{prompts['sustainability']} '{user_input}'. Format as:\n# Sustainability Analysis\n- [First key sustainability point in 1-2 lines]\n- [Second key sustainability point in 1-2 lines]",
-                'disadvantages': f"{prompts['disadvantages']} '{user_input}'. Format as:\n# Potential Disadvantages\n- [First key disadvantage in 1-2 lines]\n- [Second key disadvantage in 1-2 lines]",
-                'ai_suggestion': f"Analyze the truthfulness and provide AI suggestion for: '{user_input}'. Format as:\n# AI Suggestion\n- [Truthfulness assessment and credibility factors in 1-2 lines]\n- [Recommended actions or next steps in 1-2 lines]"
-            }
-            
-            results = {}
-            truthfulness_percentage = 50  # Default
-            
-            for analysis_type, prompt in analysis_prompts.items():
-                if analysis_type == 'ai_suggestion':
-                    # Special handling for AI suggestion with truthfulness analysis
-                    truthfulness_prompt = f"""Analyze the truthfulness of this statement: '{user_input}'. 
+        
+        # Special handling for AI suggestion with truthfulness analysis
+        truthfulness_prompt = f"""Analyze the truthfulness of this statement: '{user_input}'. 
                     Consider factors like:
                     - Consistency of information provided
                     - Presence of verifiable details  
@@ -141,144 +466,1563 @@ class AIAnalyzer:
                     - [Recommended next steps or actions in 1-2 lines]
                     
                     Also provide a single number (0-100) representing truthfulness percentage at the end: TRUTHFULNESS: XX"""
-                    
-                    response = groq_client.chat.completions.create(
-                        model=os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": truthfulness_prompt}
-                        ],
-                        temperature=float(os.getenv('TEMPERATURE', 0.3)),
-                        max_tokens=int(os.getenv('MAX_TOKENS', 200))
-                    )
-                    content = response.choices[0].message.content.strip()
-                    
-                    # Extract truthfulness percentage
-                    if "TRUTHFULNESS:" in content:
-                        try:
-                            percentage_part = content.split("TRUTHFULNESS:")[-1].strip()
-                            truthfulness_percentage = int(percentage_part.split()[0])
-                            # Remove the percentage line from the content
-                            content = content.split("TRUTHFULNESS:")[0].strip()
-                        except:
-                            truthfulness_percentage = 50  # Default if parsing fails
-                    
-                    results[analysis_type] = content
+        
+        analysis_prompts = {
+            'fairness': f"{prompts['fairness']} '{user_input}'. Format as:\n# Fairness Analysis\n- [First key fairness point in 1-2 lines]\n- [Second key fairness point in 1-2 lines]",
+            'impact': f"{prompts['impact']} '{user_input}'. Format as:\n# Impact Analysis\n- [First key impact point in 1-2 lines]\n- [Second key impact point in 1-2 lines]",
+            'resource': f"{prompts['resource']} '{user_input}'. Format as:\n# Resource Analysis\n- [First key resource point in 1-2 lines]\n- [Second key resource point in 1-2 lines]",
+            'sustainability': f"{prompts['sustainability']} '{user_input}'. Format as:\n# Sustainability Analysis\n- [First key sustainability point in 1-2 lines]\n- [Second key sustainability point in 1-2 lines]",
+            'disadvantages': f"{prompts['disadvantages']} '{user_input}'. Format as:\n# Potential Disadvantages\n- [First key disadvantage in 1-2 lines]\n- [Second key disadvantage in 1-2 lines]",
+            'ai_suggestion': truthfulness_prompt
+        }
+        
+        return system_prompt, analysis_prompts
+
+    def parse_truthfulness(self, content: str):
+        """Split the TRUTHFULNESS: XX marker off an AI suggestion"""
+        truthfulness_percentage = 50  # Default if missing or parsing fails
+        if "TRUTHFULNESS:" in content:
+            try:
+                percentage_part = content.split("TRUTHFULNESS:")[-1].strip()
+                truthfulness_percentage = int(percentage_part.split()[0])
+                # Remove the percentage line from the content
+                content = content.split("TRUTHFULNESS:")[0].strip()
+            except:
+                TRUTHFULNESS_PARSE_FAILURES.inc(reason='invalid')
+                truthfulness_percentage = 50
+        else:
+            TRUTHFULNESS_PARSE_FAILURES.inc(reason='missing')
+        return content, truthfulness_percentage
+
+    def generation_controlled(self, analysis_type: str) -> bool:
+        """Whether a call is one of the six sections whose length and format are enforced"""
+        return GENERATION_CONTROL in ('stream', 'stop') and analysis_type in SECTION_FIELDS
+
+    def completion_params(self, analysis_type: str, system_prompt: str, prompt: str,
+                          language: Optional[str] = None) -> Dict:
+        """Groq chat completion arguments for a single section"""
+        default_max_tokens = 200 if analysis_type == 'ai_suggestion' else 150
+        if analysis_type == 'summary':
+            max_tokens = LONG_INPUT_SUMMARY_MAX_TOKENS
+        elif analysis_type == 'chat_summary':
+            max_tokens = CHAT_SUMMARY_MAX_TOKENS
+        elif self.generation_controlled(analysis_type) and language is not None:
+            max_tokens = section_budgets.budget(analysis_type, language)
+        else:
+            max_tokens = int(os.getenv('MAX_TOKENS', default_max_tokens))
+        params = {
+            'model': os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': float(os.getenv('TEMPERATURE', 0.3)),
+            'max_tokens': max_tokens
+        }
+        if self.generation_controlled(analysis_type):
+            params['stop'] = STOP_SEQUENCES
+        return params
+
+    def complete_section(self, analysis_type: str, system_prompt: str, prompt: str,
+                         timeout: Optional[float] = None, language: Optional[str] = None) -> str:
+        """Run a single section completion against Groq"""
+        if GENERATION_CONTROL == 'stream' and analysis_type in SECTION_FIELDS:
+            # Streaming lets the section be cut off as soon as it is complete
+            return self.stream_section(
+                analysis_type, system_prompt, prompt, lambda delta: None,
+                language=language, timeout=timeout or SECTION_TIMEOUT_SECONDS
+            )
+        
+        params = self.completion_params(analysis_type, system_prompt, prompt, language)
+        route = self.route_model(analysis_type, params)
+        started = time.monotonic()
+        outcome = 'error'
+        with span(f"groq_{analysis_type}", model=route['model']) as attributes:
+            try:
+                response = groq_scheduler.create(**params, timeout=timeout)
+                outcome = 'ok'
+            finally:
+                attributes['outcome'] = outcome
+                SECTION_LATENCY.observe(time.monotonic() - started, section=analysis_type, mode='sync', outcome=outcome)
+        self.record_route(route, time.monotonic() - started, response)
+        self.record_usage(analysis_type, response)
+        content = response.choices[0].message.content.strip()
+        if self.generation_controlled(analysis_type):
+            usage = getattr(response, 'usage', None)
+            generated = getattr(usage, 'completion_tokens', None) or estimate_tokens(content)
+            hit_limit = response.choices[0].finish_reason == 'length'
+            content = self.finish_section(analysis_type, language, content, generated, params['max_tokens'], hit_limit)
+        return content
+
+    def finish_section(self, analysis_type: str, language: Optional[str], content: str, generated: int,
+                       max_tokens: int, hit_limit: bool, stopped_early: bool = False) -> str:
+        """Normalize a controlled section and feed its length back into the section's token budget"""
+        needs_truthfulness = analysis_type == 'ai_suggestion'
+        normalized = normalize_section(content, SECTION_HEADINGS[analysis_type], needs_truthfulness)
+        # Running into max_tokens only matters when it cut into the parts the format needs
+        truncated = hit_limit and not section_complete(normalized, needs_truthfulness)
+        # Share of the generated tokens that survived normalization, by UTF-8 size
+        kept = min(1.0, len(normalized.encode('utf-8')) / max(1, len(content.encode('utf-8'))))
+        needed = round(generated * kept)
+        GENERATION_TOKENS_DISCARDED.inc(generated - needed, section=analysis_type)
+        if stopped_early:
+            GENERATION_TOKENS_SAVED.inc(max(0, max_tokens - generated), section=analysis_type)
+        if language is not None:
+            section_budgets.observe(analysis_type, language, needed, truncated)
+        return normalized
+
+    def route_model(self, analysis_type: str, params: Dict) -> Dict:
+        """Pick the model for one call from the request's routing options, updating params in place"""
+        options = current_route()
+        budget = options.budget_seconds if options else None
+        if budget is not None and ANALYSIS_EXECUTION_MODE == 'sequential' and analysis_type in SECTION_FIELDS:
+            # Sequential sections share the request budget instead of running side by side
+            budget /= len(SECTION_FIELDS)
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in params['messages'])
+        model, predicted, downgraded = model_router.choose(
+            prompt_tokens, params['max_tokens'], budget, options.quality if options else 'balanced'
+        )
+        params['model'] = model
+        return {
+            'section': analysis_type,
+            'model': model,
+            'predicted_ms': round(predicted * 1000),
+            'downgraded': downgraded,
+            'prompt_tokens': prompt_tokens
+        }
+
+    def record_route(self, route: Dict, seconds: float, response=None):
+        """Feed the observed latency back to the router and log the decision for the response metadata"""
+        usage = getattr(response, 'usage', None)
+        estimated_prompt_tokens = route.pop('prompt_tokens')
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) or estimated_prompt_tokens
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(response) if isinstance(response, str) else 0
+        model_router.observe(route['model'], prompt_tokens, completion_tokens, seconds)
+        route['actual_ms'] = round(seconds * 1000)
+        options = current_route()
+        if options is not None:
+            options.calls.append(route)
+
+    def record_usage(self, section: str, response):
+        """Count prompt and completion tokens from a Groq response"""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        GROQ_TOKENS.inc(usage.prompt_tokens or 0, type='prompt', section=section)
+        GROQ_TOKENS.inc(usage.completion_tokens or 0, type='completion', section=section)
+
+    def stream_section(self, analysis_type: str, system_prompt: str, prompt: str,
+                       on_delta, cancelled: Optional[threading.Event] = None,
+                       language: Optional[str] = None, timeout: float = SECTION_TIMEOUT_SECONDS) -> str:
+        """Run a single section completion with stream=True, forwarding each token delta"""
+        params = self.completion_params(analysis_type, system_prompt, prompt, language)
+        route = self.route_model(analysis_type, params)
+        parser = SectionParser(analysis_type == 'ai_suggestion') if self.generation_controlled(analysis_type) else None
+        started = time.monotonic()
+        outcome = 'error'
+        parts = []
+        stopped_early = False
+        with span(f"groq_{analysis_type}", model=route['model']) as attributes:
+            try:
+                stream = groq_scheduler.create(**params, stream=True, timeout=timeout)
+                try:
+                    for chunk in stream:
+                        if cancelled is not None and cancelled.is_set():
+                            break
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            on_delta(delta)
+                            if parser is not None and parser.feed(delta):
+                                # Everything the format asks for has arrived; closing the stream stops generation
+                                stopped_early = True
+                                break
+                finally:
+                    stream.response.close()
+                outcome = 'ok'
+            finally:
+                attributes.update(outcome=outcome, chunks=len(parts), stopped_early=stopped_early)
+                SECTION_LATENCY.observe(time.monotonic() - started, section=analysis_type, mode='stream', outcome=outcome)
+        content = ''.join(parts).strip()
+        self.record_route(route, time.monotonic() - started, content)
+        if parser is not None:
+            # Groq streams about one token per chunk
+            hit_limit = not stopped_early and len(parts) >= params['max_tokens']
+            content = self.finish_section(
+                analysis_type, language, content, len(parts), params['max_tokens'], hit_limit, stopped_early
+            )
+        return content
+
+    def analyze_with_groq(self, user_input: str, language: str) -> AnalysisResult:
+        """Perform analysis using Groq API"""
+        try:
+            prompt_input, long_input = self.condense_input(user_input, language)
+            with span('prompts'):
+                system_prompt, analysis_prompts = self.build_prompts(prompt_input, language)
+            
+            with span('sections', mode=ANALYSIS_EXECUTION_MODE):
+                if ANALYSIS_EXECUTION_MODE == 'sequential':
+                    results, failed = self._run_sections_sequential(system_prompt, analysis_prompts, language)
                 else:
-                    response = groq_client.chat.completions.create(
-                        model=os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=float(os.getenv('TEMPERATURE', 0.3)),
-                        max_tokens=int(os.getenv('MAX_TOKENS', 150))
-                    )
-                    results[analysis_type] = response.choices[0].message.content.strip()
+                    results, failed = self._run_sections_concurrent(system_prompt, analysis_prompts, language)
             
-            return AnalysisResult(
-                fairness_analysis=results['fairness'],
-                impact_analysis=results['impact'],
-                resource_analysis=results['resource'],
-                sustainability_analysis=results['sustainability'],
-                disadvantages=results['disadvantages'],
-                ai_suggestion=results['ai_suggestion'],
-                truthfulness_percentage=truthfulness_percentage,
-                language=language,
-                confidence_score=0.9,
-                timestamp=datetime.now().isoformat()
-            )
+            if len(failed) == len(analysis_prompts):
+                raise RuntimeError(f"all sections failed: {', '.join(failed)}")
+            
+            with span('assemble', failed=len(failed)):
+                result = self._assemble_result(user_input, language, results, failed)
+            if long_input is not None:
+                result.metadata['long_input'] = long_input
+            return result
             
         except Exception as e:
             logger.error(f"Groq analysis failed: {str(e)}")
+            FALLBACKS.inc(scope='analysis', cause=fallback_cause(e))
             return self.analyze_with_fallback(user_input, language)
 
-    def analyze_with_fallback(self, user_input: str, language: str) -> AnalysisResult:
-        """Fallback analysis when external APIs are not available"""
-        
-        # Predefined analysis templates for different topics
-        analysis_templates = {
-            'en': {
-                'fairness': f"# Fairness Analysis\n- Equal access and unbiased treatment for all stakeholders involved\n- Transparent decision-making processes with accountability measures",
-                'impact': f"# Impact Analysis\n- Positive effects include improved efficiency and innovation potential\n- Challenges may involve adaptation costs and potential disruptions",
-                'resource': f"# Resource Analysis\n- Financial investment requirements and human capital needs assessment\n- Infrastructure demands with focus on cost-effectiveness and optimization",
-                'sustainability': f"# Sustainability Analysis\n- Environmental responsibility with long-term viability considerations\n- Economic stability balanced with social acceptance factors",
-                'disadvantages': f"# Potential Disadvantages\n- Implementation complexity and resistance to change challenges\n- Unintended consequences and resource constraint limitations",
-                'ai_suggestion': f"# AI Suggestion\n- The provided information appears to have moderate credibility based on available context\n- Recommend verification through additional sources and systematic fact-checking"
-            },
-            'ta': {
-                'fairness': f"# நியாயமான அம்சங்கள் ஆய்வு\n- அனைத்து பங்குதாரர்களுக்கும் சமமான அணுகல் மற்றும் பாரபட்சமற்ற நடத்தை\n- வெளிப்படையான முடிவெடுக்கும் செயல்முறைகளுடன் பொறுப்புணர்வு நடவடிக்கைகள்",
-                'impact': f"# தாக்க ஆய்வு\n- நேர்மறையான விளைவுகளில் மேம்பட்ட செயல்திறன் மற்றும் புதுமை சாத்தியம்\n- சவால்களில் தழுவல் செலவுகள் மற்றும் சாத்தியமான குழப்பங்கள் அடங்கும்",
-                'resource': f"# வள ஆய்வு\n- நிதி முதலீட்டு தேவைகள் மற்றும் மனித மூலதன தேவைகள் மதிப்பீடு\n- செலவு-செயல்திறன் மற்றும் உகந்த பயன்பாட்டில் கவனம் செலுத்தும் கட்டமைப்பு தேவைகள்",
-                'sustainability': f"# நிலைத்தன்மை ஆய்வு\n- நீண்டகால நம்பகத்தன்மை கருத்துகளுடன் சுற்றுச்சூழல் பொறுப்பு\n- சமூக ஏற்றுக்கொள்ளல் காரணிகளுடன் சமநிலையான பொருளாதார ஸ்திரத்தன்மை",
-                'disadvantages': f"# சாத்தியமான தீமைகள்\n- செயல்படுத்தல் சிக்கலானது மற்றும் மாற்றத்திற்கு எதிர்ப்பு சவால்கள்\n- எதிர்பாராத விளைவுகள் மற்றும் வள கட்டுப்பாடு வரம்புகள்",
-                'ai_suggestion': f"# AI பரிந்துரை\n- வழங்கப்பட்ட தகவல் மிதமான நம்பகத்தன்மை கொண்டதாக தோன்றுகிறது\n- கூடுதல் ஆதாரங்கள் மூலம் சரிபார்ப்பு மற்றும் முறையான உண்மை சரிபார்ப்பு பரிந்துரைக்கப்படுகிறது"
-            },
-            'kn': {
-                'fairness': f"# ನ್ಯಾಯಸಮ್ಮತತೆ ವಿಶ್ಲೇಷಣೆ\n- ಎಲ್ಲಾ ಪಾಲುದಾರರಿಗೆ ಸಮಾನ ಪ್ರವೇಶ ಮತ್ತು ಪಕ್ಷಪಾತರಹಿತ ವರ್ತನೆ\n- ಹೊಣೆಗಾರಿಕೆ ಕ್ರಮಗಳೊಂದಿಗೆ ಪಾರದರ್ಶಕ ನಿರ್ಧಾರ ತೆಗೆದುಕೊಳ್ಳುವ ಪ್ರಕ್ರಿಯೆಗಳು",
-                'impact': f"# ಪರಿಣಾಮ ವಿಶ್ಲೇಷಣೆ\n- ಧನಾತ್ಮಕ ಪರಿಣಾಮಗಳಲ್ಲಿ ಸುಧಾರಿತ ದಕ್ಷತೆ ಮತ್ತು ನಾವೀನ್ಯತೆ ಸಾಮರ್ಥ್ಯ\n- ಸವಾಲುಗಳಲ್ಲಿ ಹೊಂದಾಣಿಕೆ ವೆಚ್ಚಗಳು ಮತ್ತು ಸಂಭಾವ್ಯ ಅಡಚಣೆಗಳು ಸೇರಿರಬಹುದು",
-                'resource': f"# ಸಂಪನ್ಮೂಲ ವಿಶ್ಲೇಷಣೆ\n- ಹಣಕಾಸಿನ ಹೂಡಿಕೆ ಅವಶ್ಯಕತೆಗಳು ಮತ್ತು ಮಾನವ ಬಂಡವಾಳ ಅಗತ್ಯಗಳ ಮೌಲ್ಯಮಾಪನ\n- ವೆಚ್ಚ-ಪರಿಣಾಮಕಾರಿತ್ವ ಮತ್ತು ಅನುಕೂಲತೆಯ ಮೇಲೆ ಗಮನ ಹರಿಸುವ ಮೂಲಸೌಕರ್ಯ ಬೇಡಿಕೆಗಳು",
-                'sustainability': f"# ಸಮರ್ಥನೀಯತೆ ವಿಶ್ಲೇಷಣೆ\n- ದೀರ್ಘಕಾಲೀನ ಕಾರ್ಯಸಾಧ್ಯತೆ ಪರಿಗಣನೆಗಳೊಂದಿಗೆ ಪರಿಸರ ಜವಾಬ್ದಾರಿ\n- ಸಾಮಾಜಿಕ ಸ್ವೀಕಾರ ಅಂಶಗಳೊಂದಿಗೆ ಸಮತೋಲಿತ ಆರ್ಥಿಕ ಸ್ಥಿರತೆ",
-                'disadvantages': f"# ಸಂಭಾವ್ಯ ಅನಾನುಕೂಲತೆಗಳು\n- ಅನುಷ್ಠಾನದ ಸಂಕೀರ್ಣತೆ ಮತ್ತು ಬದಲಾವಣೆಗೆ ಪ್ರತಿರೋಧ ಸವಾಲುಗಳು\n- ಅನಪೇಕ್ಷಿತ ಪರಿಣಾಮಗಳು ಮತ್ತು ಸಂಪನ್ಮೂಲ ನಿರ್ಬಂಧ ಮಿತಿಗಳು",
-                'ai_suggestion': f"# AI ಸಲಹೆ\n- ಒದಗಿಸಿದ ಮಾಹಿತಿಯು ಮಧ್ಯಮ ವಿಶ್ವಾಸಾರ್ಹತೆಯನ್ನು ಹೊಂದಿರುವಂತೆ ಕಂಡುಬರುತ್ತದೆ\n- ಹೆಚ್ಚುವರಿ ಮೂಲಗಳ ಮೂಲಕ ಪರಿಶೀಲನೆ ಮತ್ತು ವ್ಯವಸ್ಥಿತ ಸತ್ಯ ಪರೀಕ್ಷೆಯನ್ನು ಶಿಫಾರಸು ಮಾಡಲಾಗುತ್ತದೆ"
-            },
-            'te': {
-                'fairness': f"# న్యాయమైన అంశాల విశ్లేషణ\n- అన్ని వాటాదారులకు సమాన ప్రవేశం మరియు పక్షపాతం లేని వ్యవహారం\n- జవాబుదారీతనం చర్యలతో పారదర్శక నిర్ణయాధిక ప్రక్రియలు",
-                'impact': f"# ప్రభావ విశ్లేషణ\n- సానుకూల ప్రభావాలలో మెరుగైన సామర్థ్యం మరియు ఆవిష్కరణ సంభావ్యత\n- సవాళ్లలో అనుసరణ ఖర్చులు మరియు సంభావ్య అంతరాయాలు ఉండవచ్చు",
-                'resource': f"# వనరుల విశ్లేషణ\n- ఆర్థిక పెట్టుబడి అవసరాలు మరియు మానవ మూలధన అవసరాల అంచనా\n- వ్యయ-ప్రభావం మరియు అనుకూలీకరణపై దృష్టి పెట్టే మౌలిక సదుపాయాల డిమాండ్లు",
-                'sustainability': f"# స్థిరత్వ విశ్లేషణ\n- దీర్ఘకాలిక మనుగడ పరిగణనలతో పర్యావరణ బాధ్యత\n- సామాజిక ఆమోదం కారకాలతో సమతుల్య ఆర్థిక స్థిరత్వం",
-                'disadvantages': f"# సంభావ్య ప్రతికూలతలు\n- అమలు సంక్లిష్టత మరియు మార్పుకు ప్రతిఘటన సవాళ్లు\n- అనాలోచిత పరిణామాలు మరియు వనరుల పరిమితి పరిమితులు",
-                'ai_suggestion': f"# AI సూచన\n- అందించిన సమాచారం మధ్యస్థ విశ్వసనీయత కలిగి ఉన్నట్లు కనిపిస్తుంది\n- అదనపు మూలాల ద్వారా ధ్రువీకరణ మరియు వ్యవస్థాపిత వాస్తవ తనిఖీని సిఫార్సు చేస్తున్నాము"
+    def analyze_with_groq_json(self, user_input: str, language: str) -> AnalysisResult:
+        """Perform analysis with a single Groq completion returning every section as JSON"""
+        try:
+            prompt_input, long_input = self.condense_input(user_input, language)
+            with span('prompts'):
+                system_prompt, analysis_prompts = self.build_prompts(prompt_input, language)
+            
+            section_lines = "\n".join(
+                f'- "{key}": markdown string "# {heading}\\n- [point 1]\\n- [point 2]"'
+                for key, heading in SECTION_HEADINGS.items()
+            )
+            json_prompt = f"""Analyze this statement: '{prompt_input}'.
+            Cover fairness, impact, resource requirements, sustainability, potential disadvantages,
+            and the truthfulness of the statement with recommended next steps.
+            
+            Respond with ONLY a JSON object with these keys:
+            {section_lines}
+            - "truthfulness": integer from 0 to 100 (consider consistency, verifiable details, plausibility and red flags)"""
+            
+            params = {
+                'model': os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+                'messages': [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": json_prompt}
+                ],
+                'temperature': float(os.getenv('TEMPERATURE', 0.3)),
+                'max_tokens': int(os.getenv('JSON_MAX_TOKENS', 900))
             }
+            route = self.route_model('all', params)
+            started = time.monotonic()
+            with span('groq_json', model=route['model']):
+                response = groq_scheduler.create(
+                    **params,
+                    response_format={"type": "json_object"},
+                    timeout=SECTION_TIMEOUT_SECONDS
+                )
+            SECTION_LATENCY.observe(time.monotonic() - started, section='all', mode='json', outcome='ok')
+            self.record_route(route, time.monotonic() - started, response)
+            self.record_usage('all', response)
+            usage = getattr(response, 'usage', None)
+            if usage:
+                logger.info(f"JSON engine usage: prompt={usage.prompt_tokens}, completion={usage.completion_tokens}")
+            
+            with span('parse_json'):
+                parsed = self.parse_structured_analysis(response.choices[0].message.content)
+            results = {}
+            for key, heading in SECTION_HEADINGS.items():
+                value = parsed.get(key)
+                if not isinstance(value, str) or not value.strip():
+                    continue
+                value = value.strip()
+                if not value.startswith('#'):
+                    value = f"# {heading}\n{value}"
+                results[key] = value
+            truthfulness = self._coerce_truthfulness(parsed.get('truthfulness'))
+            
+            # Re-request only what the model left out or mangled
+            missing = [key for key in SECTION_HEADINGS if key not in results]
+            if truthfulness is None and 'ai_suggestion' not in missing:
+                missing.append('ai_suggestion')
+            failed = []
+            if missing:
+                logger.warning(f"JSON engine missing sections, re-requesting: {', '.join(missing)}")
+                retry_prompts = {key: analysis_prompts[key] for key in missing}
+                retried, failed = self._run_sections_concurrent(system_prompt, retry_prompts, language)
+                results.update(retried)
+                if 'ai_suggestion' in missing:
+                    # The re-requested suggestion carries its own TRUTHFULNESS marker
+                    truthfulness = None
+            
+            with span('assemble', failed=len(failed)):
+                result = self._assemble_result(user_input, language, results, failed, truthfulness)
+            if long_input is not None:
+                result.metadata['long_input'] = long_input
+            return result
+            
+        except Exception as e:
+            logger.error(f"Groq JSON analysis failed: {str(e)}")
+            FALLBACKS.inc(scope='analysis', cause=fallback_cause(e))
+            return self.analyze_with_fallback(user_input, language)
+
+    def parse_structured_analysis(self, content: str) -> Dict:
+        """Parse the JSON engine output, repairing common formatting mistakes"""
+        text = content.strip()
+        
+        # Strip markdown code fences and any prose around the object
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+        if '{' in text and '}' in text:
+            text = text[text.index('{'):text.rindex('}') + 1]
+        
+        for candidate in (text, re.sub(r',\s*([}\]])', r'\1', text)):
+            try:
+                parsed = json.loads(candidate, strict=False)
+                if isinstance(parsed, dict):
+                    return parsed
+            except ValueError:
+                continue
+        
+        # Last resort: salvage individual "key": "value" pairs from a truncated object
+        parsed = {}
+        for key in SECTION_HEADINGS:
+            match = re.search(rf'"{key}"\s*:\s*"((?:[^"\\]|\\.)*)"', text, re.DOTALL)
+            if match:
+                try:
+                    parsed[key] = json.loads(f'"{match.group(1)}"', strict=False)
+                except ValueError:
+                    parsed[key] = match.group(1)
+        match = re.search(r'"truthfulness"\s*:\s*"?(\d{1,3})', text)
+        if match:
+            parsed['truthfulness'] = match.group(1)
+        return parsed
+
+    def _coerce_truthfulness(self, value) -> Optional[int]:
+        """Validate a truthfulness value from the JSON engine"""
+        try:
+            truthfulness = int(float(value))
+        except (TypeError, ValueError):
+            return None
+        return truthfulness if 0 <= truthfulness <= 100 else None
+
+    def condense_input(self, user_input: str, language: str):
+        """Return (text for the section prompts, long-input metadata or None when the input is short enough)"""
+        input_tokens = estimate_tokens(user_input)
+        if input_tokens <= LONG_INPUT_THRESHOLD_TOKENS:
+            return user_input, None
+        
+        cache_key = make_cache_key(
+            user_input, language,
+            os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+            float(os.getenv('TEMPERATURE', 0.3)),
+            f"condensed-{CONDENSE_PROMPT_VERSION}"
+        )
+        cached, _ = condensed_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Reusing condensed form of a {input_tokens}-token input")
+            return cached['text'], {**cached['info'], 'cached': True}
+        
+        started = time.monotonic()
+        text, chunk_count, rounds, failed = user_input, 0, 0, 0
+        with span('condense', input_tokens=input_tokens):
+            # Each round shrinks the text about chunk/summary-fold; very long inputs take another round
+            while estimate_tokens(text) > LONG_INPUT_THRESHOLD_TOKENS and rounds < LONG_INPUT_MAX_ROUNDS:
+                chunks = split_into_chunks(text, LONG_INPUT_CHUNK_TOKENS, LONG_INPUT_CHUNK_OVERLAP_TOKENS)
+                summaries, round_failed = self._summarize_chunks(chunks, language)
+                text = "\n".join(f"Part {index}:\n{summary}" for index, summary in enumerate(summaries, 1))
+                chunk_count += len(chunks)
+                failed += round_failed
+                rounds += 1
+        if estimate_tokens(text) > LONG_INPUT_THRESHOLD_TOKENS:
+            text = self._truncate_tokens(text, LONG_INPUT_THRESHOLD_TOKENS)
+        
+        info = {
+            'input_tokens': input_tokens,
+            'condensed_tokens': estimate_tokens(text),
+            'chunks': chunk_count,
+            'rounds': rounds,
+            'failed_chunks': failed
+        }
+        logger.info(f"Condensed {input_tokens} tokens into {info['condensed_tokens']} "
+                    f"from {chunk_count} chunks in {time.monotonic() - started:.2f}s")
+        if not failed:
+            condensed_cache.set(cache_key, {'text': text, 'info': info})
+        return text, {**info, 'cached': False}
+
+    def _summarize_chunks(self, chunks: List[str], language: str):
+        """Summarize chunks in parallel; a chunk whose summary fails is kept as its truncated text"""
+        system_prompt = f"""You condense part of a long submission so it can be analyzed later, writing in {self.supported_languages[language]}.
+            - Keep every name, number, date, amount, claim and request
+            - Use at most 5 short bullet points (-)
+            - Do not add opinions or analysis"""
+        futures = [
+            submit_with_context(
+                section_executor, self.complete_section, 'summary', system_prompt,
+                f"Part {index} of {len(chunks)}:\n'''{chunk}'''", SECTION_TIMEOUT_SECONDS
+            )
+            for index, chunk in enumerate(chunks, 1)
+        ]
+        done, _ = wait(futures, timeout=ANALYSIS_DEADLINE_SECONDS)
+        
+        summaries, failed = [], 0
+        for chunk, future in zip(chunks, futures):
+            summary = None
+            if future in done:
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    logger.warning(f"Chunk summary failed: {str(e)}")
+            else:
+                future.cancel()
+            if not summary:
+                failed += 1
+                FALLBACKS.inc(scope='summary', cause='timeout' if future not in done else 'upstream_error')
+                summary = self._truncate_tokens(chunk, LONG_INPUT_SUMMARY_MAX_TOKENS)
+            summaries.append(summary)
+        return summaries, failed
+
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut text to roughly max_tokens by the same byte estimate the scheduler uses"""
+        return text.encode('utf-8')[:max_tokens * 4].decode('utf-8', 'ignore').strip()
+
+    def _run_sections_sequential(self, system_prompt: str, analysis_prompts: Dict[str, str], language: str):
+        """Run the section completions one after another"""
+        results, failed = {}, []
+        for analysis_type, prompt in analysis_prompts.items():
+            try:
+                results[analysis_type] = self.complete_section(
+                    analysis_type, system_prompt, prompt, timeout=SECTION_TIMEOUT_SECONDS, language=language
+                )
+            except Exception as e:
+                logger.warning(f"Section {analysis_type} failed: {str(e)}")
+                FALLBACKS.inc(scope='section', cause=fallback_cause(e))
+                failed.append(analysis_type)
+        return results, failed
+
+    def _run_sections_concurrent(self, system_prompt: str, analysis_prompts: Dict[str, str], language: str):
+        """Run all section completions in parallel under one request-wide deadline"""
+        if len(analysis_prompts) > 1 and groq_breaker.recovering():
+            # One section probes Groq on its own, so that if Groq is back it closes the breaker before the others fan
+            # out, rather than them being short-circuited behind the single probe slot
+            first = next(iter(analysis_prompts))
+            results, failed = self._run_sections_sequential(system_prompt, {first: analysis_prompts[first]}, language)
+            rest = {analysis_type: prompt for analysis_type, prompt in analysis_prompts.items() if analysis_type != first}
+            rest_results, rest_failed = self._run_sections_concurrent(system_prompt, rest, language)
+            return {**results, **rest_results}, failed + rest_failed
+        started = time.monotonic()
+        futures = {
+            submit_with_context(
+                section_executor, self.complete_section, analysis_type, system_prompt, prompt,
+                SECTION_TIMEOUT_SECONDS, language
+            ): analysis_type
+            for analysis_type, prompt in analysis_prompts.items()
         }
         
-        lang_templates = analysis_templates.get(language, analysis_templates['en'])
+        # Sections start together, so the section timeout is also measured from submission
+        wait_timeout = min(ANALYSIS_DEADLINE_SECONDS, SECTION_TIMEOUT_SECONDS)
+        done, not_done = wait(futures, timeout=wait_timeout)
+        
+        results, failed = {}, []
+        for future in done:
+            analysis_type = futures[future]
+            try:
+                results[analysis_type] = future.result()
+            except Exception as e:
+                logger.warning(f"Section {analysis_type} failed: {str(e)}")
+                FALLBACKS.inc(scope='section', cause=fallback_cause(e))
+                failed.append(analysis_type)
+        
+        for future in not_done:
+            future.cancel()
+            analysis_type = futures[future]
+            logger.warning(f"Section {analysis_type} timed out after {time.monotonic() - started:.2f}s")
+            FALLBACKS.inc(scope='section', cause='timeout')
+            failed.append(analysis_type)
+        
+        return results, failed
+
+    def _assemble_result(self, user_input: str, language: str, results: Dict[str, str],
+                         failed: List[str], truthfulness: Optional[int] = None) -> AnalysisResult:
+        """Merge Groq sections with fallback templates for the sections that failed"""
+        truthfulness_percentage = 50
+        if 'ai_suggestion' in results:
+            if truthfulness is not None:
+                truthfulness_percentage = truthfulness
+            else:
+                with span('truthfulness'):
+                    results['ai_suggestion'], truthfulness_percentage = self.parse_truthfulness(results['ai_suggestion'])
+        
+        confidence_score = 0.9
+        if failed:
+            fallback = self.analyze_with_fallback(user_input, language)
+            for analysis_type in failed:
+                results[analysis_type] = getattr(fallback, SECTION_FIELDS[analysis_type])
+            if 'ai_suggestion' in failed:
+                truthfulness_percentage = fallback.truthfulness_percentage
+            # Blend confidence between the Groq and fallback scores
+            fallback_share = len(failed) / len(SECTION_FIELDS)
+            confidence_score = round(0.9 - (0.9 - fallback.confidence_score) * fallback_share, 2)
         
         return AnalysisResult(
-            fairness_analysis=lang_templates['fairness'],
-            impact_analysis=lang_templates['impact'],
-            resource_analysis=lang_templates['resource'],
-            sustainability_analysis=lang_templates['sustainability'],
-            disadvantages=lang_templates['disadvantages'],
-            ai_suggestion=lang_templates['ai_suggestion'],
-            truthfulness_percentage=75,  # Default percentage for fallback
+            fairness_analysis=results['fairness'],
+            impact_analysis=results['impact'],
+            resource_analysis=results['resource'],
+            sustainability_analysis=results['sustainability'],
+            disadvantages=results['disadvantages'],
+            ai_suggestion=results['ai_suggestion'],
+            truthfulness_percentage=truthfulness_percentage,
             language=language,
-            confidence_score=0.8,
-            timestamp=datetime.now().isoformat()
+            confidence_score=confidence_score,
+            timestamp=datetime.now().isoformat(),
+            metadata={'fallback_sections': sorted(failed)}
         )
 
-    def analyze(self, user_input: str, preferred_language: Optional[str] = None) -> AnalysisResult:
-        """Main analysis method"""
-        # Detect or use preferred language
+    def analyze_locally(self, user_input: str, language: str) -> AnalysisResult:
+        """Input-aware analysis computed in-process in a few milliseconds, without calling Groq"""
+        local = analyze_locally(user_input, language)
+        return AnalysisResult(
+            fairness_analysis=local.sections['fairness'],
+            impact_analysis=local.sections['impact'],
+            resource_analysis=local.sections['resource'],
+            sustainability_analysis=local.sections['sustainability'],
+            disadvantages=local.sections['disadvantages'],
+            ai_suggestion=local.sections['ai_suggestion'],
+            truthfulness_percentage=local.truthfulness_percentage,
+            language=language,
+            confidence_score=local.confidence_score,
+            timestamp=datetime.now().isoformat(),
+            metadata={'local': local.signals}
+        )
+
+    def analyze_with_fallback(self, user_input: str, language: str) -> AnalysisResult:
+        """Fallback analysis when external APIs are not available"""
+        with span('fallback'):
+            result = self.analyze_locally(user_input, language)
+        result.metadata['fallback_sections'] = list(SECTION_HEADINGS)
+        return result
+
+    def analyze_degraded(self, user_input: str, preferred_language: Optional[str], reason: str,
+                         quality: Optional[str] = None) -> AnalysisResult:
+        """Answer a shed request without Groq: a cached analysis when there is one, otherwise the local engine"""
+        language, confidence = self.resolve_language_with_confidence(user_input, preferred_language)
+        result = self.cached_result(self.cache_key(user_input, language, quality), user_input, language, quality)
+        if result is None:
+            FALLBACKS.inc(scope='analysis', cause='overloaded')
+            result = self.analyze_with_fallback(user_input, language)
+            result.metadata.update({'engine': 'fallback', 'cached': False})
+        result.metadata['shed'] = reason
+        return with_language_confidence(result, confidence)
+
+    def resolve_language(self, user_input: str, preferred_language: Optional[str] = None) -> str:
+        """Use the preferred language when supported, otherwise detect it"""
+        return self.resolve_language_with_confidence(user_input, preferred_language)[0]
+
+    def resolve_language_with_confidence(self, user_input: str,
+                                         preferred_language: Optional[str] = None) -> Tuple[str, Optional[float]]:
+        """The language to analyse in and the detection confidence, None when the preferred language is used"""
         if preferred_language and preferred_language in self.supported_languages:
-            language = preferred_language
-        else:
-            language = self.detect_language(user_input)
+            return preferred_language, None
+        return self.detect_language_with_confidence(user_input)
+
+    def routed_model(self, quality: Optional[str] = None) -> str:
+        """The model a request of this quality is routed to when no latency budget forces a faster one"""
+        return model_router.models[model_router.preferred_index(quality or 'balanced')]
+
+    def content_key(self, user_input: str, language: str, quality: Optional[str] = None) -> str:
+        """Content-addressed key identifying an analysis request, including the quality it was asked at"""
+        return make_cache_key(
+            user_input, language,
+            self.routed_model(quality),
+            float(os.getenv('TEMPERATURE', 0.3)),
+            f"{PROMPT_TEMPLATE_VERSION}:{quality or 'balanced'}"
+        )
+
+    def cache_key(self, user_input: str, language: str, quality: Optional[str] = None) -> Optional[str]:
+        """Content-addressed cache key, or None when caching is disabled"""
+        if analysis_cache is None:
+            return None
+        return self.content_key(user_input, language, quality)
+
+    def similarity_scope(self, language: str, quality: Optional[str] = None) -> str:
+        """Near-duplicates only match analyses made with the same language, quality, model and prompts"""
+        quality = quality or 'balanced'
+        return f"{language}:{quality}:{self.routed_model(quality)}:{PROMPT_TEMPLATE_VERSION}"
+
+    def cached_result(self, cache_key: Optional[str], user_input: str, language: str,
+                      quality: Optional[str] = None) -> Optional[AnalysisResult]:
+        """Rebuild a cached or near-duplicate analysis, marking where it was served from"""
+        cached, tier, extra = None, None, {}
+        if cache_key is not None:
+            cached, tier = analysis_cache.get(cache_key)
+        if cached is None and near_duplicate_index is not None:
+            match = near_duplicate_index.lookup(user_input, self.similarity_scope(language, quality))
+            if match is not None:
+                cached, extra = match[0], {'near_duplicate': match[1]}
+                tier = 'near_duplicate'
+        if cached is None:
+            return None
+        logger.info(f"Serving analysis from {tier} cache")
+        return AnalysisResult(**{
+            **cached,
+            'metadata': {**cached.get('metadata', {}), 'cached': True, 'cache_tier': tier, **extra}
+        })
+
+    def store_result(self, cache_key: Optional[str], result: AnalysisResult, user_input: str, language: str,
+                     issue_id: Optional[str] = None, quality: Optional[str] = None):
+        """Cache a complete Groq analysis; partial fallbacks and budget downgrades should be retried instead"""
+        if result.metadata.get('fallback_sections') or downgraded_calls(result.metadata.get('routing', {}).get('calls')):
+            return
+        if cache_key is not None:
+            analysis_cache.set(cache_key, asdict(result))
+        if near_duplicate_index is not None:
+            near_duplicate_index.add(user_input, self.similarity_scope(language, quality), asdict(result), issue_id)
+
+    def translation_key(self, sections: Dict[str, str], language: str) -> Optional[str]:
+        """Cache key for one translation, addressed by the pivot sections and the quality it is routed at"""
+        if analysis_cache is None:
+            return None
+        options = current_route()
+        quality = options.quality if options else 'balanced'
+        return make_cache_key(
+            json.dumps(sections, sort_keys=True, ensure_ascii=False), language,
+            self.routed_model(quality),
+            float(os.getenv('TEMPERATURE', 0.3)),
+            f"translation-{TRANSLATION_PROMPT_VERSION}:{quality}"
+        )
+
+    def request_translations(self, sections: Dict[str, str], languages: List[str]) -> Dict[str, Dict[str, str]]:
+        """Translate the pivot sections into each language with a single JSON completion"""
+        targets = ", ".join(f'"{code}" ({self.supported_languages[code]})' for code in languages)
+        system_prompt = f"""You translate analysis reports written in {self.supported_languages[PIVOT_LANGUAGE]}.
+            - Keep the markdown exactly: the # heading line and each - bullet line
+            - Translate the headings as well as the bullet points
+            - Keep names, numbers, dates and amounts unchanged
+            - Do not add, drop or reword points"""
+        prompt = f"""Translate every value of this JSON object into {targets}.
+            Respond with ONLY a JSON object keyed by language code, each holding an object with the same keys:
+            {json.dumps(sections, ensure_ascii=False)}"""
+        
+        params = {
+            'model': os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': float(os.getenv('TEMPERATURE', 0.3)),
+            'max_tokens': TRANSLATION_MAX_TOKENS * len(languages)
+        }
+        route = self.route_model('translation', params)
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            response = groq_scheduler.create(
+                **params,
+                response_format={"type": "json_object"},
+                timeout=SECTION_TIMEOUT_SECONDS
+            )
+            outcome = 'ok'
+        finally:
+            SECTION_LATENCY.observe(time.monotonic() - started, section='translation', mode='json', outcome=outcome)
+        self.record_route(route, time.monotonic() - started, response)
+        self.record_usage('translation', response)
+        
+        parsed = self.parse_structured_analysis(response.choices[0].message.content)
+        translations = {}
+        for language in languages:
+            translated = parsed.get(language)
+            if not isinstance(translated, dict) and len(languages) == 1:
+                # The model sometimes drops the language wrapper when asked for a single language
+                translated = parsed
+            if not isinstance(translated, dict):
+                continue
+            sections_out = {}
+            for key in SECTION_FIELDS:
+                value = translated.get(key)
+                if not isinstance(value, str) or not value.strip():
+                    break
+                value = value.strip()
+                if not value.startswith('#'):
+                    value = f"# {LOCAL_HEADINGS[language][key]}\n{value}"
+                sections_out[key] = value
+            else:
+                translations[language] = sections_out
+        return translations
+
+    def translate_analysis(self, pivot: AnalysisResult, languages: List[str],
+                           refresh: bool = False) -> Dict[str, AnalysisResult]:
+        """Translate a finished pivot analysis, reusing cached translations; languages that fail are left out"""
+        sections = {key: getattr(pivot, field) for key, field in SECTION_FIELDS.items()}
+        translations, cache_keys, missing = {}, {}, []
+        for language in languages:
+            cache_keys[language] = self.translation_key(sections, language)
+            cached = None
+            if cache_keys[language] is not None and not refresh:
+                cached = analysis_cache.get(cache_keys[language])[0]
+            if cached is not None:
+                translations[language] = (cached, True)
+            else:
+                missing.append(language)
+        
+        if missing:
+            if TRANSLATION_MODE == 'batched':
+                groups = [missing]
+            else:
+                groups = [[language] for language in missing]
+            futures = [
+                submit_with_context(section_executor, self.request_translations, sections, group)
+                for group in groups
+            ]
+            done, _ = wait(futures, timeout=ANALYSIS_DEADLINE_SECONDS)
+            for group, future in zip(groups, futures):
+                if future not in done:
+                    future.cancel()
+                    logger.warning(f"Translation into {', '.join(group)} timed out")
+                    FALLBACKS.inc(scope='translation', cause='timeout')
+                    continue
+                try:
+                    translated = future.result()
+                except Exception as e:
+                    logger.warning(f"Translation into {', '.join(group)} failed: {str(e)}")
+                    FALLBACKS.inc(scope='translation', cause=fallback_cause(e))
+                    continue
+                options = current_route()
+                # A translation a latency budget pushed onto a faster model is served but not cached
+                cacheable = not downgraded_calls(options.calls if options else None, 'translation')
+                for language in group:
+                    if language not in translated:
+                        logger.warning(f"Translation into {language} was missing or incomplete")
+                        FALLBACKS.inc(scope='translation', cause='invalid_response')
+                        continue
+                    translations[language] = (translated[language], False)
+                    if cache_keys[language] is not None and cacheable:
+                        analysis_cache.set(cache_keys[language], translated[language])
+        
+        # Scores are carried over from the pivot so every language reports the same assessment
+        return {
+            language: replace(
+                pivot,
+                **{SECTION_FIELDS[key]: value for key, value in sections_out.items()},
+                language=language,
+                metadata={**pivot.metadata, 'pivot': {'language': pivot.language, 'translation_cached': cached}}
+            )
+            for language, (sections_out, cached) in translations.items()
+        }
+
+    def analyze_languages(self, user_input: str, languages: List[str], engine: Optional[str] = None,
+                          refresh: bool = False, latency_budget_ms: Optional[float] = None,
+                          quality: Optional[str] = None, issue_id: Optional[str] = None) -> Dict[str, AnalysisResult]:
+        """Analyse once in the pivot language and translate the result into the other requested languages"""
+        pivot = self.analyze(
+            user_input, PIVOT_LANGUAGE, engine, refresh, latency_budget_ms, quality, pivot=False, issue_id=issue_id
+        )
+        results = {PIVOT_LANGUAGE: pivot}
+        targets = [language for language in languages if language != PIVOT_LANGUAGE]
+        
+        # Local and fallback analyses are cheap to redo per language and read better than a translation
+        translatable = (
+            pivot.metadata.get('engine') in ('sections', 'json')
+            and len(pivot.metadata.get('fallback_sections', [])) < len(SECTION_FIELDS)
+        )
+        if targets and translatable:
+            with routing_options(latency_budget_ms, quality):
+                results.update(self.translate_analysis(pivot, targets, refresh))
         
+        for language in targets:
+            if language not in results:
+                results[language] = self.analyze(
+                    user_input, language, engine, refresh, latency_budget_ms, quality, pivot=False, issue_id=issue_id
+                )
+        return {language: results[language] for language in languages}
+
+    def analyze(self, user_input: str, preferred_language: Optional[str] = None,
+                engine: Optional[str] = None, refresh: bool = False,
+                latency_budget_ms: Optional[float] = None, quality: Optional[str] = None,
+                pivot: Optional[bool] = None, issue_id: Optional[str] = None) -> AnalysisResult:
+        """Main analysis method; issue_id is the issue the analysis is made for, recorded with near-duplicates"""
+        # Detect or use preferred language
+        with span('language'):
+            language, confidence = self.resolve_language_with_confidence(user_input, preferred_language)
+        result = self.analyze_in_language(
+            user_input, language, engine, refresh, latency_budget_ms, quality, pivot, issue_id
+        )
+        return with_language_confidence(result, confidence)
+
+    def analyze_in_language(self, user_input: str, language: str, engine: Optional[str] = None,
+                            refresh: bool = False, latency_budget_ms: Optional[float] = None,
+                            quality: Optional[str] = None, pivot: Optional[bool] = None,
+                            issue_id: Optional[str] = None) -> AnalysisResult:
+        """Analyse in a language already resolved"""
         logger.info(f"Analyzing input in {language}: {user_input[:50]}...")
         
+        engine = engine or ANALYSIS_ENGINE
+        
+        if engine == 'fast':
+            with span('local_engine'):
+                result = self.analyze_locally(user_input, language)
+            result.metadata.update({'engine': 'fast', 'cached': False, 'fallback_sections': []})
+            return result
+        
+        if (ANALYSIS_PIVOT_MODE if pivot is None else pivot) and language != PIVOT_LANGUAGE:
+            return self.analyze_languages(
+                user_input, [language], engine, refresh, latency_budget_ms, quality, issue_id
+            )[language]
+        
         # Try Groq first, fallback to template-based analysis
         if os.getenv('GROQ_API_KEY') and groq_client:
-            try:
-                return self.analyze_with_groq(user_input, language)
-            except Exception as e:
-                logger.warning(f"Groq analysis failed, using fallback: {str(e)}")
-                return self.analyze_with_fallback(user_input, language)
+            cache_key = self.cache_key(user_input, language, quality)
+            if not refresh:
+                with span('cache_lookup') as attributes:
+                    cached = self.cached_result(cache_key, user_input, language, quality)
+                    attributes['hit'] = cached is not None
+                if cached is not None:
+                    return cached
+            
+            if groq_breaker.is_open():
+                logger.info("Groq circuit open, using fallback analysis")
+                FALLBACKS.inc(scope='analysis', cause='circuit_open')
+                result = self.analyze_with_fallback(user_input, language)
+                result.metadata.update({'engine': 'fallback', 'cached': False, 'circuit_open': True})
+                return result
+            
+            def run_analysis() -> AnalysisResult:
+                with routing_options(latency_budget_ms, quality) as route:
+                    try:
+                        started = time.monotonic()
+                        if engine == 'json':
+                            result = self.analyze_with_groq_json(user_input, language)
+                        else:
+                            result = self.analyze_with_groq(user_input, language)
+                        logger.info(f"Engine {engine} completed in {time.monotonic() - started:.2f}s")
+                    except Exception as e:
+                        logger.warning(f"Groq analysis failed, using fallback: {str(e)}")
+                        result = self.analyze_with_fallback(user_input, language)
+                
+                result.metadata.update({'engine': engine, 'cached': False})
+                if route.calls:
+                    result.metadata['routing'] = {
+                        'quality': route.quality,
+                        'latency_budget_ms': latency_budget_ms,
+                        'calls': route.calls
+                    }
+                with span('cache_store'):
+                    self.store_result(cache_key, result, user_input, language, issue_id, quality)
+                return result
+            
+            flight_key = f"{engine}:{latency_budget_ms}:{self.content_key(user_input, language, quality)}"
+            # A coalesced caller's span is its wait for the identical analysis already running
+            with span('analysis', engine=engine) as attributes:
+                result, shared = analysis_flights.do(flight_key, run_analysis)
+                attributes['coalesced'] = shared
+            if shared:
+                # Each caller gets its own copy so per-response metadata stays independent
+                result = replace(result, metadata={**result.metadata, 'coalesced': True})
+            return result
         else:
             logger.info("Using fallback analysis (no Groq API key)")
+            FALLBACKS.inc(scope='analysis', cause='no_api_key')
             return self.analyze_with_fallback(user_input, language)
 
+    def analyze_stream(self, user_input: str, preferred_language: Optional[str] = None,
+                       refresh: bool = False, shed: Optional[str] = None, issue_id: Optional[str] = None):
+        """Streaming analysis yielding (event, data) pairs as sections complete; shed requests skip Groq"""
+        language, confidence = self.resolve_language_with_confidence(user_input, preferred_language)
+        logger.info(f"Streaming analysis in {language}: {user_input[:50]}...")
+        yield 'start', {'language': language, 'language_confidence': confidence, 'sections': list(SECTION_FIELDS)}
+        
+        result = None
+        cache_key = None
+        if shed is not None:
+            result = self.analyze_degraded(user_input, language, shed)
+        elif not (os.getenv('GROQ_API_KEY') and groq_client):
+            FALLBACKS.inc(scope='analysis', cause='no_api_key')
+            result = self.analyze_with_fallback(user_input, language)
+        else:
+            cache_key = self.cache_key(user_input, language)
+            if not refresh:
+                result = self.cached_result(cache_key, user_input, language)
+            if result is None and groq_breaker.is_open():
+                FALLBACKS.inc(scope='analysis', cause='circuit_open')
+                result = self.analyze_with_fallback(user_input, language)
+                result.metadata['circuit_open'] = True
+        
+        if result is not None:
+            for analysis_type in SECTION_FIELDS:
+                yield 'section', self._section_event(result, analysis_type)
+            yield 'result', asdict(with_language_confidence(result, confidence))
+            return
+        
+        prompt_input, long_input = self.condense_input(user_input, language)
+        system_prompt, analysis_prompts = self.build_prompts(prompt_input, language)
+        events = queue.Queue()
+        cancelled = threading.Event()
+        
+        def run(analysis_type: str, prompt: str):
+            try:
+                content = self.stream_section(
+                    analysis_type, system_prompt, prompt,
+                    lambda delta: events.put(('delta', analysis_type, delta)),
+                    cancelled, language
+                )
+                events.put(('done', analysis_type, content))
+            except Exception as e:
+                events.put(('failed', analysis_type, e))
+        
+        probe = None
+        if groq_breaker.recovering():
+            # As in _run_sections_concurrent: one section probes a recovering Groq before the others are sent
+            probe = next(iter(analysis_prompts))
+            run(probe, analysis_prompts[probe])
+        for analysis_type, prompt in analysis_prompts.items():
+            if analysis_type != probe:
+                submit_with_context(section_executor, run, analysis_type, prompt)
+        
+        results, failed = {}, []
+        pending = set(analysis_prompts)
+        deadline = time.monotonic() + min(ANALYSIS_DEADLINE_SECONDS, SECTION_TIMEOUT_SECONDS)
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    kind, analysis_type, payload = events.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if kind == 'delta':
+                    yield 'delta', {'section': analysis_type, 'delta': payload}
+                    continue
+                pending.discard(analysis_type)
+                if kind == 'done' and payload:
+                    results[analysis_type] = payload
+                    content, truthfulness = payload, None
+                    if analysis_type == 'ai_suggestion':
+                        content, truthfulness = self.parse_truthfulness(payload)
+                    yield 'section', {
+                        'section': analysis_type,
+                        'field': SECTION_FIELDS[analysis_type],
+                        'content': content,
+                        'fallback': False,
+                        **({'truthfulness_percentage': truthfulness} if truthfulness is not None else {})
+                    }
+                else:
+                    logger.warning(f"Section {analysis_type} failed: {payload or 'empty response'}")
+                    FALLBACKS.inc(scope='section', cause=fallback_cause(payload) if payload else 'empty_response')
+                    failed.append(analysis_type)
+        finally:
+            # Stop generating tokens nobody will read once the client goes away or the deadline passes
+            cancelled.set()
+        
+        for analysis_type in pending:
+            logger.warning(f"Section {analysis_type} timed out while streaming")
+            FALLBACKS.inc(scope='section', cause='timeout')
+            failed.append(analysis_type)
+        
+        result = self._assemble_result(user_input, language, results, failed)
+        result.metadata.update({'engine': 'sections', 'cached': False, 'streamed': True})
+        if long_input is not None:
+            result.metadata['long_input'] = long_input
+        for analysis_type in failed:
+            yield 'section', self._section_event(result, analysis_type)
+        
+        self.store_result(cache_key, result, user_input, language, issue_id)
+        yield 'result', asdict(with_language_confidence(result, confidence))
+
+    def answer_follow_up(self, session: ChatSession, message: str, language: str) -> str:
+        """Answer a follow-up about the session's issue with one completion over its cached analysis"""
+        analysis = AnalysisResult(**session.analysis)
+        if not (os.getenv('GROQ_API_KEY') and groq_client):
+            FALLBACKS.inc(scope='chat', cause='no_api_key')
+            return format_chat_response(session.subject, analysis)
+        
+        sections = "\n\n".join(getattr(analysis, field) for field in SECTION_FIELDS.values())
+        system_prompt = f"""You are continuing a conversation about an issue a user submitted, replying in {self.supported_languages[language]}.
+            Answer the user's latest message from the analysis below; if it does not cover the question, say so briefly.
+            - Use at most 4 short bullet points (-) or 3 sentences
+            - Do not repeat the whole analysis
+            
+            Issue: '{session.subject}'
+            
+            Analysis:
+            {sections}
+            Truthfulness: {analysis.truthfulness_percentage}%"""
+        if session.summary:
+            system_prompt += f"\n\nEarlier in this conversation:\n{session.summary}"
+        
+        params = {
+            'model': os.getenv('DEFAULT_MODEL', 'llama3-8b-8192'),
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                *session.turns[-chat_sessions.max_turns:],
+                {"role": "user", "content": message}
+            ],
+            'temperature': float(os.getenv('TEMPERATURE', 0.3)),
+            'max_tokens': CHAT_REPLY_MAX_TOKENS
+        }
+        route = self.route_model('chat', params)
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            response = groq_scheduler.create(**params, timeout=SECTION_TIMEOUT_SECONDS)
+            outcome = 'ok'
+        except Exception as e:
+            logger.warning(f"Follow-up failed, replying with the analysis: {str(e)}")
+            FALLBACKS.inc(scope='chat', cause=fallback_cause(e))
+            return format_chat_response(session.subject, analysis)
+        finally:
+            SECTION_LATENCY.observe(time.monotonic() - started, section='chat', mode='sync', outcome=outcome)
+        self.record_route(route, time.monotonic() - started, response)
+        self.record_usage('chat', response)
+        return response.choices[0].message.content.strip()
+
+    def compact_session(self, session_id: str):
+        """Fold a session's older turns into its running summary so follow-up prompts stay bounded"""
+        claimed = chat_sessions.begin_compaction(session_id)
+        if claimed is None:
+            return
+        summary, turns, language = claimed
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        new_summary = None
+        try:
+            if os.getenv('GROQ_API_KEY') and groq_client:
+                system_prompt = f"""You condense a conversation so it can be continued later, writing in {self.supported_languages[language]}.
+            - Keep every question asked, fact given and conclusion reached
+            - Use at most 5 short bullet points (-)"""
+                prompt = f"Summary so far:\n{summary}\n\nNew turns:\n{transcript}" if summary else transcript
+                with request_priority(PRIORITY_BATCH):
+                    new_summary = self.complete_section('chat_summary', system_prompt, prompt, SECTION_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning(f"Chat compaction failed, keeping the latest turns verbatim: {str(e)}")
+            FALLBACKS.inc(scope='chat_summary', cause=fallback_cause(e))
+        finally:
+            if not new_summary:
+                # Keep the most recent part of the history rather than nothing
+                tail = f"{summary}\n{transcript}".encode('utf-8')[-CHAT_SUMMARY_MAX_TOKENS * 4:]
+                new_summary = tail.decode('utf-8', 'ignore').strip()
+            chat_sessions.finish_compaction(session_id, new_summary)
+
+    def _section_event(self, result: AnalysisResult, analysis_type: str) -> Dict:
+        """Section event payload taken from a finished AnalysisResult"""
+        event = {
+            'section': analysis_type,
+            'field': SECTION_FIELDS[analysis_type],
+            'content': getattr(result, SECTION_FIELDS[analysis_type]),
+            'fallback': analysis_type in result.metadata.get('fallback_sections', [])
+        }
+        if analysis_type == 'ai_suggestion':
+            event['truthfulness_percentage'] = result.truthfulness_percentage
+        return event
+
 # Initialize analyzer
 analyzer = AIAnalyzer()
 
+def run_analysis_job(payload: Dict) -> Dict:
+    """Job handler: run a queued analysis in the background at batch priority"""
+    with request_priority(PRIORITY_BATCH):
+        result = analyzer.analyze(payload['message'], payload.get('language'), payload.get('engine'),
+                                  payload.get('refresh', False), issue_id=payload.get('issue_id'))
+    logger.info(f"Job analysis completed for language: {result.language}")
+    analysis = asdict(result)
+    if payload.get('issue_id'):
+        record_error = record_analysis(payload, payload['message'], analysis).get('record_error')
+        if record_error:
+            analysis['record_error'] = record_error
+    return analysis
+
+job_workers = JobWorkers(job_store, run_analysis_job, JOB_WORKERS)
+
+# Serving lifecycle. Importing the app never starts threads or opens connections: start_worker() does that, called
+# by gunicorn's post_worker_init in each forked worker (gunicorn.conf.py sets SERVE_MODE=gunicorn, and the master
+# only does fork-safe local warm-up at import), by the dev server below, or by scripts that need the background
+# work. /ready answers 200 once it is done and 503 again while the worker drains.
+SERVE_MODE = os.getenv('SERVE_MODE', 'dev').lower()
+GROQ_WARM_CONNECTIONS = int(os.getenv('GROQ_WARM_CONNECTIONS', 2))
+ready = threading.Event()
+draining = threading.Event()
+startup = {
+    'pid': os.getpid(),
+    'serve_mode': SERVE_MODE,
+    'import_seconds': None,
+    'warm_up_seconds': None,
+    'groq_connections_warmed': 0,
+    'first_request_seconds': None,
+    'first_request_latency_ms': None
+}
+process_started = IMPORT_STARTED
+
+def warm_up_groq() -> int:
+    """Open GROQ_WARM_CONNECTIONS connections to Groq side by side so early analyses skip the TLS handshake"""
+    if groq_client is None or GROQ_WARM_CONNECTIONS <= 0:
+        return 0
+    opened = []
+    
+    def connect():
+        try:
+            groq_client.models.list(timeout=5)
+            opened.append(True)
+        except Exception as e:
+            # Any HTTP response, even an error status, leaves a reusable connection in the pool
+            if getattr(e, 'status_code', None) is not None:
+                opened.append(True)
+            else:
+                logger.warning(f"Groq warm-up request failed: {str(e)}")
+    
+    threads = [threading.Thread(target=connect, name=f'groq-warm-up-{index}') for index in range(GROQ_WARM_CONNECTIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return len(opened)
+
+def start_worker(after_fork: bool = False):
+    """Per-process start-up: fresh SQLite handles after fork, warm connections, job workers, then ready"""
+    global process_started
+    started = time.monotonic()
+    if after_fork:
+        process_started = started
+        startup['pid'] = os.getpid()
+        # A connection opened in the master must not be used from a forked worker
+        for store in (analysis_cache, condensed_cache, near_duplicate_index, job_store, analysis_history, proof_index,
+                      chat_sessions, profile_exchange):
+            if store is not None:
+                store.reconnect()
+    warm_up_language_detection()
+    if JOB_WORKERS > 0:
+        job_workers.start()
+    if analysis_history is not None:
+        analysis_history.start()
+    if profile_exchange is not None:
+        profile_exchange.start(profile_threads)
+    startup['groq_connections_warmed'] = warm_up_groq()
+    startup['warm_up_seconds'] = round(time.monotonic() - started, 3)
+    ready.set()
+    logger.info(f"Worker {os.getpid()} ready after {startup['warm_up_seconds']}s warm-up "
+                f"({startup['groq_connections_warmed']} Groq connections open)")
+
+def begin_drain():
+    """Stop reporting ready and stop claiming jobs; requests and jobs already running are left to finish"""
+    draining.set()
+    ready.clear()
+    job_workers.stop(timeout=0)
+    logger.info(f"Worker {os.getpid()} draining")
+
+if SERVE_MODE == 'gunicorn':
+    # Loaded in the master, the profiles are shared copy-on-write by every forked worker
+    warm_up_language_detection()
+
+GREETINGS = ['hello', 'hi', 'hey', 'வணக்கம்', 'ನಮಸ್ಕಾರ', 'నమస్కారం']
+
+GREETING_RESPONSES = {
+    'en': "Hello! I'm an AI assistant that can analyze various aspects of your questions including fairness, impact, resources, sustainability, and potential disadvantages. How can I help you today?",
+    'ta': "வணக்கம்! நான் உங்கள் கேள்விகளின் நியாயத்தன்மை, தாக்கம், வளங்கள், நிலைத்தன்மை மற்றும் சாத்தியமான தீமைகள் உட்பட பல்வேறு அம்சங்களை பகுப்பாய்வு செய்யக்கூடிய AI உதவியாளர். இன்று நான் உங்களுக்கு எப்படி உதவ முடியும்?",
+    'kn': "ನಮಸ್ಕಾರ! ನಾನು ನ್ಯಾಯಸಮ್ಮತತೆ, ಪರಿಣಾಮ, ಸಂಪನ್ಮೂಲಗಳು, ಸಮರ್ಥನೀಯತೆ ಮತ್ತು ಸಂಭಾವ್ಯ ಅನಾನುಕೂಲತೆಗಳು ಸೇರಿದಂತೆ ನಿಮ್ಮ ಪ್ರಶ್ನೆಗಳ ವಿವಿಧ ಅಂಶಗಳನ್ನು ವಿಶ್ಲೇಷಿಸಬಲ್ಲ AI ಸಹಾಯಕ. ಇಂದು ನಾನು ನಿಮಗೆ ಹೇಗೆ ಸಹಾಯ ಮಾಡಬಹುದು?",
+    'te': "నమస్కారం! నేను న్యాయమైన అంశాలు, ప్రభావం, వనరులు, స్థిరత్వం మరియు సంభావ్య ప్రతికూలతలతో సహా మీ ప్రశ్నల యొక్క వివిధ అంశాలను విశ్లేషించగల AI సహాయకుడను. ఈరోజు నేను మీకు ఎలా సహాయపడగలను?"
+}
+
+def greeting_response(user_input: str, language: str) -> Optional[str]:
+    """Canned reply for simple greetings, or None for messages that need analysis"""
+    if user_input.lower() in GREETINGS:
+        return GREETING_RESPONSES.get(language, GREETING_RESPONSES['en'])
+    return None
+
+def format_chat_response(user_input: str, result: AnalysisResult) -> str:
+    """Format an analysis as a conversational chat reply"""
+    return f"""Based on your message about "{user_input}", here's my comprehensive analysis:
+
+🔍 **Fairness Analysis**: {result.fairness_analysis}
+
+📊 **Impact Analysis**: {result.impact_analysis}
+
+💰 **Resource Analysis**: {result.resource_analysis}
+
+🌱 **Sustainability Analysis**: {result.sustainability_analysis}
+
+⚠️ **Potential Disadvantages**: {result.disadvantages}
+
+🤖 **AI Suggestion**: {result.ai_suggestion}
+
+📈 **Truthfulness Assessment**: {result.truthfulness_percentage}% credibility based on available information
+
+Would you like me to elaborate on any specific aspect?"""
+
+def admission_deadline(latency_budget_ms: Optional[float] = None) -> float:
+    """Seconds the request may take in total, shortened by the caller's latency budget"""
+    if latency_budget_ms:
+        return min(REQUEST_DEADLINE_SECONDS, latency_budget_ms / 1000)
+    return REQUEST_DEADLINE_SECONDS
+
+@contextmanager
+def admitted(endpoint: str, deadline_seconds: float):
+    """Hold one of the endpoint's slots for the block; raises Overloaded when it cannot start in time"""
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    with admission_gates[endpoint].admitted(deadline_seconds) as waited:
+        ADMISSION_QUEUE_WAIT.observe(waited, endpoint=endpoint)
+        record_span('admission', waited, endpoint=endpoint)
+        yield
+
+def admit_stream(endpoint: str, deadline_seconds: float):
+    """Take a slot for a streamed response; returns the callback that frees it once the stream closes"""
+    if not ADMISSION_ENABLED:
+        return lambda: None
+    gate = admission_gates[endpoint]
+    waited = gate.acquire(deadline_seconds)
+    ADMISSION_QUEUE_WAIT.observe(waited, endpoint=endpoint)
+    record_span('admission', waited, endpoint=endpoint)
+    started = time.monotonic()
+    return lambda: gate.release(time.monotonic() - started)
+
+def shed_response(endpoint: str, error: Overloaded):
+    """429 with Retry-After when the endpoint rejects on overload, None when it degrades instead"""
+    action = 'reject' if ADMISSION_OVERLOAD[endpoint] == 'reject' else 'degrade'
+    ADMISSION_SHED.inc(endpoint=endpoint, reason=error.reason, action=action)
+    logger.warning(f"Shedding /{endpoint} request ({error.reason}, {action})")
+    if action == 'degrade':
+        return None
+    retry_after = max(1, int(error.retry_after + 0.999))
+    return jsonify({
+        'success': False,
+        'error': 'Server is busy, please retry later',
+        'retry_after': retry_after
+    }), 429, {'Retry-After': str(retry_after)}
+
+def issue_fields_error(data: Dict) -> Optional[str]:
+    """Validation error for the optional issue_id and wallet_address fields, or None"""
+    for name in ('issue_id', 'wallet_address'):
+        value = data.get(name)
+        if value is not None and (not isinstance(value, str) or not value.strip() or len(value) > 128):
+            return f"{name} must be a non-empty string of at most 128 characters"
+    return None
+
+def issue_id_for(data: Dict) -> str:
+    """The request's issue id (new when it has none), fixed before analysing so every store agrees on it"""
+    data['issue_id'] = (data.get('issue_id') or uuid.uuid4().hex).strip()
+    return data['issue_id']
+
+def record_analysis(data: Dict, message: str, *analyses: Dict, private: bool = False) -> Dict:
+    """Queue served analyses for the history store under the request's issue id; private ones are only listed for
+    the request's own wallet. Returns the response fields: the issue id, plus record_error when the issue belongs
+    to another wallet and the analyses were not saved."""
+    issue_id = issue_id_for(data)
+    recorded = True
+    if analysis_history is not None:
+        for analysis in analyses:
+            recorded = analysis_history.record(issue_id, data.get('wallet_address'), message, analysis, private) and recorded
+    if not recorded:
+        logger.warning(f"Not recording analysis of issue {issue_id}: it belongs to another wallet")
+        return {'issue_id': issue_id, 'record_error': 'This issue_id belongs to another wallet; the analysis was not saved'}
+    return {'issue_id': issue_id}
+
+def proof_public(record: Dict) -> Dict:
+    """Proof index fields exposed over the API"""
+    return {
+        'cid': record['cid'],
+        'size': record['size'],
+        'content_type': record['content_type'],
+        'filename': record['filename'],
+        'issue_id': record['issue_id'],
+        'wallet_address': record['wallet'],
+        'text_chars': len(record['text'] or ''),
+        'created_at': record['created_at']
+    }
+
+def proof_for(record: Dict, wallet: Optional[str]) -> Dict:
+    """The whole record for the wallet that uploaded the proof; anyone else only learns what their own copy of the
+    file already tells them, never the first uploader's issue or wallet"""
+    if record['wallet'] is None or normalize_wallet(record['wallet']) != normalize_wallet(wallet):
+        return {'cid': record['cid'], 'size': record['size']}
+    return proof_public(record)
+
+def chat_session(data: Dict) -> Optional[ChatSession]:
+    """The request's chat session, a new one when it names none, or None when the session_id it names is unknown
+    or has expired"""
+    session_id = data.get('session_id')
+    if session_id is None:
+        return chat_sessions.create(data.get('language') or 'en')
+    return chat_sessions.get(session_id) if isinstance(session_id, str) else None
+
+def session_expired_response(data: Dict):
+    """404 for a follow-up whose session is gone, so the client can start over rather than lose its context unseen"""
+    return jsonify({
+        'error': 'Unknown or expired session; send the message without session_id to start a new conversation',
+        'session_expired': True,
+        'session_id': data.get('session_id')
+    }), 404
+
+def record_chat_turns(session_id: str, user_input: str, reply: str):
+    """Remember a follow-up exchange, compacting older turns off the request path when needed"""
+    if chat_sessions.add_turns(session_id, ('user', user_input), ('assistant', reply)):
+        submit_with_context(section_executor, analyzer.compact_session, session_id)
+
+def iter_batch_items(data: Optional[Dict]):
+    """Yield batch items from a JSON body, or line by line from an NDJSON body"""
+    if data is not None:
+        yield from data.get('items', [])
+        return
+    for line in request.stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def run_batch(items, concurrency: int, engine: Optional[str], refresh: bool):
+    """Analyze batch items with bounded concurrency, yielding results in completion order"""
+    in_flight = {}  # future -> dedupe key
+    waiting = {}    # dedupe key -> (id, item) of items sharing the in-flight analysis
+    
+    def finished(done):
+        for future in done:
+            key = in_flight.pop(future)
+            items = waiting.pop(key)
+            try:
+                analysis = asdict(future.result())
+                outcome = {'success': True, 'analysis': analysis}
+            except Exception as e:
+                logger.error(f"Batch item {items[0][0]} failed: {str(e)}")
+                analysis, outcome = None, {'success': False, 'error': 'Analysis failed'}
+            for position, (item_id, item) in enumerate(items):
+                line = {'id': item_id, **outcome}
+                if analysis is not None:
+                    line.update(record_analysis(item, item['message'].strip(), analysis))
+                if position:
+                    line['duplicate_of'] = items[0][0]
+                yield line
+    
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            yield {'id': index, 'success': False, 'error': 'Item must be a JSON object'}
+            continue
+        
+        item_id = item.get('id', index)
+        message = item.get('message')
+        language = item.get('language', None)
+        if not isinstance(message, str) or not message.strip():
+            yield {'id': item_id, 'success': False, 'error': 'Message is required'}
+            continue
+        message = message.strip()
+        issue_error = issue_fields_error(item)
+        if issue_error:
+            yield {'id': item_id, 'success': False, 'error': issue_error}
+            continue
+        
+        # Identical messages share one in-flight analysis; completed ones are reused through the cache
+        key = (normalize_message(message), language)
+        if key in waiting:
+            waiting[key].append((item_id, item))
+            continue
+        
+        while len(in_flight) >= concurrency:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+        
+        future = submit_with_context(
+            batch_executor, analyzer.analyze, message, language, engine, refresh, issue_id=issue_id_for(item)
+        )
+        in_flight[future] = key
+        waiting[key] = [(item_id, item)]
+    
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        yield from finished(done)
+
+def sse_event(event: str, data: Dict) -> str:
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events) -> Response:
+    """Stream (event, data) pairs to the client as Server-Sent Events"""
+    def generate():
+        try:
+            for event, data in events:
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Streaming error: {str(e)}")
+            yield sse_event('error', {'success': False, 'error': 'Internal server error occurred'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def collect_component_metrics():
+    """Expose cache, scheduler and circuit breaker state as gauges at scrape time"""
+    if analysis_cache is not None:
+        stats = analysis_cache.stats()
+        for name in ('hits', 'misses', 'evictions', 'expirations'):
+            yield 'zyra_cache_events', 'gauge', 'Analysis cache events since start', {'event': name}, stats[name]
+        yield 'zyra_cache_entries', 'gauge', 'Entries in the in-memory analysis cache', {}, stats['entries']
+    if near_duplicate_index is not None:
+        stats = near_duplicate_index.stats()
+        yield 'zyra_near_duplicate_hits', 'gauge', 'Analyses reused for near-duplicate messages since start', {}, stats['hits']
+        yield 'zyra_near_duplicate_entries', 'gauge', 'Messages in the near-duplicate index', {}, stats['entries']
+    stats = groq_scheduler.stats()
+    yield 'zyra_scheduler_queued', 'gauge', 'Groq calls waiting for admission', {}, stats['queued']
+    yield 'zyra_scheduler_rejected', 'gauge', 'Groq calls rejected by the scheduler since start', {}, stats['rejected']
+    state = groq_breaker.stats()['state']
+    for name in ('closed', 'open', 'half_open'):
+        yield 'zyra_circuit_breaker_state', 'gauge', 'Groq circuit breaker state', {'state': name}, int(state == name)
+    for endpoint, gate in admission_gates.items():
+        stats = gate.stats()
+        yield 'zyra_admission_active', 'gauge', 'Requests holding an admission slot', {'endpoint': endpoint}, stats['active']
+        yield 'zyra_admission_waiting', 'gauge', 'Requests queued for an admission slot', {'endpoint': endpoint}, stats['waiting']
+    yield 'zyra_chat_sessions', 'gauge', 'Live chat sessions', {}, chat_sessions.stats()['sessions']
+    yield 'zyra_ready', 'gauge', 'Whether this worker has finished warm-up and is not draining', {}, int(ready.is_set())
+    for phase in ('import_seconds', 'warm_up_seconds', 'first_request_seconds'):
+        if startup[phase] is not None:
+            yield 'zyra_startup_seconds', 'gauge', 'Start-up phase durations for this process', {'phase': phase[:-8]}, startup[phase]
+    for status, count in job_store.stats()['jobs'].items():
+        yield 'zyra_jobs', 'gauge', 'Analysis jobs in the job store by status', {'status': status}, count
+
+metrics_registry.register_collector(collect_component_metrics)
+
+@app.before_request
+def start_request_metrics():
+    """Track requests in flight, start the latency clock and the request's trace"""
+    g.request_started = time.perf_counter()
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    if TRACING_ENABLED:
+        start_trace(g.request_id, TRACE_MAX_SPANS)
+    REQUESTS_IN_FLIGHT.inc(endpoint=request.endpoint or 'unmatched')
+    if startup['first_request_seconds'] is None:
+        startup['first_request_seconds'] = round(time.monotonic() - process_started, 3)
+        g.first_request = True
+
+@app.after_request
+def finish_request_metrics(response):
+    """Record endpoint latency once the body (including streamed bodies) has been sent"""
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    request_path = request.path
+    started = g.get('request_started', time.perf_counter())
+    
+    first_request = g.get('first_request', False)
+    trace = current_trace()
+    long_running = g.get('long_running', False)
+    
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    if trace is not None and SERVER_TIMING_ENABLED and not response.is_streamed:
+        # A streamed body is still being produced; its stages only show up in the slow request log
+        response.headers['Server-Timing'] = trace.server_timing()
+        response.headers['Timing-Allow-Origin'] = ', '.join(cors_origins)
+    
+    def observe():
+        elapsed = time.perf_counter() - started
+        REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, method=method, status=response.status_code)
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        if first_request:
+            startup['first_request_latency_ms'] = round(elapsed * 1000, 1)
+        if trace is not None:
+            if elapsed * 1000 >= TRACE_SLOW_REQUEST_MS and not long_running:
+                SLOW_REQUESTS.inc(endpoint=endpoint)
+                logger.warning(f"Slow request {method} {request_path} -> {response.status_code} took "
+                               f"{elapsed * 1000:.0f}ms:\n{trace.describe()}")
+            end_trace()
+    
+    response.call_on_close(observe)
+    return response
+
+def analysis_etag(issue_id: str, engine: str, content_key: str) -> str:
+    """Weak validator for an /analyze answer: the same issue, engine and content key (message, language, quality,
+    model, prompts) describe an equivalent complete analysis, though a re-run's bytes (wording, timings) differ"""
+    return strong_etag(f"{issue_id}:{engine}:{content_key}".encode('utf-8'))
+
+def complete_analysis(result: AnalysisResult) -> bool:
+    """A full Groq or local analysis: no template fallbacks, no shedding, no budget downgrades"""
+    metadata = result.metadata
+    return not (metadata.get('fallback_sections') or metadata.get('shed') or metadata.get('engine') == 'fallback'
+                or downgraded_calls(metadata.get('routing', {}).get('calls')))
+
+def send_body(response: Response, body: bytes, etag: Optional[str], variant=None, weak: bool = False) -> Response:
+    """Answer 304 when the client already holds this body, otherwise attach the ETag (if any) and the negotiated
+    encoding. A weak tag names the content rather than the bytes, so every encoding shares it."""
+    response.vary.add('Accept-Encoding')
+    if request.method == 'GET' and 'Cache-Control' not in response.headers:
+        # Stored by clients but revalidated with If-None-Match on every use
+        response.headers['Cache-Control'] = 'no-cache'
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+    if etag is not None:
+        # Each encoding is its own representation, so a strong tag is suffixed with it
+        response.set_etag(f"{etag}-{encoding}" if encoding and not weak else etag, weak=weak)
+        if request.if_none_match.contains_weak(etag) or (encoding and request.if_none_match.contains_weak(f"{etag}-{encoding}")):
+            response.status_code = 304
+            response.set_data(b'')
+            return response
+    if encoding:
+        response.set_data(variant(encoding) if variant is not None else compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    RESPONSE_BODY_BYTES.inc(len(body), stage='original')
+    RESPONSE_BODY_BYTES.inc(response.content_length or 0, stage='sent')
+    return response
+
+def prepared_response(prepared: PreparedBody) -> Response:
+    """Serve a body serialized ahead of time, reusing its ETag and compressed variants"""
+    response = Response(prepared.body, content_type=prepared.content_type)
+    return send_body(response, prepared.body, prepared.etag, prepared.variant)
+
+@app.after_request
+def encode_response(response):
+    """ETag, 304 and compression for buffered responses; streamed ones (SSE, NDJSON) go out as they are.
+    Only GET bodies are tagged by their bytes: a POST gets a weak tag just when its route sets g.content_etag."""
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'ETag' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    body = response.get_data()
+    with span('encode', bytes=len(body)):
+        if request.method in ('GET', 'HEAD'):
+            return send_body(response, body, strong_etag(body))
+        return send_body(response, body, g.get('content_etag'), weak=True)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text-format metrics"""
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+health_cache = {'body': None, 'expires_at': 0.0}
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({
+    """Health check endpoint; the body is rebuilt at most every HEALTH_CACHE_SECONDS"""
+    if health_cache['body'] is None or time.monotonic() >= health_cache['expires_at']:
+        health_cache['body'] = PreparedBody(app.json.dumps(health_status()).encode('utf-8'))
+        health_cache['expires_at'] = time.monotonic() + HEALTH_CACHE_SECONDS
+    return prepared_response(health_cache['body'])
+
+def health_status() -> Dict:
+    return {
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'supported_languages': list(analyzer.supported_languages.keys())
-    })
+        'supported_languages': list(analyzer.supported_languages.keys()),
+        'cache': analysis_cache.stats() if analysis_cache is not None else None,
+        'near_duplicates': near_duplicate_index.stats() if near_duplicate_index is not None else None,
+        'scheduler': groq_scheduler.stats(),
+        'circuit_breaker': groq_breaker.stats(),
+        'hedging': groq_hedger.stats() if groq_hedger is not None else None,
+        'routing': model_router.stats(),
+        'generation': {'control': GENERATION_CONTROL, 'budgets': section_budgets.stats()},
+        'pivot': {'enabled': ANALYSIS_PIVOT_MODE, 'language': PIVOT_LANGUAGE, 'translation_mode': TRANSLATION_MODE},
+        'jobs': job_store.stats(),
+        'history': analysis_history.stats() if analysis_history is not None else None,
+        'proofs': proof_index.stats(),
+        'chat_sessions': chat_sessions.stats(),
+        'admission': {
+            'enabled': ADMISSION_ENABLED,
+            'deadline_seconds': REQUEST_DEADLINE_SECONDS,
+            'endpoints': {
+                endpoint: {**gate.stats(), 'overload': ADMISSION_OVERLOAD[endpoint]}
+                for endpoint, gate in admission_gates.items()
+            }
+        }
+    }
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once this worker has warmed up, 503 before that and while draining"""
+    body = {'ready': ready.is_set(), 'draining': draining.is_set(), 'startup': startup}
+    return jsonify(body), 200 if body['ready'] else 503
 
 @app.route('/analyze', methods=['POST'])
 def analyze_text():
@@ -291,22 +2035,93 @@ def analyze_text():
         
         user_input = data['message'].strip()
         preferred_language = data.get('language', None)
+        engine = data.get('engine', None)
+        refresh = bool(data.get('refresh', False))
+        latency_budget_ms = data.get('latency_budget_ms', None)
+        quality = data.get('quality', None)
+        languages = data.get('languages', None)
         
         if not user_input:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Perform analysis
-        result = analyzer.analyze(user_input, preferred_language)
+        if languages is not None and (
+            not isinstance(languages, list) or not languages
+            or any(language not in analyzer.supported_languages for language in languages)
+        ):
+            return jsonify({'error': f"Languages must be a list drawn from: {', '.join(analyzer.supported_languages)}"}), 400
+        
+        if engine is not None and engine not in ANALYSIS_ENGINES:
+            return jsonify({'error': f"Engine must be one of: {', '.join(ANALYSIS_ENGINES)}"}), 400
+        
+        if quality is not None and quality not in QUALITY_LEVELS:
+            return jsonify({'error': f"Quality must be one of: {', '.join(QUALITY_LEVELS)}"}), 400
+        
+        if latency_budget_ms is not None and (
+            isinstance(latency_budget_ms, bool) or not isinstance(latency_budget_ms, (int, float)) or latency_budget_ms <= 0
+        ):
+            return jsonify({'error': 'Latency budget must be a positive number of milliseconds'}), 400
+        
+        issue_error = issue_fields_error(data)
+        if issue_error:
+            return jsonify({'error': issue_error}), 400
+        
+        content_etag = None
+        if languages is None and data.get('issue_id'):
+            # Resubmitting an issue the client already holds a complete analysis of is answered before any work
+            language = analyzer.resolve_language(user_input, preferred_language)
+            content_etag = analysis_etag(
+                data['issue_id'].strip(), engine or ANALYSIS_ENGINE, analyzer.content_key(user_input, language, quality)
+            )
+            if not refresh and request.if_none_match.contains_weak(content_etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(content_etag, weak=True)
+                return not_modified
+        
+        try:
+            with admitted('analyze', admission_deadline(latency_budget_ms)), request_priority(PRIORITY_ANALYZE):
+                if languages is not None:
+                    # One pivot analysis translated into every requested language
+                    results = analyzer.analyze_languages(
+                        user_input, list(dict.fromkeys(languages)), engine, refresh, latency_budget_ms, quality,
+                        issue_id_for(data)
+                    )
+                else:
+                    result = analyzer.analyze(
+                        user_input, preferred_language, engine, refresh, latency_budget_ms, quality,
+                        issue_id=issue_id_for(data)
+                    )
+        except Overloaded as e:
+            rejection = shed_response('analyze', e)
+            if rejection is not None:
+                return rejection
+            if languages is not None:
+                results = {
+                    language: analyzer.analyze_degraded(user_input, language, e.reason, quality)
+                    for language in dict.fromkeys(languages)
+                }
+            else:
+                result = analyzer.analyze_degraded(user_input, preferred_language, e.reason, quality)
         
-        # Convert to dict for JSON response
-        response_data = asdict(result)
+        if languages is not None:
+            analyses = {language: asdict(result) for language, result in results.items()}
+            return jsonify({
+                'success': True,
+                'analyses': analyses,
+                **record_analysis(data, user_input, *analyses.values())
+            })
         
         logger.info(f"Analysis completed for language: {result.language}")
+        if content_etag is not None and complete_analysis(result):
+            g.content_etag = content_etag
         
-        return jsonify({
-            'success': True,
-            'analysis': response_data
-        })
+        with span('serialize'):
+            # Convert to dict for JSON response
+            response_data = asdict(result)
+            return jsonify({
+                'success': True,
+                'analysis': response_data,
+                **record_analysis(data, user_input, response_data)
+            })
         
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
@@ -315,12 +2130,12 @@ def analyze_text():
             'error': 'Internal server error occurred'
         }), 500
 
+LANGUAGES_BODY = PreparedBody(app.json.dumps({'supported_languages': analyzer.supported_languages}).encode('utf-8'))
+
 @app.route('/languages', methods=['GET'])
 def get_supported_languages():
     """Get list of supported languages"""
-    return jsonify({
-        'supported_languages': analyzer.supported_languages
-    })
+    return prepared_response(LANGUAGES_BODY)
 
 @app.route('/chat', methods=['POST'])
 def chat_endpoint():
@@ -332,54 +2147,87 @@ def chat_endpoint():
             return jsonify({'error': 'Message is required'}), 400
         
         user_input = data['message'].strip()
-        language = data.get('language', 'en')
+        engine = data.get('engine', None)
+        refresh = bool(data.get('refresh', False))
+        new_issue = bool(data.get('new_issue', False))
+        compact = bool(data.get('compact', False))
         
         if not user_input:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
+        if engine is not None and engine not in ANALYSIS_ENGINES:
+            return jsonify({'error': f"Engine must be one of: {', '.join(ANALYSIS_ENGINES)}"}), 400
+        
+        issue_error = issue_fields_error(data)
+        if issue_error:
+            return jsonify({'error': issue_error}), 400
+        
+        session = chat_session(data)
+        if session is None:
+            return session_expired_response(data)
+        language = data.get('language') or session.language
+        
         # For simple chat, provide a basic response
-        if user_input.lower() in ['hello', 'hi', 'hey', 'வணக்கம்', 'ನಮಸ್ಕಾರ', 'నమస్కారం']:
-            responses = {
-                'en': "Hello! I'm an AI assistant that can analyze various aspects of your questions including fairness, impact, resources, sustainability, and potential disadvantages. How can I help you today?",
-                'ta': "வணக்கம்! நான் உங்கள் கேள்விகளின் நியாயத்தன்மை, தாக்கம், வளங்கள், நிலைத்தன்மை மற்றும் சாத்தியமான தீமைகள் உட்பட பல்வேறு அம்சங்களை பகுப்பாய்வு செய்யக்கூடிய AI உதவியாளர். இன்று நான் உங்களுக்கு எப்படி உதவ முடியும்?",
-                'kn': "ನಮಸ್ಕಾರ! ನಾನು ನ್ಯಾಯಸಮ್ಮತತೆ, ಪರಿಣಾಮ, ಸಂಪನ್ಮೂಲಗಳು, ಸಮರ್ಥನೀಯತೆ ಮತ್ತು ಸಂಭಾವ್ಯ ಅನಾನುಕೂಲತೆಗಳು ಸೇರಿದಂತೆ ನಿಮ್ಮ ಪ್ರಶ್ನೆಗಳ ವಿವಿಧ ಅಂಶಗಳನ್ನು ವಿಶ್ಲೇಷಿಸಬಲ್ಲ AI ಸಹಾಯಕ. ಇಂದು ನಾನು ನಿಮಗೆ ಹೇಗೆ ಸಹಾಯ ಮಾಡಬಹುದು?",
-                'te': "నమస్కారం! నేను న్యాయమైన అంశాలు, ప్రభావం, వనరులు, స్థిరత్వం మరియు సంభావ్య ప్రతికూలతలతో సహా మీ ప్రశ్నల యొక్క వివిధ అంశాలను విశ్లేషించగల AI సహాయకుడను. ఈరోజు నేను మీకు ఎలా సహాయపడగలను?"
-            }
-            
+        greeting = greeting_response(user_input, language)
+        if greeting is not None:
             return jsonify({
                 'success': True,
-                'response': responses.get(language, responses['en']),
-                'language': language
+                'response': greeting,
+                'language': language,
+                'session_id': session.session_id
             })
         
+        # Follow-ups about the session's issue reuse its analysis
+        if session.analysis is not None and not new_issue:
+            language = language if language in analyzer.supported_languages else session.language
+            shed = None
+            try:
+                with admitted('chat', REQUEST_DEADLINE_SECONDS), request_priority(PRIORITY_CHAT):
+                    reply = analyzer.answer_follow_up(session, user_input, language)
+            except Overloaded as e:
+                rejection = shed_response('chat', e)
+                if rejection is not None:
+                    return rejection
+                shed = e.reason
+                reply = format_chat_response(session.subject, AnalysisResult(**session.analysis))
+            record_chat_turns(session.session_id, user_input, reply)
+            response = {
+                'success': True,
+                'response': reply,
+                'follow_up': True,
+                'language': language,
+                'session_id': session.session_id
+            }
+            if shed is not None:
+                response['shed'] = shed
+            return jsonify(response)
+        
         # For other messages, perform full analysis
-        result = analyzer.analyze(user_input, language)
+        try:
+            with admitted('chat', REQUEST_DEADLINE_SECONDS), request_priority(PRIORITY_CHAT):
+                result = analyzer.analyze(user_input, language, engine, refresh, issue_id=issue_id_for(data))
+        except Overloaded as e:
+            rejection = shed_response('chat', e)
+            if rejection is not None:
+                return rejection
+            result = analyzer.analyze_degraded(user_input, language, e.reason)
+        chat_sessions.set_analysis(session.session_id, user_input, asdict(result), result.language)
         
         # Format as a conversational response
-        response_text = f"""Based on your message about "{user_input}", here's my comprehensive analysis:
-
-🔍 **Fairness Analysis**: {result.fairness_analysis}
-
-📊 **Impact Analysis**: {result.impact_analysis}
-
-💰 **Resource Analysis**: {result.resource_analysis}
-
-🌱 **Sustainability Analysis**: {result.sustainability_analysis}
-
-⚠️ **Potential Disadvantages**: {result.disadvantages}
-
-🤖 **AI Suggestion**: {result.ai_suggestion}
-
-📈 **Truthfulness Assessment**: {result.truthfulness_percentage}% credibility based on available information
-
-Would you like me to elaborate on any specific aspect?"""
+        response_text = format_chat_response(user_input, result)
         
-        return jsonify({
+        response = {
             'success': True,
             'response': response_text,
-            'detailed_analysis': asdict(result),
-            'language': result.language
-        })
+            'language': result.language,
+            'session_id': session.session_id,
+            **record_analysis(data, user_input, asdict(result))
+        }
+        # Compact replies leave out the analysis the response text already carries
+        if not compact:
+            response['detailed_analysis'] = asdict(result)
+        with span('serialize'):
+            return jsonify(response)
         
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
@@ -388,6 +2236,417 @@ Would you like me to elaborate on any specific aspect?"""
             'error': 'Internal server error occurred'
         }), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Batch analysis endpoint streaming one NDJSON line per item"""
+    data = None
+    if request.mimetype != 'application/x-ndjson':
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('items'), list):
+            return jsonify({'error': 'Items list is required'}), 400
+    
+    options = data or request.args
+    engine = options.get('engine', None)
+    refresh = str(options.get('refresh', False)).lower() == 'true'
+    
+    if engine is not None and engine not in ANALYSIS_ENGINES:
+        return jsonify({'error': f"Engine must be one of: {', '.join(ANALYSIS_ENGINES)}"}), 400
+    
+    try:
+        concurrency = int(options.get('concurrency', BATCH_MAX_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Concurrency must be an integer'}), 400
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    
+    def generate():
+        count = 0
+        with request_priority(PRIORITY_BATCH):
+            for line in run_batch(iter_batch_items(data), concurrency, engine, refresh):
+                count += 1
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+        logger.info(f"Batch analysis completed for {count} items")
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Streaming analysis endpoint emitting one SSE event per section"""
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    user_input = data['message'].strip()
+    preferred_language = data.get('language', None)
+    refresh = bool(data.get('refresh', False))
+    
+    if not user_input:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    
+    issue_error = issue_fields_error(data)
+    if issue_error:
+        return jsonify({'error': issue_error}), 400
+    
+    shed, release = None, lambda: None
+    try:
+        release = admit_stream('analyze', REQUEST_DEADLINE_SECONDS)
+    except Overloaded as e:
+        rejection = shed_response('analyze', e)
+        if rejection is not None:
+            return rejection
+        shed = e.reason
+    
+    def events():
+        with request_priority(PRIORITY_ANALYZE):
+            for event, payload in analyzer.analyze_stream(user_input, preferred_language, refresh, shed, issue_id_for(data)):
+                if event == 'result':
+                    logger.info(f"Streamed analysis completed for language: {payload['language']}")
+                    yield event, {'success': True, 'analysis': payload, **record_analysis(data, user_input, payload)}
+                else:
+                    yield event, payload
+    
+    response = sse_response(events())
+    response.call_on_close(release)
+    return response
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming variant of the chat endpoint"""
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    user_input = data['message'].strip()
+    refresh = bool(data.get('refresh', False))
+    new_issue = bool(data.get('new_issue', False))
+    compact = bool(data.get('compact', False))
+    
+    if not user_input:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    
+    issue_error = issue_fields_error(data)
+    if issue_error:
+        return jsonify({'error': issue_error}), 400
+    
+    session = chat_session(data)
+    if session is None:
+        return session_expired_response(data)
+    language = data.get('language') or session.language
+    
+    greeting = greeting_response(user_input, language)
+    if greeting is not None:
+        return sse_response(iter([
+            ('result', {'success': True, 'response': greeting, 'language': language, 'session_id': session.session_id})
+        ]))
+    
+    shed, release = None, lambda: None
+    try:
+        release = admit_stream('chat', REQUEST_DEADLINE_SECONDS)
+    except Overloaded as e:
+        rejection = shed_response('chat', e)
+        if rejection is not None:
+            return rejection
+        shed = e.reason
+    
+    def events():
+        if session.analysis is not None and not new_issue:
+            reply_language = language if language in analyzer.supported_languages else session.language
+            if shed is not None:
+                reply = format_chat_response(session.subject, AnalysisResult(**session.analysis))
+            else:
+                with request_priority(PRIORITY_CHAT):
+                    reply = analyzer.answer_follow_up(session, user_input, reply_language)
+            record_chat_turns(session.session_id, user_input, reply)
+            payload = {
+                'success': True,
+                'response': reply,
+                'follow_up': True,
+                'language': reply_language,
+                'session_id': session.session_id
+            }
+            if shed is not None:
+                payload['shed'] = shed
+            yield 'result', payload
+            return
+        
+        with request_priority(PRIORITY_CHAT):
+            for event, payload in analyzer.analyze_stream(user_input, language, refresh, shed, issue_id_for(data)):
+                if event == 'result':
+                    result = AnalysisResult(**payload)
+                    chat_sessions.set_analysis(session.session_id, user_input, payload, result.language)
+                    reply = {
+                        'success': True,
+                        'response': format_chat_response(user_input, result),
+                        'language': result.language,
+                        'session_id': session.session_id,
+                        **record_analysis(data, user_input, payload)
+                    }
+                    if not compact:
+                        reply['detailed_analysis'] = payload
+                    yield event, reply
+                else:
+                    yield event, payload
+    
+    response = sse_response(events())
+    response.call_on_close(release)
+    return response
+
+@app.route('/jobs/analyze', methods=['POST'])
+def submit_analysis_job():
+    """Queue an analysis and return its job id immediately"""
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    user_input = data['message'].strip()
+    engine = data.get('engine', None)
+    
+    if not user_input:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    
+    if engine is not None and engine not in ANALYSIS_ENGINES:
+        return jsonify({'error': f"Engine must be one of: {', '.join(ANALYSIS_ENGINES)}"}), 400
+    
+    issue_error = issue_fields_error(data)
+    if issue_error:
+        return jsonify({'error': issue_error}), 400
+    
+    issue_id = (data.get('issue_id') or uuid.uuid4().hex).strip()
+    job = job_store.submit({
+        'message': user_input,
+        'language': data.get('language', None),
+        'engine': engine,
+        'refresh': bool(data.get('refresh', False)),
+        'issue_id': issue_id,
+        'wallet_address': data.get('wallet_address', None)
+    })
+    status_url = f"/jobs/{job['id']}"
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'issue_id': issue_id,
+        'status': job['status'],
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Job status; pass ?wait=<seconds> to long-poll until the job finishes"""
+    try:
+        wait = max(0.0, min(float(request.args.get('wait', 0)), JOB_MAX_WAIT_SECONDS))
+    except ValueError:
+        return jsonify({'error': 'Wait must be a number of seconds'}), 400
+    
+    job = job_store.wait(job_id, wait) if wait else job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route('/analyses', methods=['GET'])
+def list_analyses():
+    """Stored analyses, newest first; filter by wallet, language, content hash, truthfulness or text and page with cursor"""
+    if analysis_history is None:
+        return jsonify({'error': 'Analysis history is disabled'}), 404
+    
+    args = request.args
+    try:
+        limit = max(1, min(int(args.get('limit', ANALYSES_PAGE_SIZE)), ANALYSES_MAX_PAGE_SIZE))
+        min_truthfulness = int(args['min_truthfulness']) if 'min_truthfulness' in args else None
+        max_truthfulness = int(args['max_truthfulness']) if 'max_truthfulness' in args else None
+    except ValueError:
+        return jsonify({'error': 'Limit and truthfulness bounds must be integers'}), 400
+    
+    try:
+        records, next_cursor = analysis_history.list(
+            limit,
+            cursor=args.get('cursor'),
+            wallet=args.get('wallet_address'),
+            language=args.get('language'),
+            digest=args.get('content_hash'),
+            min_truthfulness=min_truthfulness,
+            max_truthfulness=max_truthfulness,
+            query=args.get('q')
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'analyses': records,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/analyses/<issue_id>', methods=['GET'])
+def get_analysis(issue_id):
+    """Stored analyses of one issue, by language; a proof's analysis needs its uploader's wallet_address"""
+    if analysis_history is None:
+        return jsonify({'error': 'Analysis history is disabled'}), 404
+    
+    records = analysis_history.get(issue_id, request.args.get('wallet_address'))
+    if not records:
+        return jsonify({'error': 'Analysis not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'issue_id': issue_id,
+        'analyses': {record['language']: record for record in records}
+    })
+
+@app.route('/proofs', methods=['POST'])
+def ingest_proof():
+    """Stream a proof upload: compute its IPFS CID, skip proofs already indexed, extract its text and analyse it"""
+    limit = PROOF_MAX_BYTES + (PROOF_FORM_OVERHEAD_BYTES if request.mimetype == 'multipart/form-data' else 0)
+    if request.content_length is not None and request.content_length > limit:
+        # Refused from the header, before a byte of the body is read
+        return jsonify({'error': f"Proof exceeds {PROOF_MAX_BYTES} bytes"}), 413
+    if request.mimetype == 'multipart/form-data':
+        # Werkzeug parses the whole form, spooling the file to a temporary file, before this handler sees it
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'File is required'}), 400
+        stream, content_type, fields, filename = upload.stream, upload.mimetype, request.form, upload.filename
+    else:
+        # Raw body: the file itself, with the other fields in the query string
+        stream, content_type, fields, filename = request.stream, request.mimetype, request.args, request.args.get('filename')
+    content_type = content_type or 'application/octet-stream'
+    
+    issue_error = issue_fields_error(fields)
+    if issue_error:
+        return jsonify({'error': issue_error}), 400
+    
+    builder = CIDBuilder(PROOF_CHUNK_BYTES, PROOF_DAG_WIDTH)
+    extractor = TextExtractor(content_type, PROOF_TEXT_MAX_CHARS)
+    spool = tempfile.NamedTemporaryFile(dir=PROOF_STORE_DIR, suffix='.part', delete=False) if PROOF_STORE_DIR else None
+    try:
+        while True:
+            chunk = stream.read(PROOF_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            builder.update(chunk)
+            extractor.update(chunk)
+            if spool is not None:
+                spool.write(chunk)
+            if builder.size > PROOF_MAX_BYTES:
+                return jsonify({'error': f"Proof exceeds {PROOF_MAX_BYTES} bytes"}), 413
+        cid = builder.finish()
+        
+        text = extractor.text()
+        issue = {'issue_id': (fields.get('issue_id') or uuid.uuid4().hex).strip(), 'wallet_address': fields.get('wallet_address')}
+        if not proof_index.add(cid, builder.size, content_type, filename, issue['issue_id'], issue['wallet_address'], text):
+            # Same content as an earlier upload: nothing to store or analyse again
+            logger.info(f"Proof {cid} already indexed, skipping")
+            return jsonify({'success': True, 'duplicate': True, **proof_for(proof_index.get(cid), issue['wallet_address'])})
+        if spool is not None:
+            spool.close()
+            os.replace(spool.name, os.path.join(PROOF_STORE_DIR, cid))
+            spool = None
+    finally:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+    
+    logger.info(f"Ingested proof {cid} ({builder.size} bytes, {len(text)} characters of text)")
+    response = {'success': True, 'duplicate': False, **proof_public(proof_index.get(cid)), 'analysis': None}
+    
+    # The submitter's description and the proof's own text are analysed together
+    analysis_text = '\n\n'.join(part for part in (fields.get('message', '').strip(), text) if part)
+    if analysis_text and fields.get('analyze', 'true').lower() != 'false':
+        try:
+            with admitted('analyze', REQUEST_DEADLINE_SECONDS), request_priority(PRIORITY_ANALYZE):
+                result = analyzer.analyze(analysis_text, fields.get('language'), issue_id=issue['issue_id'])
+        except Overloaded as e:
+            # The proof is already indexed, so its analysis degrades rather than failing the upload
+            logger.warning(f"Shedding proof analysis ({e.reason}, degrade)")
+            ADMISSION_SHED.inc(endpoint='proofs', reason=e.reason, action='degrade')
+            result = analyzer.analyze_degraded(analysis_text, fields.get('language'), e.reason)
+        response['analysis'] = asdict(result)
+        # Kept to the uploader like the proof record itself, or its text would name the proof's issue and wallet
+        response.update(record_analysis(issue, analysis_text, response['analysis'], private=True))
+    
+    return jsonify(response), 201
+
+@app.route('/proofs/<cid>', methods=['GET'])
+def get_proof(cid):
+    """Pre-check a proof by CID before uploading it; the uploader's wallet_address query returns the whole record"""
+    record = proof_index.get(cid)
+    if record is None:
+        return jsonify({'error': 'Proof not found'}), 404
+    return jsonify({'success': True, **proof_for(record, request.args.get('wallet_address'))})
+
+def profile_threads(seconds: float, interval_seconds: float, include_idle: bool) -> Optional[SamplingProfiler]:
+    """Sample this worker's threads, or None when a profile is already running here"""
+    if not profile_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(os.path.dirname(os.path.abspath(__file__)), interval_seconds, include_idle)
+        profiler.run(seconds)
+    finally:
+        profile_lock.release()
+    logger.info(f"Profiled worker {os.getpid()} for {seconds:g}s: {profiler.samples} samples, "
+                f"{profiler.idle_samples} idle")
+    return profiler
+
+@app.route('/admin/profile', methods=['GET'])
+def profile_worker():
+    """Sample every worker's threads for a few seconds of live traffic; returns collapsed stacks for a flamegraph"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    supplied = request.headers.get('Authorization', '').encode('utf-8')
+    if not hmac.compare_digest(supplied, f"Bearer {ADMIN_TOKEN}".encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401, {'WWW-Authenticate': 'Bearer'}
+    
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 10))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    if not 0 < seconds <= PROFILE_MAX_SECONDS or not 1 <= interval_ms <= 1000:
+        return jsonify({'error': f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}] and interval_ms in [1, 1000]"}), 400
+    include_idle = request.args.get('idle', 'false').lower() == 'true'
+    by_worker = request.args.get('by_worker', 'false').lower() == 'true'
+    
+    if profile_lock.locked():
+        return jsonify({'error': 'A profile is already running in this worker'}), 409
+    # Long by design, so kept out of the slow request log
+    g.long_running = True
+    others = profile_exchange.live_workers() if profile_exchange is not None else []
+    request_id = profile_exchange.request(seconds, interval_ms / 1000, include_idle) if others else None
+    profiler = profile_threads(seconds, interval_ms / 1000, include_idle)
+    if profiler is None:
+        return jsonify({'error': 'A profile is already running in this worker'}), 409
+    answered = {}
+    if request_id is not None:
+        # The others started within a poll of the request and stop at the same moment as this worker
+        answered = profile_exchange.results(request_id, others, timeout=2 * profile_exchange.poll_seconds + 2)
+    
+    profiles = {os.getpid(): (profiler.stacks, profiler.samples, profiler.idle_samples), **answered}
+    stacks = Counter()
+    for pid, (worker_stacks, _, _) in profiles.items():
+        for stack, count in worker_stacks.items():
+            stacks[f"worker-{pid};{stack}" if by_worker else stack] += count
+    missing = [pid for pid in others if pid not in answered]
+    headers = {
+        'Cache-Control': 'no-store',
+        'X-Profile-Worker': str(os.getpid()),
+        'X-Profile-Workers': ','.join(str(pid) for pid in sorted(profiles)),
+        'X-Profile-Samples': str(sum(samples for _, samples, _ in profiles.values())),
+        'X-Profile-Idle-Samples': str(sum(idle for _, _, idle in profiles.values()))
+    }
+    if missing:
+        # Busy with another profile, or stopped while this one ran
+        headers['X-Profile-Missing-Workers'] = ','.join(str(pid) for pid in missing)
+    collapsed = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    return Response(collapsed, content_type='text/plain; charset=utf-8', headers=headers)
+
+startup['import_seconds'] = round(time.monotonic() - IMPORT_STARTED, 3)
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     host = os.getenv('HOST', '0.0.0.0')
@@ -397,4 +2656,7 @@ if __name__ == '__main__':
     logger.info(f"Supported languages: {list(analyzer.supported_languages.keys())}")
     logger.info(f"Groq API configured: {'Yes' if groq_client else 'No (using fallback analysis)'}")
     
+    # With the reloader only the child process serves; the parent just watches files and restarts it
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=start_worker, name='warm-up', daemon=True).start()
     app.run(host=host, port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: script-based language detection vs. per-request langdetect
+Run with: python bench_language_detection.py
+"""
+
+import timeit
+
+from langdetect import DetectorFactory, detect
+
+from language_detection import detect_language, warm_up
+
+SUPPORTED = ('en', 'ta', 'kn', 'te')
+
+SAMPLES = {
+    'en': "I have not received the money in my account. My account number is 1234567890. Please check and let me know.",
+    'ta': "புதுப்பிக்கத்தக்க ஆற்றல் பற்றி பகுப்பாய்வு செய்யுங்கள்",
+    'kn': "ನವೀಕರಿಸಬಹುದಾದ ಶಕ್ತಿಯ ಬಗ್ಗೆ ವಿಶ್ಲೇಷಿಸಿ",
+    'te': "పునరుత్పాదక శక్తి గురించి విశ్లేషించండి",
+    'mixed': "DAO proposal: எங்கள் ஊரில் புதிய பூங்கா வேண்டும் for the children"
+}
+
+def legacy_detect(text):
+    """The previous AIAnalyzer.detect_language path"""
+    try:
+        detected = detect(text)
+        return detected if detected in SUPPORTED else 'en'
+    except:
+        return 'en'
+
+def main():
+    """Time both detectors on each sample and check reproducibility"""
+    warm_up()
+    DetectorFactory.seed = 0
+    runs = 200
+    
+    print(f"{'sample':<8} {'legacy':>12} {'script':>12} {'speedup':>9}  result")
+    print("-" * 62)
+    for name, text in SAMPLES.items():
+        legacy = timeit.timeit(lambda: legacy_detect(text), number=runs) / runs
+        fast = timeit.timeit(lambda: detect_language(text, SUPPORTED), number=runs) / runs
+        language, confidence = detect_language(text, SUPPORTED)
+        print(f"{name:<8} {legacy * 1e6:>10.1f}us {fast * 1e6:>10.1f}us {legacy / fast:>8.0f}x  {language} ({confidence})")
+    
+    repeated = {detect_language(SAMPLES['mixed'], SUPPORTED) for _ in range(50)}
+    print(f"\n✅ Reproducible for identical input: {len(repeated) == 1}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: near-duplicate index lookups against a large synthetic corpus
+Run with: python bench_near_duplicates.py [entries]
+"""
+
+import sys
+import time
+import random
+import string
+import timeit
+
+from similarity import NearDuplicateIndex, minhash_signature
+
+ORIGINAL = "I have not received the money in my account. My account number is 1234567890. Please check."
+
+VARIANTS = {
+    'punctuation': "I have not received the money in my account! My account number is 1234567890. Please check!",
+    'greeting': "Hi, I have not received the money in my account. My account number is 1234567890. Please check it.",
+    # Another submitter's account number is a different issue, never a near-copy
+    'account': "I have not received the money in my account. My account number is 9876543210. Please check.",
+    'reworded': "I haven't received the money in my bank account. Account number 1234567890. Please check.",
+    'tamil': "புதுப்பிக்கத்தக்க ஆற்றல் பற்றி பகுப்பாய்வு செய்யுங்கள்",
+    'unrelated': "Proposal to fund a community solar installation on the school roof"
+}
+
+def main():
+    """Fill the index with random issues, then time hits and misses"""
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(1)
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(5000)]
+    index = NearDuplicateIndex(threshold=0.8, max_entries=entries + 1)
+    
+    started = time.perf_counter()
+    for entry_id in range(entries):
+        message = ' '.join(rng.choices(words, k=rng.randint(8, 25)))
+        index._insert(-entry_id - 1, 'en', minhash_signature(message), time.time())
+    print(f"Indexed {entries} synthetic issues in {time.perf_counter() - started:.1f}s")
+    index.add(ORIGINAL, 'en', {'analysis': 'stored'}, 'original-issue')
+    
+    runs = 500
+    print(f"\n{'variant':<12} {'lookup':>10}  match")
+    print("-" * 50)
+    for name, text in VARIANTS.items():
+        elapsed = timeit.timeit(lambda: index.lookup(text, 'en'), number=runs) / runs
+        match = index.lookup(text, 'en')
+        print(f"{name:<12} {elapsed * 1e6:>8.1f}us  {match[1] if match else None}")
+
+if __name__ == "__main__":
+    main()
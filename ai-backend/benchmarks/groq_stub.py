@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions API
+Point the backend at it with GROQ_BASE_URL=http://127.0.0.1:<port> and any GROQ_API_KEY.
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECTION_TEXT = "# {heading}\n- First stub point about the submitted issue\n- Second stub point with a recommended follow-up"
+HEADINGS = {
+    'fairness': 'Fairness Analysis',
+    'impact': 'Impact Analysis',
+    'resource': 'Resource Analysis',
+    'sustainability': 'Sustainability Analysis',
+    'disadvantages': 'Potential Disadvantages',
+    'ai_suggestion': 'AI Suggestion'
+}
+
+class StubConfig:
+    """Latency distribution and failure injection for the stub"""
+
+    def __init__(self, median_ms=400.0, sigma=0.35, error_rate=0.0, rate_limit_rate=0.0,
+                 tokens_per_second=800.0, seed=None):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens_per_second = tokens_per_second
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'streams': 0}
+
+    def sample_latency(self) -> float:
+        """Log-normal latency in seconds around the configured median"""
+        with self.lock:
+            return self.median_ms / 1000 * math.exp(self.random.gauss(0, self.sigma))
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.random.random() < rate
+
+def completion_text(body: dict) -> str:
+    """Deterministic content shaped like the section the prompt asks for"""
+    prompt = body['messages'][-1]['content']
+    if (body.get('response_format') or {}).get('type') == 'json_object':
+        sections = {key: SECTION_TEXT.format(heading=heading) for key, heading in HEADINGS.items()}
+        return json.dumps({**sections, 'truthfulness': 72})
+    if 'TRUTHFULNESS' in prompt:
+        return SECTION_TEXT.format(heading='AI Suggestion') + "\nTRUTHFULNESS: 72"
+    for heading in HEADINGS.values():
+        if f"# {heading}" in prompt:
+            return SECTION_TEXT.format(heading=heading)
+    return "Stub reply to the follow-up question."
+
+def make_handler(config: StubConfig):
+    """Build a request handler bound to a stub configuration"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.endswith('/chat/completions'):
+                return self._json(404, {'error': {'message': 'not found'}})
+
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            with config.lock:
+                config.counters['requests'] += 1
+
+            if config.roll(config.rate_limit_rate):
+                with config.lock:
+                    config.counters['rate_limited'] += 1
+                return self._json(429, {'error': {'message': 'Rate limit reached', 'type': 'tokens'}},
+                                  {'retry-after': '1', 'x-ratelimit-remaining-tokens': '0'})
+
+            time.sleep(config.sample_latency())
+            if config.roll(config.error_rate):
+                with config.lock:
+                    config.counters['errors'] += 1
+                return self._json(500, {'error': {'message': 'Injected stub failure'}})
+
+            text = completion_text(body)
+            if body.get('stream'):
+                return self._stream(body, text)
+
+            prompt_tokens = sum(len(message['content']) for message in body['messages']) // 4
+            completion_tokens = len(text) // 4
+            self._json(200, {
+                'id': 'stub-completion',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'logprobs': None,
+                    'message': {'role': 'assistant', 'content': text}
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens
+                }
+            })
+
+        def _stream(self, body, text):
+            with config.lock:
+                config.counters['streams'] += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            delay = 1 / config.tokens_per_second if config.tokens_per_second else 0
+            for word in text.split(' '):
+                chunk = {
+                    'id': 'stub-chunk',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': body.get('model'),
+                    'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]
+                }
+                self._chunk(f"data: {json.dumps(chunk)}\n\n")
+                time.sleep(delay)
+            self._chunk("data: [DONE]\n\n")
+            self._chunk('')
+
+        def _chunk(self, data: str):
+            payload = data.encode('utf-8')
+            self.wfile.write(f"{len(payload):X}\r\n".encode('ascii') + payload + b"\r\n")
+            self.wfile.flush()
+
+        def _json(self, status, payload, headers=None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+def start_stub(port: int = 0, config: StubConfig = None):
+    """Start the stub in a background thread; returns (server, base_url)"""
+    config = config or StubConfig()
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, name='groq-stub', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Groq stub server")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--median-ms', type=float, default=400.0)
+    parser.add_argument('--sigma', type=float, default=0.35)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, StubConfig(args.median_ms, args.sigma, args.error_rate, args.rate_limit_rate))
+    print(f"🧪 Groq stub listening on {url} (set GROQ_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: runs the Flask app against the local Groq stub
+under several engine modes and serving configurations, then compares the
+results with the stored baseline.
+
+    python benchmarks/run_benchmarks.py                  # run and compare with baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline  # run and overwrite baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from groq_stub import StubConfig, start_stub
+from loadtest import run_load
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Engine modes x serving configurations
+SCENARIOS = {
+    'sections-concurrent/flask': {
+        'server': 'flask',
+        'env': {'ANALYSIS_ENGINE': 'sections', 'ANALYSIS_EXECUTION_MODE': 'concurrent'}
+    },
+    'sections-sequential/flask': {
+        'server': 'flask',
+        'env': {'ANALYSIS_ENGINE': 'sections', 'ANALYSIS_EXECUTION_MODE': 'sequential'}
+    },
+    'json/flask': {
+        'server': 'flask',
+        'env': {'ANALYSIS_ENGINE': 'json'}
+    },
+    'fast/flask': {
+        'server': 'flask',
+        'env': {'ANALYSIS_ENGINE': 'fast'}
+    },
+    'sections-concurrent/gunicorn-gthread': {
+        'server': 'gunicorn',
+        'env': {'ANALYSIS_ENGINE': 'sections', 'ANALYSIS_EXECUTION_MODE': 'concurrent'}
+    }
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(scenario: dict, stub_url: str, port: int) -> subprocess.Popen:
+    """Launch the backend for one scenario, pointed at the stub"""
+    env = {
+        **os.environ,
+        'PORT': str(port),
+        'DEBUG': 'False',
+        'LOG_LEVEL': 'WARNING',
+        'GROQ_API_KEY': 'stub-key',
+        'GROQ_BASE_URL': stub_url,
+        'GROQ_MAX_RETRIES': '0',
+        # Measure the Groq path itself, not the caches or our own rate limiting
+        'ANALYSIS_CACHE_ENABLED': 'False',
+        'NEAR_DUPLICATE_ENABLED': 'False',
+        'GROQ_RPM_LIMIT': '1000000',
+        'GROQ_TPM_LIMIT': '1000000000',
+        **scenario['env']
+    }
+    if scenario['server'] == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', '2', '--threads', '8',
+                   '-b', f'127.0.0.1:{port}', 'app:app']
+    else:
+        command = [sys.executable, 'app.py']
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/ready", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"server at {url} did not become ready")
+
+def run_scenario(name: str, stub_url: str, args):
+    """Return (load report, start-up timings) for one scenario"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    process = start_server(SCENARIOS[name], stub_url, port)
+    try:
+        wait_ready(url)
+        ready_seconds = time.monotonic() - started
+        first_started = time.monotonic()
+        requests.post(f"{url}/analyze", json={'message': 'First request after start-up', 'language': 'en'}, timeout=60)
+        startup = {
+            'ready_seconds': round(ready_seconds, 3),
+            'first_analyze_ms': round((time.monotonic() - first_started) * 1000, 1),
+            'server': requests.get(f"{url}/ready", timeout=5).json().get('startup')
+        }
+        return run_load(url, duration=args.duration, concurrency=args.concurrency), startup
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions beyond the tolerance"""
+    regressions = []
+    for name, report in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        for endpoint, summary in report.items():
+            reference = base.get(endpoint)
+            if not reference:
+                continue
+            if reference['p95_ms'] and summary['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name} {endpoint}: p95 {summary['p95_ms']}ms vs baseline {reference['p95_ms']}ms")
+            if reference['throughput_rps'] and summary['throughput_rps'] < reference['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{name} {endpoint}: {summary['throughput_rps']} rps vs baseline {reference['throughput_rps']} rps")
+    return regressions
+
+def print_table(results: dict):
+    print(f"\n{'scenario':<38} {'endpoint':<9} {'req':>6} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    print("-" * 98)
+    for name, report in results.items():
+        for endpoint, summary in report.items():
+            print(f"{name:<38} {endpoint:<9} {summary['requests']:>6} {summary['errors']:>5} "
+                  f"{summary['throughput_rps']:>8} {summary['p50_ms']:>7}ms {summary['p95_ms']:>7}ms {summary['p99_ms']:>7}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite against a local Groq stub")
+    parser.add_argument('--scenarios', nargs='*', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--stub-median-ms', type=float, default=300.0)
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    parser.add_argument('--stub-rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    config = StubConfig(median_ms=args.stub_median_ms, error_rate=args.stub_error_rate,
+                        rate_limit_rate=args.stub_rate_limit_rate, seed=42)
+    stub, stub_url = start_stub(config=config)
+    print(f"🧪 Groq stub at {stub_url} (median {args.stub_median_ms}ms)")
+
+    results, startup = {}, {}
+    for name in args.scenarios:
+        print(f"🔄 Running {name} for {args.duration:.0f}s at concurrency {args.concurrency}...")
+        results[name], startup[name] = run_scenario(name, stub_url, args)
+    stub.shutdown()
+
+    print_table(results)
+    print(f"\n{'scenario':<38} {'ready':>8} {'1st analyze':>12}")
+    for name, timings in startup.items():
+        print(f"{name:<38} {timings['ready_seconds']:>7}s {timings['first_analyze_ms']:>10}ms")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                'settings': {
+                    'duration': args.duration,
+                    'concurrency': args.concurrency,
+                    'stub_median_ms': args.stub_median_ms
+                },
+                'results': results,
+                'startup': startup
+            }, f, indent=2)
+        print(f"\n✅ Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("\nℹ️ No baseline yet; run with --save-baseline to create one")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Performance regressions:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
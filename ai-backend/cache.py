@@ -0,0 +1,153 @@
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different resubmissions share a cache key"""
+    text = unicodedata.normalize('NFC', message)
+    return ' '.join(text.split()).casefold()
+
+
+def make_cache_key(message: str, language: str, model: str, temperature: float, template_version: str) -> str:
+    """Content-addressed key for an analysis request"""
+    payload = json.dumps(
+        [normalize_message(message), language, model, float(temperature), template_version],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """Bounded in-memory LRU with TTL, optionally backed by a shared SQLite file"""
+
+    # Expired rows are purged from the SQLite tier every this many writes
+    PURGE_INTERVAL = 256
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'writes': 0
+        }
+
+        self._db = None
+        if db_path:
+            self._db = self._connect()
+            self._purge_disk()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        # WAL lets several gunicorn workers on one host read while another writes
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS analysis_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection, e.g. in a worker forked from a process that already had one"""
+        if self.db_path:
+            with self._lock:
+                self._db = self._connect()
+
+    def get(self, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Return (value, tier) for a live entry, or (None, None) on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return value, 'memory'
+                del self._entries[key]
+                self.counters['expirations'] += 1
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        'SELECT value, expires_at FROM analysis_cache WHERE key = ? AND expires_at > ?',
+                        (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Cache disk read failed: {str(e)}")
+                    row = None
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1])
+                    self.counters['disk_hits'] += 1
+                    return value, 'disk'
+
+            self.counters['misses'] += 1
+            return None, None
+
+    def set(self, key: str, value: Dict):
+        """Store a value in every configured tier"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self.counters['writes'] += 1
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value, ensure_ascii=False), expires_at)
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Cache disk write failed: {str(e)}")
+                self._writes += 1
+                if self._writes % self.PURGE_INTERVAL == 0:
+                    self._purge_disk()
+
+    def stats(self) -> Dict:
+        """Counters plus current sizes, for the health endpoint"""
+        with self._lock:
+            hits = self.counters['memory_hits'] + self.counters['disk_hits']
+            lookups = hits + self.counters['misses']
+            return {
+                **self.counters,
+                'hits': hits,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._db is not None
+            }
+
+    def _store_memory(self, key: str, value: Dict, expires_at: float):
+        """Insert into the LRU, evicting the least recently used entries (lock held)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _purge_disk(self):
+        """Drop expired rows from the SQLite tier"""
+        try:
+            purged = self._db.execute('DELETE FROM analysis_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+            self.counters['expirations'] += max(purged, 0)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache purge failed: {str(e)}")
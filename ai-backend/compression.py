@@ -0,0 +1,60 @@
+import gzip
+import hashlib
+import threading
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding the client accepts (q > 0), or None for identity"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    # Mid-range levels: most of the size win at a fraction of the CPU of the maximum settings
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator for an identity body; encoded variants append '-<encoding>'"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class PreparedBody:
+    """A response body serialized once, with its ETag and compressed variants built on first use"""
+
+    def __init__(self, body: bytes, content_type: str = 'application/json'):
+        self.body = body
+        self.content_type = content_type
+        self.etag = strong_etag(body)
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        with self._lock:
+            if encoding not in self._variants:
+                self._variants[encoding] = compress(self.body, encoding)
+            return self._variants[encoding]
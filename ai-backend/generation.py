@@ -0,0 +1,125 @@
+import re
+import threading
+from collections import deque
+from typing import Dict, List
+
+# Sent as `stop` on section calls: a further heading or a run of blank lines means the model has moved on
+STOP_SEQUENCES = ['\n\n#', '\n\n\n']
+
+REQUIRED_BULLETS = 2
+HEADING_PATTERN = re.compile(r'^#+\s*(.*?)\s*#*$')
+BULLET_PATTERN = re.compile(r'^(?:[-*•+]|\d{1,2}[.)])\s+(.*\S)')
+TRUTHFULNESS_PATTERN = re.compile(r'TRUTHFULNESS\s*:?\s*\**\s*(\d{1,3})')
+TRUTHFULNESS_LINE_PATTERN = re.compile(r'^[\s*_#-]*TRUTHFULNESS\b')
+
+
+def truthfulness_value(text: str):
+    """The TRUTHFULNESS marker's value, or None when it is absent"""
+    match = TRUTHFULNESS_PATTERN.search(text)
+    return min(100, int(match.group(1))) if match else None
+
+
+def has_required_parts(lines: List[str], needs_truthfulness: bool, text: str) -> bool:
+    """True once two bullets (and the truthfulness value, when asked for) are present in the given lines"""
+    bullets = sum(1 for line in lines if BULLET_PATTERN.match(line.strip()))
+    if bullets < REQUIRED_BULLETS:
+        return False
+    if not needs_truthfulness:
+        return True
+    match = TRUTHFULNESS_PATTERN.search(text)
+    # The value is only final once something follows its digits
+    return match is not None and (len(match.group(1)) == 3 or match.end() < len(text))
+
+
+class SectionParser:
+    """Watch a streamed section and report once everything the documented format asks for has arrived"""
+
+    def __init__(self, needs_truthfulness: bool = False):
+        self.needs_truthfulness = needs_truthfulness
+        self.text = ''
+
+    def feed(self, delta: str) -> bool:
+        self.text += delta
+        # The last line may still be growing, so only finished lines count toward the bullets.
+        # The heading is not waited for: normalize_section restores it if the model left it out.
+        return has_required_parts(self.text.split('\n')[:-1], self.needs_truthfulness, self.text)
+
+
+def normalize_section(text: str, heading: str, needs_truthfulness: bool = False) -> str:
+    """Rewrite a section as '# heading', two '- ' bullets and, when asked for, a 'TRUTHFULNESS: XX' line"""
+    title, points, prose = None, [], []
+    for line in text.strip().split('\n'):
+        line = line.strip()
+        if not line or TRUTHFULNESS_LINE_PATTERN.match(line):
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match and title is None and not points:
+            title = match.group(1)
+            continue
+        match = BULLET_PATTERN.match(line)
+        if match:
+            points.append(match.group(1))
+        elif not line.startswith('#'):
+            prose.append(line)
+    # Prose lines stand in for bullets the model did not write as a list
+    points.extend(prose[:max(0, REQUIRED_BULLETS - len(points))])
+
+    lines = [f"# {title or heading}"] + [f"- {point}" for point in points[:REQUIRED_BULLETS]]
+    if needs_truthfulness:
+        value = truthfulness_value(text)
+        if value is not None:
+            lines.append(f"TRUTHFULNESS: {value}")
+    return '\n'.join(lines)
+
+
+def section_complete(text: str, needs_truthfulness: bool = False) -> bool:
+    """Whether a finished section holds everything the documented format asks for"""
+    return has_required_parts(text.split('\n'), needs_truthfulness, text + '\n')
+
+
+class TokenBudgets:
+    """Per-section, per-language max_tokens derived from how long complete sections actually are"""
+
+    def __init__(self, defaults: Dict[str, int], window: int = 128, min_samples: int = 8,
+                 headroom: float = 1.25, floor: int = 48, ceiling_ratio: float = 3.0):
+        self.defaults = defaults
+        self.window = window
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.floor = floor
+        self.ceiling_ratio = ceiling_ratio
+        self._lock = threading.Lock()
+        self._samples: Dict[tuple, deque] = {}
+        self._truncated: Dict[tuple, int] = {}
+
+    def budget(self, section: str, language: str) -> int:
+        default = self.defaults[section]
+        with self._lock:
+            samples = self._samples.get((section, language))
+            if samples is None or len(samples) < self.min_samples:
+                return default
+            ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.floor, min(int(default * self.ceiling_ratio), int(p95 * self.headroom) + 8))
+
+    def observe(self, section: str, language: str, tokens: int, truncated: bool = False):
+        """Record the tokens a section needed; one cut off by its budget counts as needing more than it got"""
+        if truncated:
+            tokens = int(tokens * 1.5)
+        key = (section, language)
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(tokens)
+            if truncated:
+                self._truncated[key] = self._truncated.get(key, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            keys = [(key, len(samples), self._truncated.get(key, 0)) for key, samples in self._samples.items()]
+        return {
+            f"{section}:{language}": {
+                'samples': count,
+                'truncated': truncated,
+                'max_tokens': self.budget(section, language)
+            }
+            for (section, language), count, truncated in sorted(keys)
+        }
@@ -0,0 +1,71 @@
+"""
+Production serving config: gunicorn -c gunicorn.conf.py app:app
+Threaded workers suit the I/O-bound Groq calls; the app is preloaded in the master and each worker
+finishes its own warm-up (SQLite handles, Groq connections, job workers) before /ready reports 200.
+"""
+
+import os
+import time
+import signal
+import multiprocessing
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Read by app.py at import: do only fork-safe warm-up there and leave the rest to post_worker_init
+os.environ['SERVE_MODE'] = 'gunicorn'
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+
+# Few processes with many threads. Chat sessions, jobs, history, proofs and /admin/profile go through SQLite files
+# shared by every worker, so any worker may serve any request. What stays per process only costs efficiency: the
+# in-memory cache tier (share it with ANALYSIS_CACHE_DB), the near-duplicate index (NEAR_DUPLICATE_DB), the
+# admission gates and the Groq rate budgets, so divide GROQ_RPM_LIMIT/GROQ_TPM_LIMIT by the worker count.
+# Requests queued by admission control hold a thread, so the default leaves room above the gates' limits
+# and queues (36 with the defaults) for /health, /languages and greetings.
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', min(4, multiprocessing.cpu_count())))
+threads = int(os.getenv('GUNICORN_THREADS', 48))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# gthread workers heartbeat from their main loop, so long analyses and SSE streams do not trip this
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# Long enough for an in-flight analysis to run out its deadline after SIGTERM
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', float(os.getenv('ANALYSIS_DEADLINE_SECONDS', 20)) + 10))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', None)
+loglevel = os.getenv('LOG_LEVEL', 'INFO').lower()
+
+_master_started = time.monotonic()
+
+
+def when_ready(server):
+    server.log.info(f"Master ready in {time.monotonic() - _master_started:.2f}s "
+                    f"({'preloaded' if preload_app else 'lazy'} app, {workers} workers x {threads} threads)")
+
+
+def post_worker_init(worker):
+    import app
+
+    app.start_worker(after_fork=True)
+
+    # Flip /ready to 503 as soon as the drain starts, then let gunicorn's own handler stop accepting
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def drain(signum, frame):
+        app.begin_drain()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, drain)
+
+
+def worker_exit(server, worker):
+    import app
+
+    # Requests have drained by now; give a running job the rest of the grace period
+    app.job_workers.stop(timeout=graceful_timeout)
+    if app.analysis_history is not None:
+        app.analysis_history.stop(timeout=10)
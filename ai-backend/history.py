@@ -0,0 +1,309 @@
+import json
+import time
+import queue
+import base64
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from cache import normalize_message
+
+logger = logging.getLogger(__name__)
+
+# Retention and the row cap are enforced by the writer this often, so the cap may be exceeded by that many seconds of writes
+PRUNE_INTERVAL_SECONDS = 60.0
+
+SECTION_KEYS = (
+    'fairness_analysis', 'impact_analysis', 'resource_analysis',
+    'sustainability_analysis', 'disadvantages', 'ai_suggestion'
+)
+
+
+def content_hash(message: str) -> str:
+    """Hash of the normalized message, shared by resubmissions of the same text"""
+    return hashlib.sha256(normalize_message(message).encode('utf-8')).hexdigest()
+
+
+def normalize_wallet(wallet: Optional[str]) -> Optional[str]:
+    """Hex (0x) addresses compare case-insensitively; other address formats are kept as given"""
+    if not wallet:
+        return None
+    wallet = wallet.strip()
+    return wallet.lower() if wallet[:2].lower() == '0x' else wallet
+
+
+def encode_cursor(created_at: float, rowid: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at!r}:{rowid}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Raises ValueError for a cursor this store did not issue"""
+    try:
+        created_at, rowid = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii').split(':')
+        return float(created_at), int(rowid)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class AnalysisHistory:
+    """Served analyses kept in SQLite by issue, wallet and content hash, written off the request path"""
+
+    def __init__(self, db_path: str, max_pending: int = 10000, batch_size: int = 64, max_rows: int = 0,
+                 retention_seconds: float = 0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        # 0 disables either limit
+        self.max_rows = max_rows
+        self.retention_seconds = retention_seconds
+        self.full_text = True
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self.counters = {'recorded': 0, 'written': 0, 'dropped': 0, 'write_errors': 0, 'conflicts': 0, 'pruned': 0}
+
+        self._db = self._connect()
+        # Kept up to date by the writer instead of counting the table on every stats() call
+        self._stored = self._db.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        # WAL keeps listing reads going while the writer thread commits a batch
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS analyses ('
+            'issue_id TEXT NOT NULL, language TEXT NOT NULL, wallet TEXT, content_hash TEXT NOT NULL, '
+            'truthfulness INTEGER NOT NULL, confidence REAL NOT NULL, engine TEXT, created_at REAL NOT NULL, '
+            'message TEXT NOT NULL, result TEXT NOT NULL, private INTEGER NOT NULL DEFAULT 0, '
+            'PRIMARY KEY (issue_id, language))'
+        )
+        if 'private' not in {column[1] for column in db.execute('PRAGMA table_info(analyses)')}:
+            # Files written before proof analyses were kept to their uploader
+            db.execute('ALTER TABLE analyses ADD COLUMN private INTEGER NOT NULL DEFAULT 0')
+        db.execute('CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created_at)')
+        db.execute('CREATE INDEX IF NOT EXISTS analyses_wallet ON analyses (wallet, created_at)')
+        db.execute('CREATE INDEX IF NOT EXISTS analyses_content_hash ON analyses (content_hash)')
+        db.execute('CREATE INDEX IF NOT EXISTS analyses_language ON analyses (language, created_at)')
+        db.execute('CREATE INDEX IF NOT EXISTS analyses_truthfulness ON analyses (truthfulness)')
+        try:
+            # Keyed by the analyses rowid; unicode61 splits Tamil, Kannada and Telugu words on spaces like English
+            db.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(message, sections, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, history search falls back to LIKE: {str(e)}")
+            self.full_text = False
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection, e.g. in a worker forked from a process that already had one"""
+        with self._lock:
+            self._db = self._connect()
+
+    def start(self):
+        if self._writer is not None:
+            return
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the writer once the records already queued are written"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            self._writer = None
+
+    def record(self, issue_id: str, wallet: Optional[str], message: str, result: Dict, private: bool = False) -> bool:
+        """Queue an analysis for storage; never blocks, and drops the record when the writer is far behind.
+        Returns False when the issue already belongs to another wallet (or to a wallet, for an anonymous writer);
+        the writer checks again for records still in flight. A private record is only returned to its own wallet,
+        and never when it has none."""
+        wallet = normalize_wallet(wallet)
+        with self._lock:
+            owner = self._db.execute('SELECT wallet FROM analyses WHERE issue_id = ? LIMIT 1', (issue_id,)).fetchone()
+        if owner is not None and owner['wallet'] != wallet:
+            self.counters['conflicts'] += 1
+            return False
+        try:
+            self._pending.put_nowait((issue_id, wallet, message, result, time.time(), private))
+            self.counters['recorded'] += 1
+        except queue.Full:
+            self.counters['dropped'] += 1
+        return True
+
+    def get(self, issue_id: str, wallet: Optional[str] = None) -> List[Dict]:
+        """Every stored language of one issue that wallet may see"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT rowid, * FROM analyses WHERE issue_id = ? AND (private = 0 OR wallet = ?) '
+                'ORDER BY created_at DESC',
+                (issue_id, normalize_wallet(wallet))
+            ).fetchall()
+        return [self._public(row) for row in rows]
+
+    def list(self, limit: int = 20, cursor: Optional[str] = None, wallet: Optional[str] = None,
+             language: Optional[str] = None, digest: Optional[str] = None, min_truthfulness: Optional[int] = None,
+             max_truthfulness: Optional[int] = None, query: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Newest first; returns one page and the cursor for the next, or None on the last page. Private records
+        are only listed when filtering by the wallet that owns them."""
+        clauses, params = [], []
+        if cursor:
+            created_at, rowid = decode_cursor(cursor)
+            clauses.append('(created_at < ? OR (created_at = ? AND rowid < ?))')
+            params += [created_at, created_at, rowid]
+        for column, value in (('wallet', normalize_wallet(wallet)), ('language', language), ('content_hash', digest)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if not normalize_wallet(wallet):
+            clauses.append('private = 0')
+        if min_truthfulness is not None:
+            clauses.append('truthfulness >= ?')
+            params.append(min_truthfulness)
+        if max_truthfulness is not None:
+            clauses.append('truthfulness <= ?')
+            params.append(max_truthfulness)
+        terms = (query or '').split()
+        if terms and self.full_text:
+            # Each term quoted, so user input cannot form FTS query syntax
+            clauses.append('rowid IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)')
+            params.append(' '.join('"' + term.replace('"', '""') + '"' for term in terms))
+        elif terms:
+            for term in terms:
+                clauses.append('(message LIKE ? OR result LIKE ?)')
+                params += [f'%{term}%'] * 2
+
+        sql = 'SELECT rowid, * FROM analyses'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY created_at DESC, rowid DESC LIMIT ?'
+        with self._lock:
+            rows = self._db.execute(sql, (*params, limit + 1)).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['rowid'])
+        return [self._public(row) for row in rows], next_cursor
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters, 'pending': self._pending.qsize(), 'stored': self._stored, 'max_rows': self.max_rows,
+            'retention_seconds': self.retention_seconds, 'full_text': self.full_text
+        }
+
+    def _run(self):
+        writer = None
+        next_prune = time.monotonic()
+        while not (self._stop.is_set() and self._pending.empty()):
+            if (self.max_rows or self.retention_seconds) and time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+                writer = writer or self._connect()
+                try:
+                    self._prune(writer)
+                except sqlite3.Error as e:
+                    logger.warning(f"History pruning failed: {str(e)}")
+                    if writer.in_transaction:
+                        writer.execute('ROLLBACK')
+            try:
+                batch = [self._pending.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            # The writer has its own connection so reads never wait behind a batch
+            writer = writer or self._connect()
+            try:
+                self._write(writer, batch)
+                self.counters['written'] += len(batch)
+            except sqlite3.Error as e:
+                logger.warning(f"History write of {len(batch)} analyses failed: {str(e)}")
+                self.counters['write_errors'] += len(batch)
+                if writer.in_transaction:
+                    writer.execute('ROLLBACK')
+        if writer is not None:
+            writer.close()
+
+    def _write(self, db: sqlite3.Connection, batch: List[tuple]):
+        """Insert new records; an issue only takes re-analyses and other languages from the wallet that owns it, and an
+        anonymous issue from anonymous writers, so knowing an issue_id is not enough to overwrite someone's analysis"""
+        inserted = 0
+        db.execute('BEGIN IMMEDIATE')
+        for issue_id, wallet, message, result, created_at, private in batch:
+            language = result['language']
+            values = (
+                wallet, content_hash(message), result['truthfulness_percentage'], result['confidence_score'],
+                result.get('metadata', {}).get('engine'), created_at, message, json.dumps(result, ensure_ascii=False),
+                int(private)
+            )
+            rows = db.execute('SELECT rowid, wallet, language FROM analyses WHERE issue_id = ?', (issue_id,)).fetchall()
+            if any(row['wallet'] != wallet for row in rows):
+                self.counters['conflicts'] += 1
+                continue
+            existing = next((row for row in rows if row['language'] == language), None)
+            if existing is None:
+                rowid = db.execute(
+                    'INSERT INTO analyses (wallet, content_hash, truthfulness, confidence, engine, created_at, message, '
+                    'result, private, issue_id, language) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (*values, issue_id, language)
+                ).lastrowid
+                inserted += 1
+            else:
+                rowid = existing['rowid']
+                db.execute(
+                    'UPDATE analyses SET wallet = ?, content_hash = ?, truthfulness = ?, confidence = ?, engine = ?, '
+                    'created_at = ?, message = ?, result = ?, private = ? WHERE rowid = ?',
+                    (*values, rowid)
+                )
+            if self.full_text:
+                db.execute('DELETE FROM analyses_fts WHERE rowid = ?', (rowid,))
+                db.execute(
+                    'INSERT INTO analyses_fts (rowid, message, sections) VALUES (?, ?, ?)',
+                    (rowid, message, '\n'.join(result.get(key, '') for key in SECTION_KEYS))
+                )
+        db.execute('COMMIT')
+        self._stored += inserted
+
+    def _prune(self, db: sqlite3.Connection):
+        """Delete records past the retention period, then the oldest beyond max_rows"""
+        db.execute('BEGIN IMMEDIATE')
+        # Other workers write to the same file, so the running count is corrected here, off the request path
+        stored = db.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+        cutoff = time.time() - self.retention_seconds if self.retention_seconds else 0.0
+        expired = [row[0] for row in db.execute('SELECT rowid FROM analyses WHERE created_at < ?', (cutoff,))]
+        excess = stored - len(expired) - self.max_rows if self.max_rows else 0
+        if excess > 0:
+            expired += [row[0] for row in db.execute(
+                'SELECT rowid FROM analyses WHERE created_at >= ? ORDER BY created_at, rowid LIMIT ?', (cutoff, excess)
+            )]
+        db.executemany('DELETE FROM analyses WHERE rowid = ?', [(rowid,) for rowid in expired])
+        if self.full_text:
+            db.executemany('DELETE FROM analyses_fts WHERE rowid = ?', [(rowid,) for rowid in expired])
+        db.execute('COMMIT')
+        self._stored = stored - len(expired)
+        self.counters['pruned'] += len(expired)
+        if expired:
+            logger.info(f"Pruned {len(expired)} analyses from the history")
+
+    def _public(self, row: sqlite3.Row) -> Dict:
+        """Record fields exposed over the API"""
+        return {
+            'issue_id': row['issue_id'],
+            'language': row['language'],
+            'wallet_address': row['wallet'],
+            'content_hash': row['content_hash'],
+            'truthfulness_percentage': row['truthfulness'],
+            'confidence_score': row['confidence'],
+            'engine': row['engine'],
+            'created_at': row['created_at'],
+            'message': row['message'],
+            'analysis': json.loads(row['result'])
+        }
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Standalone job worker: runs queued /jobs/analyze work from the shared job store
+Run the web tier with JOB_WORKERS=0 and scale these processes independently.
+"""
+
+import os
+import signal
+import threading
+
+# The web tier's in-process workers are replaced by the ones started below
+os.environ['JOB_WORKERS'] = '0'
+
+from app import analysis_history, job_store, run_analysis_job, start_worker, logger
+from jobs import JobWorkers
+
+def main():
+    # History writer, language profiles and Groq connections; the web tier's job workers stay off
+    start_worker()
+    count = int(os.getenv('JOB_WORKER_THREADS', 4))
+    workers = JobWorkers(job_store, run_analysis_job, count)
+    workers.start()
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    logger.info("Stopping job workers")
+    workers.stop(timeout=30)
+    if analysis_history is not None:
+        analysis_history.stop(timeout=10)
+
+if __name__ == "__main__":
+    main()
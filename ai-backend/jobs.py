@@ -0,0 +1,251 @@
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobStore:
+    """Durable analysis job queue in a SQLite file shared by web and worker processes"""
+
+    # Finished jobs past their retention are purged every this many submissions
+    PURGE_INTERVAL = 256
+
+    def __init__(self, db_path: str, lease_seconds: float = 120, max_attempts: int = 3,
+                 retention_seconds: float = 86400, poll_interval: float = 0.5):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # Notified on every state change in this process; other processes are picked up by polling
+        self._changed = threading.Condition(self._lock)
+        self._submissions = 0
+        self.counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'requeued': 0}
+
+        self._db = self._connect()
+        self._purge()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        # WAL lets pollers read while a worker in another process claims or finishes a job
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, error TEXT, '
+            'attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, '
+            'finished_at REAL, lease_until REAL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)')
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection, e.g. in a worker forked from a process that already had one"""
+        with self._lock:
+            self._db = self._connect()
+
+    def submit(self, payload: Dict) -> Dict:
+        """Queue a job and return its public representation"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._changed:
+            self._db.execute(
+                'INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)',
+                (job_id, JOB_QUEUED, json.dumps(payload, ensure_ascii=False), now)
+            )
+            self.counters['submitted'] += 1
+            self._submissions += 1
+            if self._submissions % self.PURGE_INTERVAL == 0:
+                self._purge()
+            self._changed.notify_all()
+        return {'id': job_id, 'status': JOB_QUEUED, 'created_at': now}
+
+    def claim(self) -> Optional[Dict]:
+        """Lease the oldest runnable job, including running jobs whose worker stopped renewing (JobWorkers renews
+        the lease of every job it runs, so only a dead or stuck worker's jobs expire)"""
+        now = time.time()
+        with self._lock:
+            try:
+                # IMMEDIATE takes the write lock up front so two processes cannot claim the same row
+                self._db.execute('BEGIN IMMEDIATE')
+                row = self._db.execute(
+                    'SELECT id, status, attempts FROM jobs '
+                    'WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY created_at LIMIT 1',
+                    (JOB_QUEUED, JOB_RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    self._db.execute('COMMIT')
+                    return None
+                if row['status'] == JOB_RUNNING:
+                    if row['attempts'] >= self.max_attempts:
+                        self._db.execute(
+                            'UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?',
+                            (JOB_FAILED, 'Job abandoned after repeated worker failures', now, row['id'])
+                        )
+                        self._db.execute('COMMIT')
+                        self.counters['failed'] += 1
+                        self._changed.notify_all()
+                        return None
+                    self.counters['requeued'] += 1
+                    logger.warning(f"Re-running job {row['id']} after its lease expired")
+                self._db.execute(
+                    'UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ? WHERE id = ?',
+                    (JOB_RUNNING, now, now + self.lease_seconds, row['id'])
+                )
+                claimed = self._db.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+                self._db.execute('COMMIT')
+            except sqlite3.Error as e:
+                logger.warning(f"Job claim failed: {str(e)}")
+                if self._db.in_transaction:
+                    self._db.execute('ROLLBACK')
+                return None
+        return {**self._public(claimed), 'payload': json.loads(claimed['payload'])}
+
+    def renew(self, job_id: str) -> bool:
+        """Extend a running job's lease; False once the job is no longer running (finished or re-claimed and done)"""
+        with self._lock:
+            try:
+                renewed = self._db.execute(
+                    'UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?',
+                    (time.time() + self.lease_seconds, job_id, JOB_RUNNING)
+                ).rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"Lease renewal for job {job_id} failed: {str(e)}")
+                return False
+        return renewed > 0
+
+    def complete(self, job_id: str, result: Dict):
+        self._finish(job_id, JOB_SUCCEEDED, result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, JOB_FAILED, error=error)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._public(row) if row is not None else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Long-poll: return the job once finished or when the timeout elapses"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED_STATES or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+    def wait_for_work(self, timeout: float):
+        """Block a worker until a job is submitted in this process or the poll interval passes"""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def stats(self) -> Dict:
+        """Counters plus queue depth by status, for the health endpoint"""
+        with self._lock:
+            rows = self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+            counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+            counts.update({row[0]: row[1] for row in rows})
+            return {**self.counters, 'jobs': counts}
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._changed:
+            self._db.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?',
+                (status, result, error, time.time(), job_id)
+            )
+            self.counters[status] += 1
+            self._changed.notify_all()
+
+    def _public(self, row: sqlite3.Row) -> Dict:
+        """Job fields exposed over the API"""
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error']
+        }
+
+    def _purge(self):
+        """Drop finished jobs older than the retention period"""
+        try:
+            self._db.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?',
+                (*FINISHED_STATES, time.time() - self.retention_seconds)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Job purge failed: {str(e)}")
+
+
+class JobWorkers:
+    """Background threads that claim jobs from a JobStore and run them through a handler, plus a heartbeat thread
+    that keeps renewing the lease of every job they are running"""
+
+    def __init__(self, store: JobStore, handler: Callable[[Dict], Dict], count: int = 2):
+        self.store = store
+        self.handler = handler
+        self.count = count
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running: Set[str] = set()
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        for index in range(self.count):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"Started {self.count} job workers on {self.store.db_path}")
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self.store.claim()
+            if job is None:
+                self.store.wait_for_work(self.store.poll_interval)
+                continue
+            with self._running_lock:
+                self._running.add(job['id'])
+            try:
+                self.store.complete(job['id'], self.handler(job['payload']))
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {str(e)}")
+                self.store.fail(job['id'], 'Analysis failed')
+            finally:
+                with self._running_lock:
+                    self._running.discard(job['id'])
+
+    def _heartbeat(self):
+        # A third of the lease leaves two missed beats before another worker may take the job over
+        while not self._stop.wait(self.store.lease_seconds / 3):
+            with self._running_lock:
+                running = list(self._running)
+            for job_id in running:
+                self.store.renew(job_id)
@@ -0,0 +1,74 @@
+import re
+import logging
+import threading
+from typing import Dict, Iterable, Tuple
+
+from langdetect import DetectorFactory, detect_langs
+from langdetect import detector_factory
+
+logger = logging.getLogger(__name__)
+
+# Each supported non-Latin language has its own Unicode block
+SCRIPT_PATTERNS = {
+    'ta': re.compile('[\u0B80-\u0BFF]'),
+    'te': re.compile('[\u0C00-\u0C7F]'),
+    'kn': re.compile('[\u0C80-\u0CFF]')
+}
+LATIN_PATTERN = re.compile('[A-Za-z\u00C0-\u024F]')
+
+# Supported languages written in Latin script; with only one, Latin text needs no statistical model
+LATIN_LANGUAGES = {'en'}
+
+# Share of letters a script must hold for the script alone to decide the language
+SCRIPT_MAJORITY = 0.5
+
+_warm_lock = threading.Lock()
+_warmed = False
+
+
+def warm_up():
+    """Load langdetect's profiles and seed it so results are reproducible"""
+    global _warmed
+    with _warm_lock:
+        if _warmed:
+            return
+        DetectorFactory.seed = 0
+        detector_factory.init_factory()
+        _warmed = True
+        logger.info("Language detection profiles loaded")
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    """Count letters per script using code-point ranges"""
+    counts = {language: pattern.subn('', text)[1] for language, pattern in SCRIPT_PATTERNS.items()}
+    counts['latin'] = LATIN_PATTERN.subn('', text)[1]
+    return counts
+
+
+def detect_language(text: str, supported: Iterable[str], default: str = 'en') -> Tuple[str, float]:
+    """Return (language, confidence), classifying by script before falling back to langdetect"""
+    supported = set(supported)
+    counts = script_counts(text)
+    letters = sum(counts.values())
+    if not letters:
+        return default, 0.0
+
+    script, count = max(((language, counts[language]) for language in SCRIPT_PATTERNS), key=lambda item: item[1])
+    share = count / letters
+    if share >= SCRIPT_MAJORITY and script in supported:
+        return script, round(share, 4)
+
+    latin_languages = LATIN_LANGUAGES & supported
+    if counts['latin'] == letters and len(latin_languages) == 1:
+        return next(iter(latin_languages)), 1.0
+
+    # Mixed or ambiguous text: ask the seeded statistical model
+    if not _warmed:
+        warm_up()
+    try:
+        for candidate in detect_langs(text):
+            if candidate.lang in supported:
+                return candidate.lang, round(candidate.prob, 4)
+    except Exception as e:
+        logger.debug(f"langdetect failed: {str(e)}")
+    return default, 0.0
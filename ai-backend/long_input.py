@@ -0,0 +1,49 @@
+import re
+from typing import List
+
+# Words with their trailing whitespace, so chunks rejoin into the original text
+PIECE_PATTERN = re.compile(r'\S+\s*|\s+')
+# Prefer to end a chunk after a sentence or line break once it is this full
+SENTENCE_END_PATTERN = re.compile(r'[.!?।॥\n]\s*$')
+SENTENCE_BREAK_FILL = 0.8
+# Same ratio as scheduler.estimate_tokens: UTF-8 bytes per token
+BYTES_PER_TOKEN = 4
+
+
+def split_into_chunks(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """Split text into chunks of about chunk_tokens, each repeating the last overlap_tokens of the one before"""
+    chunk_bytes, overlap_bytes = chunk_tokens * BYTES_PER_TOKEN, overlap_tokens * BYTES_PER_TOKEN
+    pieces = []
+    for piece in PIECE_PATTERN.findall(text):
+        size = len(piece.encode('utf-8'))
+        if size <= chunk_bytes:
+            pieces.append((piece, size))
+            continue
+        # A run without whitespace (a pasted hash or blob) is cut by size instead
+        width = max(1, chunk_bytes * len(piece) // size)
+        pieces.extend((part, len(part.encode('utf-8'))) for part in
+                      (piece[i:i + width] for i in range(0, len(piece), width)))
+
+    chunks = []
+    current, current_bytes = [], 0
+    for piece, size in pieces:
+        at_sentence_break = bool(current) and (
+            current_bytes >= chunk_bytes * SENTENCE_BREAK_FILL
+            and SENTENCE_END_PATTERN.search(current[-1][0]) is not None
+        )
+        if current and (current_bytes + size > chunk_bytes or at_sentence_break):
+            chunks.append(''.join(part for part, _ in current).strip())
+            # Carry the tail of the finished chunk over so facts straddling the boundary stay intact
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                if overlap_size + previous[1] > overlap_bytes:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous[1]
+            current, current_bytes = overlap, overlap_size
+        current.append((piece, size))
+        current_bytes += size
+    text = ''.join(part for part, _ in current).strip()
+    if text:
+        chunks.append(text)
+    return chunks
@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of a thread parked on a lock, queue or socket
+WAIT_LEAVES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'), ('queue.py', 'get'),
+    ('selectors.py', 'select'), ('socket.py', 'accept'), ('socketserver.py', 'serve_forever'), ('thread.py', '_worker')
+}
+# Application frames that wait for work. A wait under any other application frame (a request waiting for its
+# sections or an admission slot) is time a request spends, not an idle thread.
+IDLE_WAITS = {('jobs.py', 'wait_for_work'), ('history.py', '_run'), ('profiler.py', '_listen')}
+# Pool threads are numbered; 'groq-section_3' and 'groq-section_7' fold into one flamegraph root
+THREAD_NUMBER = re.compile(r'[_-]\d+$')
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval and folds the samples into collapsed stacks
+    ('thread;outer;...;leaf count' lines), the input format of flamegraph.pl, speedscope and inferno"""
+
+    def __init__(self, app_root: str, interval_seconds: float = 0.01, include_idle: bool = False):
+        self.app_root = os.path.abspath(app_root) + os.sep
+        self.interval_seconds = interval_seconds
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._labels: Dict[object, str] = {}
+
+    def run(self, seconds: float):
+        """Sample from the calling thread for `seconds`; the calling thread itself is left out"""
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(THREAD_NUMBER.sub('', names.get(ident, f'thread-{ident}')), frame)
+            time.sleep(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _sample(self, thread_name: str, frame):
+        leaf = frame.f_code
+        labels, app_frame = [], None
+        while frame is not None:
+            code = frame.f_code
+            if app_frame is None and code.co_filename.startswith(self.app_root):
+                app_frame = (os.path.basename(code.co_filename), code.co_name)
+            labels.append(self._label(code))
+            frame = frame.f_back
+        self.samples += 1
+        waiting = (os.path.basename(leaf.co_filename), leaf.co_name) in WAIT_LEAVES
+        if waiting and (app_frame is None or app_frame in IDLE_WAITS):
+            self.idle_samples += 1
+            if not self.include_idle:
+                return
+        labels.append(thread_name)
+        self.stacks[';'.join(reversed(labels))] += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # ';' separates frames in the collapsed format; the count follows the last space
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+            self._labels[code] = label
+        return label
+
+
+class ProfileExchange:
+    """Lets the worker serving /admin/profile sample every worker on the host: workers announce themselves in a
+    shared SQLite file, and each one's listener thread answers the profile requests the others post there"""
+
+    # Requests and results older than this are purged whenever a new profile is requested
+    RETENTION_SECONDS = 3600
+
+    def __init__(self, db_path: str, poll_seconds: float = 1.0):
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('CREATE TABLE IF NOT EXISTS profile_workers (pid INTEGER PRIMARY KEY, seen_at REAL NOT NULL)')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS profile_requests (id TEXT PRIMARY KEY, pid INTEGER NOT NULL, '
+            'seconds REAL NOT NULL, interval_seconds REAL NOT NULL, include_idle INTEGER NOT NULL, created_at REAL NOT NULL)'
+        )
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS profile_results (request_id TEXT NOT NULL, pid INTEGER NOT NULL, '
+            'stacks TEXT NOT NULL, samples INTEGER NOT NULL, idle_samples INTEGER NOT NULL, created_at REAL NOT NULL, '
+            'PRIMARY KEY (request_id, pid))'
+        )
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection in a forked worker, which also has a pid of its own"""
+        with self._lock:
+            self._db = self._connect()
+            self.pid = os.getpid()
+
+    def start(self, profile: Callable[[float, float, bool], Optional[SamplingProfiler]]):
+        """Answer other workers' requests with `profile(seconds, interval_seconds, include_idle)`, which returns
+        None when this worker is already busy profiling"""
+        if self._listener is not None:
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self._listener = threading.Thread(target=self._listen, args=(profile,), name='profile-listener', daemon=True)
+        self._listener.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout)
+            self._listener = None
+
+    def live_workers(self) -> List[int]:
+        """Other workers whose listener has checked in within the last few polls"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT pid FROM profile_workers WHERE pid != ? AND seen_at > ? ORDER BY pid',
+                (self.pid, time.time() - 3 * self.poll_seconds)
+            ).fetchall()
+        return [row['pid'] for row in rows]
+
+    def request(self, seconds: float, interval_seconds: float, include_idle: bool) -> str:
+        request_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute('DELETE FROM profile_requests WHERE created_at < ?', (now - self.RETENTION_SECONDS,))
+            self._db.execute('DELETE FROM profile_results WHERE created_at < ?', (now - self.RETENTION_SECONDS,))
+            self._db.execute(
+                'INSERT INTO profile_requests (id, pid, seconds, interval_seconds, include_idle, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (request_id, self.pid, seconds, interval_seconds, int(include_idle), now)
+            )
+        return request_id
+
+    def results(self, request_id: str, pids: List[int], timeout: float) -> Dict[int, Tuple[Counter, int, int]]:
+        """(stacks, samples, idle samples) by pid for the workers that answered within timeout; a worker that was
+        busy with another profile never answers"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    'SELECT pid, stacks, samples, idle_samples FROM profile_results WHERE request_id = ? AND samples >= 0',
+                    (request_id,)
+                ).fetchall()
+            answered = {
+                row['pid']: (Counter(json.loads(row['stacks'])), row['samples'], row['idle_samples'])
+                for row in rows if row['pid'] in pids
+            }
+            if len(answered) == len(pids) or time.monotonic() >= deadline:
+                return answered
+            time.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+
+    def _listen(self, profile: Callable[[float, float, bool], Optional[SamplingProfiler]]):
+        while not self._stop.is_set():
+            try:
+                for row in self._pending():
+                    answer = threading.Thread(target=self._answer, args=(profile, row), name='profile-answer', daemon=True)
+                    answer.start()
+            except sqlite3.Error as e:
+                logger.warning(f"Profile listener poll failed: {str(e)}")
+            self._stop.wait(self.poll_seconds)
+
+    def _pending(self) -> List[sqlite3.Row]:
+        """Check in, then claim the requests of other workers that are still running and that this worker has not
+        answered; a placeholder result marks a request as taken"""
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO profile_workers (pid, seen_at) VALUES (?, ?)', (self.pid, now))
+            rows = self._db.execute(
+                'SELECT * FROM profile_requests WHERE pid != ? AND created_at >= ? AND created_at + seconds > ? '
+                'AND id NOT IN (SELECT request_id FROM profile_results WHERE pid = ?)',
+                (self.pid, self._started_at, now, self.pid)
+            ).fetchall()
+            for row in rows:
+                self._db.execute(
+                    'INSERT OR IGNORE INTO profile_results (request_id, pid, stacks, samples, idle_samples, created_at) '
+                    "VALUES (?, ?, '{}', -1, 0, ?)",
+                    (row['id'], self.pid, now)
+                )
+        return rows
+
+    def _answer(self, profile: Callable[[float, float, bool], Optional[SamplingProfiler]], row: sqlite3.Row):
+        """Sample for what is left of the request's window, so every worker covers the same stretch of traffic"""
+        remaining = row['created_at'] + row['seconds'] - time.time()
+        profiler = profile(remaining, row['interval_seconds'], bool(row['include_idle'])) if remaining > 0 else None
+        if profiler is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    'UPDATE profile_results SET stacks = ?, samples = ?, idle_samples = ? WHERE request_id = ? AND pid = ?',
+                    (json.dumps(dict(profiler.stacks), ensure_ascii=False), profiler.samples, profiler.idle_samples,
+                     row['id'], self.pid)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Profile result write failed: {str(e)}")
@@ -0,0 +1,261 @@
+import re
+import time
+import zlib
+import codecs
+import base64
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# kubo's `ipfs add --cid-version=1` defaults: 256 KiB raw leaves under a balanced UnixFS tree of 174 links per node
+DEFAULT_CHUNK_BYTES = 262144
+DEFAULT_DAG_WIDTH = 174
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+UNIXFS_FILE = 2
+
+TEXT_TYPES = ('text/', 'application/json', 'application/xml', 'application/csv')
+
+
+def varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def cid_bytes(codec: int, block: bytes) -> bytes:
+    """Binary CIDv1 of a block with a sha2-256 multihash"""
+    return varint(1) + varint(codec) + bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+
+
+def cid_string(cid: bytes) -> str:
+    """Multibase base32 (the 'b...' form IPFS prints for CIDv1)"""
+    return 'b' + base64.b32encode(cid).decode('ascii').lower().rstrip('=')
+
+
+def protobuf_bytes(field: int, value: bytes) -> bytes:
+    return varint(field << 3 | 2) + varint(len(value)) + value
+
+
+def protobuf_varint(field: int, value: int) -> bytes:
+    return varint(field << 3) + varint(value)
+
+
+class CIDBuilder:
+    """Incremental IPFS CIDv1 of a file: raw leaves folded into a balanced dag-pb tree as the data streams in.
+    Memory stays at one chunk plus at most `width` pending links per tree level."""
+
+    def __init__(self, chunk_bytes: int = DEFAULT_CHUNK_BYTES, width: int = DEFAULT_DAG_WIDTH):
+        self.chunk_bytes = chunk_bytes
+        self.width = width
+        self.size = 0
+        self._buffer = bytearray()
+        # levels[0] holds leaves; each entry is (cid, tsize, filesize)
+        self._levels: List[List[Tuple[bytes, int, int]]] = [[]]
+
+    def update(self, data: bytes):
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_bytes:
+            self._add_leaf(bytes(self._buffer[:self.chunk_bytes]))
+            del self._buffer[:self.chunk_bytes]
+
+    def finish(self) -> str:
+        if self._buffer or not self._levels[0]:
+            self._add_leaf(bytes(self._buffer))
+            self._buffer.clear()
+        level = 0
+        while True:
+            entries = self._levels[level]
+            higher = any(self._levels[level + 1:])
+            if len(entries) == 1 and not higher:
+                return cid_string(entries[0][0])
+            if entries:
+                self._levels[level] = []
+                self._push(level + 1, self._node(entries))
+            level += 1
+
+    def _add_leaf(self, chunk: bytes):
+        self._push(0, (cid_bytes(CODEC_RAW, chunk), len(chunk), len(chunk)))
+
+    def _push(self, level: int, entry: Tuple[bytes, int, int]):
+        """Append to a level, first folding a full level into a parent node one level up"""
+        if level == len(self._levels):
+            self._levels.append([])
+        if len(self._levels[level]) == self.width:
+            full, self._levels[level] = self._levels[level], []
+            self._push(level + 1, self._node(full))
+        self._levels[level].append(entry)
+
+    def _node(self, children: List[Tuple[bytes, int, int]]) -> Tuple[bytes, int, int]:
+        """Encode a UnixFS file node over the children; dag-pb puts Links (field 2) before Data (field 1)"""
+        filesize = sum(child[2] for child in children)
+        unixfs = protobuf_varint(1, UNIXFS_FILE) + protobuf_varint(3, filesize)
+        unixfs += b''.join(protobuf_varint(4, child[2]) for child in children)
+        links = b''.join(
+            protobuf_bytes(2, protobuf_bytes(1, cid) + protobuf_bytes(2, b'') + protobuf_varint(3, tsize))
+            for cid, tsize, _ in children
+        )
+        block = links + protobuf_bytes(1, unixfs)
+        return cid_bytes(CODEC_DAG_PB, block), len(block) + sum(child[1] for child in children), filesize
+
+
+PDF_TEXT_PATTERN = re.compile(rb'\((?:\\.|[^\\)])*\)\s*(?:Tj|\'|")|\[(?:[^\]\\]|\\.)*\]\s*TJ', re.S)
+PDF_STRING_PATTERN = re.compile(rb'\(((?:\\.|[^\\)])*)\)', re.S)
+PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+
+def pdf_string(raw: bytes) -> str:
+    """Decode a PDF literal string's escapes; font encodings beyond Latin-1 are not resolved"""
+    def unescape(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xff])
+        return PDF_ESCAPES.get(escaped, escaped)
+    return re.sub(rb'\\([0-7]{1,3}|.)', unescape, raw, flags=re.S).decode('latin-1')
+
+
+class TextExtractor:
+    """Pull analysable text out of a proof as it streams: plain text directly, PDFs from their Flate content streams"""
+
+    # Bytes kept across reads so a keyword or stream dictionary split between two chunks is still seen
+    OVERLAP = 1024
+
+    def __init__(self, content_type: str, max_chars: int = 20000):
+        self.max_chars = max_chars
+        self.kind = 'text' if content_type.startswith(TEXT_TYPES) else 'pdf' if content_type == 'application/pdf' else None
+        self._parts: List[str] = []
+        self._chars = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._pending = b''
+        self._in_stream = False
+        self._inflater = None
+        self._content = b''
+
+    @property
+    def done(self) -> bool:
+        return self.kind is None or self._chars >= self.max_chars
+
+    def update(self, data: bytes):
+        if self.done:
+            return
+        if self.kind == 'text':
+            self._add(self._decoder.decode(data))
+        else:
+            self._scan_pdf(self._pending + data)
+
+    def text(self) -> str:
+        return ''.join(self._parts)[:self.max_chars].strip()
+
+    def _add(self, text: str):
+        if self.kind == 'pdf':
+            text = ' '.join(text.split()) + ' '
+        if text.strip():
+            self._parts.append(text)
+            self._chars += len(text)
+
+    def _scan_pdf(self, data: bytes):
+        self._pending = b''
+        while data and not self.done:
+            if not self._in_stream:
+                start = data.find(b'stream')
+                if start < 0 or len(data) < start + 8:
+                    self._pending = data[-self.OVERLAP:]
+                    return
+                dictionary = data[max(0, start - self.OVERLAP):start]
+                # From this object's 'N 0 obj' header (or the whole window when it is further back)
+                dictionary = dictionary[dictionary.rfind(b'obj') + 1:]
+                # Only Flate-compressed page content carries text; images and embedded fonts are skipped
+                wanted = b'/FlateDecode' in dictionary and not any(
+                    marker in dictionary for marker in (b'/Image', b'/FontFile', b'/Length1')
+                )
+                self._inflater = zlib.decompressobj() if wanted else None
+                self._content = b''
+                self._in_stream = True
+                data = data[start + (8 if data[start + 6:start + 8] == b'\r\n' else 7):]
+                continue
+            end = data.find(b'endstream')
+            if end < 0:
+                # 'endstream' may straddle this read and the next, so hold back its length
+                self._inflate(data[:-9])
+                self._pending = data[-9:]
+                return
+            self._inflate(data[:end])
+            self._in_stream = False
+            data = data[end + 9:]
+
+    def _inflate(self, segment: bytes):
+        if self._inflater is None or not segment:
+            return
+        try:
+            content = self._content + self._inflater.decompress(segment, 1 << 20)
+        except zlib.error:
+            self._inflater = None
+            return
+        consumed = 0
+        for operation in PDF_TEXT_PATTERN.finditer(content):
+            self._add(' '.join(pdf_string(raw) for raw in PDF_STRING_PATTERN.findall(operation.group(0))))
+            consumed = operation.end()
+        # An operation may be cut off at the end of this output; keep the unmatched tail for the next one
+        self._content = content[consumed:][-4096:]
+
+
+class ProofIndex:
+    """Local CID index: one row per distinct proof, so re-uploads of the same content are recognised"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.counters = {'ingested': 0, 'duplicates': 0}
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS proofs ('
+            'cid TEXT PRIMARY KEY, size INTEGER NOT NULL, content_type TEXT, filename TEXT, issue_id TEXT, '
+            'wallet TEXT, text TEXT, created_at REAL NOT NULL)'
+        )
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection, e.g. in a worker forked from a process that already had one"""
+        with self._lock:
+            self._db = self._connect()
+
+    def get(self, cid: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM proofs WHERE cid = ?', (cid,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def add(self, cid: str, size: int, content_type: str, filename: Optional[str], issue_id: Optional[str],
+            wallet: Optional[str], text: str) -> bool:
+        """Record a proof; False when the CID was already indexed (the first upload wins)"""
+        with self._lock:
+            inserted = self._db.execute(
+                'INSERT OR IGNORE INTO proofs (cid, size, content_type, filename, issue_id, wallet, text, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (cid, size, content_type, filename, issue_id, wallet, text, time.time())
+            ).rowcount == 1
+            self.counters['ingested' if inserted else 'duplicates'] += 1
+        return inserted
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stored = self._db.execute('SELECT COUNT(*) FROM proofs').fetchone()[0]
+        return {**self.counters, 'proofs': stored}
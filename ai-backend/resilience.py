@@ -0,0 +1,189 @@
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Groq while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probing state"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            'opened': 0,
+            'short_circuited': 0,
+            'failures': 0,
+            'successes': 0
+        }
+
+    def is_open(self) -> bool:
+        """True while calls should skip Groq entirely (does not take a probe slot)"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_seconds:
+                self.counters['short_circuited'] += 1
+                return True
+            return False
+
+    def recovering(self) -> bool:
+        """True when the next call would be a half-open probe, so callers about to fan out should send one call
+        first: with a single probe slot, the rest would be short-circuited even though Groq is back"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at >= self.reset_seconds
+            return self.state == self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Decide whether a call may go upstream, taking a probe slot when half-open"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    self.counters['short_circuited'] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info("Circuit breaker half-open, probing Groq")
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.counters['short_circuited'] += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.counters['successes'] += 1
+            self._failures = 0
+            if self.state == self.HALF_OPEN:
+                logger.info("Circuit breaker closed, Groq recovered")
+                self.state = self.CLOSED
+                self._probes_in_flight = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.counters['failures'] += 1
+            self._failures += 1
+            # Late failures of calls sent before the circuit opened do not extend the outage
+            if self.state != self.OPEN and (self.state == self.HALF_OPEN or self._failures >= self.failure_threshold):
+                self.counters['opened'] += 1
+                logger.warning(f"Circuit breaker open for {self.reset_seconds:.0f}s after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes_in_flight = 0
+
+    def record_ignored(self):
+        """Release a probe slot for a call whose outcome says nothing about Groq's health"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+            return {
+                **self.counters,
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_in_seconds': round(retry_in, 2)
+            }
+
+
+class Hedger:
+    """Fire a second attempt when the first is slower than the recent latency percentile"""
+
+    def __init__(self, percentile: float = 95, min_delay_seconds: float = 0.2, max_hedge_ratio: float = 0.1,
+                 window: int = 200, min_samples: int = 20, max_workers: int = 8):
+        self.percentile = percentile
+        self.min_delay_seconds = min_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='groq-hedge')
+        self.counters = {
+            'calls': 0,
+            'hedged': 0,
+            'hedge_wins': 0
+        }
+
+    def delay(self):
+        """Current hedge delay in seconds, or None until enough latencies are observed"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            return max(self.min_delay_seconds, ordered[index])
+
+    def run(self, attempt: Callable):
+        """Run attempt(), hedging with a second attempt if the first is slow"""
+        with self._lock:
+            self.counters['calls'] += 1
+            budget_left = self.counters['hedged'] < self.counters['calls'] * self.max_hedge_ratio
+        delay = self.delay()
+        if delay is None or not budget_left:
+            return self._timed(attempt)
+
+        primary = self._executor.submit(contextvars.copy_context().run, self._timed, attempt)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.counters['hedged'] += 1
+        hedge = self._executor.submit(contextvars.copy_context().run, self._timed, attempt)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        self.counters['hedge_wins'] += 1
+                return result
+        raise error
+
+    def stats(self) -> Dict:
+        delay = self.delay()
+        with self._lock:
+            hedged = self.counters['hedged']
+            return {
+                **self.counters,
+                'hedge_win_rate': round(self.counters['hedge_wins'] / hedged, 4) if hedged else 0.0,
+                'delay_ms': round(delay * 1000) if delay is not None else None,
+                'samples': len(self._latencies)
+            }
+
+    def _timed(self, attempt: Callable):
+        started = time.monotonic()
+        result = attempt()
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return result
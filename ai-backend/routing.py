@@ -0,0 +1,144 @@
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+QUALITY_LEVELS = ('fast', 'balanced', 'high')
+
+# Prompt tokens are processed far faster than completion tokens are generated
+PROMPT_TOKEN_WEIGHT = 0.1
+
+# (seconds of overhead, seconds per weighted token) used until a model has enough samples
+DEFAULT_PRIOR = (0.5, 0.004)
+MODEL_PRIORS = {
+    'llama3-8b-8192': (0.3, 0.0015),
+    'llama3-70b-8192': (0.45, 0.004),
+    'mixtral-8x7b-32768': (0.4, 0.002),
+    'gemma-7b-it': (0.3, 0.0015)
+}
+MIN_SAMPLES = 8
+
+
+@dataclass
+class RouteOptions:
+    """Per-request routing preferences plus the decisions made under them"""
+    budget_seconds: Optional[float]
+    quality: str
+    calls: List[Dict] = field(default_factory=list)
+
+
+_route = contextvars.ContextVar('model_route', default=None)
+
+
+@contextmanager
+def routing_options(latency_budget_ms: Optional[float] = None, quality: Optional[str] = None):
+    """Route Groq calls made in this block (and pools submitted to from it) under these preferences"""
+    options = RouteOptions(
+        budget_seconds=latency_budget_ms / 1000 if latency_budget_ms else None,
+        quality=quality or 'balanced'
+    )
+    token = _route.set(options)
+    try:
+        yield options
+    finally:
+        _route.reset(token)
+
+
+def current_route() -> Optional[RouteOptions]:
+    return _route.get()
+
+
+def weighted_tokens(prompt_tokens: int, completion_tokens: int) -> float:
+    return completion_tokens + prompt_tokens * PROMPT_TOKEN_WEIGHT
+
+
+class LatencyModel:
+    """Rolling least-squares fit of latency = overhead + per_token * weighted tokens for one model"""
+
+    def __init__(self, prior: Tuple[float, float], window: int = 64):
+        self.prior = prior
+        self.samples = deque(maxlen=window)
+
+    def observe(self, tokens: float, seconds: float):
+        self.samples.append((tokens, seconds))
+
+    def coefficients(self) -> Tuple[float, float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return self.prior
+        n = len(self.samples)
+        mean_x = sum(x for x, _ in self.samples) / n
+        mean_y = sum(y for _, y in self.samples) / n
+        spread = sum((x - mean_x) ** 2 for x, _ in self.samples)
+        if spread <= 0:
+            # Identical token counts: only the mean latency is known, so keep the prior's slope where it fits
+            slope = min(self.prior[1], mean_y / mean_x) if mean_x else 0.0
+        else:
+            slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in self.samples) / spread)
+        return max(0.0, mean_y - slope * mean_x), slope
+
+    def predict(self, tokens: float) -> float:
+        overhead, per_token = self.coefficients()
+        return overhead + per_token * tokens
+
+
+class ModelRouter:
+    """Pick a Groq model per call from quality preference, latency budget and live latency estimates"""
+
+    def __init__(self, models: List[str], default_model: str, window: int = 64):
+        # Ordered from fastest to highest quality
+        self.models = models if default_model in models else [default_model, *models]
+        self.default_model = default_model
+        self._lock = threading.Lock()
+        self._latency = {model: LatencyModel(MODEL_PRIORS.get(model, DEFAULT_PRIOR), window) for model in self.models}
+        self.counters = {'routed': 0, 'downgraded': 0, 'budget_missed': 0}
+        self._chosen = {model: 0 for model in self.models}
+
+    def preferred_index(self, quality: str) -> int:
+        if quality == 'fast':
+            return 0
+        if quality == 'high':
+            return len(self.models) - 1
+        return self.models.index(self.default_model)
+
+    def choose(self, prompt_tokens: int, max_tokens: int, budget_seconds: Optional[float],
+               quality: str = 'balanced') -> Tuple[str, float, bool]:
+        """Return (model, predicted seconds, downgraded), stepping toward faster models until the budget fits"""
+        tokens = weighted_tokens(prompt_tokens, max_tokens)
+        start = self.preferred_index(quality)
+        with self._lock:
+            chosen, predicted = None, 0.0
+            for index in range(start, -1, -1):
+                model = self.models[index]
+                predicted = self._latency[model].predict(tokens)
+                chosen = model
+                if budget_seconds is None or predicted <= budget_seconds:
+                    break
+            else:
+                # Nothing fits: the fastest model is the best we can do
+                self.counters['budget_missed'] += 1
+            downgraded = chosen != self.models[start]
+            self.counters['routed'] += 1
+            self.counters['downgraded'] += int(downgraded)
+            self._chosen[chosen] += 1
+        return chosen, predicted, downgraded
+
+    def observe(self, model: str, prompt_tokens: int, completion_tokens: int, seconds: float):
+        with self._lock:
+            latency = self._latency.get(model)
+            if latency is not None:
+                latency.observe(weighted_tokens(prompt_tokens, completion_tokens), seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            models = {}
+            for model, latency in self._latency.items():
+                overhead, per_token = latency.coefficients()
+                models[model] = {
+                    'samples': len(latency.samples),
+                    'overhead_ms': round(overhead * 1000, 1),
+                    'ms_per_token': round(per_token * 1000, 3),
+                    'chosen': self._chosen[model]
+                }
+            return {**self.counters, 'default_model': self.default_model, 'models': models}
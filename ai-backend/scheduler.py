@@ -0,0 +1,353 @@
+import re
+import json
+import heapq
+import time
+import hashlib
+import logging
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from resilience import CircuitOpenError
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are admitted first
+PRIORITY_ANALYZE = 0
+PRIORITY_CHAT = 1
+PRIORITY_BATCH = 2
+
+_priority = contextvars.ContextVar('groq_priority', default=PRIORITY_ANALYZE)
+
+
+@contextmanager
+def request_priority(level: int):
+    """Run Groq calls made in this block (and pools submitted to from it) at the given priority"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def submit_with_context(executor, fn: Callable, *args, **kwargs):
+    """Submit to a thread pool while keeping the caller's context (request priority)"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; UTF-8 bytes keep the estimate conservative for Indic scripts"""
+    return len(text.encode('utf-8')) // 4 + 1
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset headers such as '7.66s', '2m59.56s' or '120ms' into seconds"""
+    if not value:
+        return None
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        total += float(amount) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
+    if not matched:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return total
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be admitted before its wait limit"""
+
+
+class TokenBucket:
+    """Continuously refilling token bucket; not thread-safe on its own"""
+
+    def __init__(self, capacity: float, period_seconds: float = 60.0):
+        self.capacity = float(capacity)
+        self.period_seconds = period_seconds
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period_seconds
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` is available (amounts above capacity only need a full bucket)"""
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.refill_rate) if self.refill_rate else float('inf')
+
+    def consume(self, amount: float):
+        self.level -= amount
+
+    def clamp(self, remaining: float):
+        """Never believe we have more budget than the provider reports"""
+        self.level = min(self.level, remaining)
+
+    def resize(self, capacity: float):
+        if capacity > 0 and capacity != self.capacity:
+            self.capacity = float(capacity)
+            self.level = min(self.level, self.capacity)
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so only the first one does the work"""
+
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls: Dict[str, 'SingleFlight._Call'] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable):
+        """Return (result, shared) where shared is True when another caller did the work"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class MonitoredStream:
+    """A streamed completion whose outcome reaches the circuit breaker when the stream ends, not when it opens:
+    errors while reading chunks count against Groq, and a stream read to the end or closed early counts as a success"""
+
+    def __init__(self, stream, breaker, is_failure: Callable[[Exception], bool]):
+        self._stream = stream
+        self._breaker = breaker
+        self._is_failure = is_failure
+        self._recorded = False
+        self.response = stream.response
+
+    def __iter__(self):
+        error = None
+        try:
+            yield from self._stream
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record(error)
+
+    def _record(self, error: Optional[Exception]):
+        if self._recorded:
+            return
+        self._recorded = True
+        if error is None:
+            self._breaker.record_success()
+        elif self._is_failure(error):
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_ignored()
+
+
+class GroqScheduler:
+    """Single admission point for Groq chat completions
+
+    Calls wait in a priority queue until both the requests-per-minute and
+    tokens-per-minute buckets can cover them. Rate-limit headers on each
+    response tighten the buckets, a 429 pauses admission for its retry-after,
+    and identical non-streaming calls in flight share one upstream request.
+    An optional circuit breaker and hedger wrap each upstream send.
+    """
+
+    def __init__(self, client, rpm: int = 30, tpm: int = 30000, max_wait_seconds: float = 10.0,
+                 coalesce: bool = True, breaker=None, hedger=None):
+        self.client = client
+        self.breaker = breaker
+        self.hedger = hedger
+        self.max_wait_seconds = max_wait_seconds
+        self.coalesce = coalesce
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.flights = SingleFlight()
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.counters = {
+            'admitted': 0,
+            'rejected': 0,
+            'rate_limited': 0,
+            'wait_seconds_total': 0.0
+        }
+
+    def create(self, **params):
+        """Drop-in replacement for client.chat.completions.create"""
+        prompt_text = ''.join(message.get('content', '') for message in params.get('messages', []))
+        estimated = estimate_tokens(prompt_text) + int(params.get('max_tokens') or 0)
+
+        if self.coalesce and not params.get('stream'):
+            key_params = {k: v for k, v in params.items() if k != 'timeout'}
+            key = hashlib.sha256(json.dumps(key_params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+            response, _ = self.flights.do(key, lambda: self._send(params, estimated))
+            return response
+        return self._send(params, estimated)
+
+    def acquire(self, estimated_tokens: int, priority: Optional[int] = None):
+        """Block until this call is at the head of the queue and both buckets can cover it"""
+        priority = _priority.get() if priority is None else priority
+        entry = (priority, next(self._seq))
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    wait_for = max(
+                        self._paused_until - now,
+                        self.requests.time_until(1),
+                        self.tokens.time_until(estimated_tokens)
+                    )
+                    if self._queue[0] == entry and wait_for <= 0:
+                        heapq.heappop(self._queue)
+                        self.requests.consume(1)
+                        self.tokens.consume(estimated_tokens)
+                        self.counters['admitted'] += 1
+                        self.counters['wait_seconds_total'] += now - started
+                        return
+                    if now >= deadline:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self.counters['rejected'] += 1
+                        raise RateLimitExceeded(f"not admitted within {self.max_wait_seconds:.1f}s")
+                    # Waiters behind the head poll at the head's pace; head changes notify everyone
+                    self._cond.wait(timeout=min(max(wait_for, 0.01), deadline - now))
+            finally:
+                self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Bucket levels and counters, for the health endpoint"""
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                **self.counters,
+                'coalesced': self.flights.coalesced,
+                'queued': len(self._queue),
+                'requests_available': round(self.requests.level, 2),
+                'requests_per_minute': self.requests.capacity,
+                'tokens_available': round(self.tokens.level),
+                'tokens_per_minute': self.tokens.capacity,
+                'paused_for_seconds': round(max(0.0, self._paused_until - now), 2)
+            }
+
+    def _send(self, params: Dict, estimated: int):
+        """Send upstream through the circuit breaker, hedging non-streaming calls; a stream's outcome is recorded
+        once it has been read"""
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError("Groq circuit breaker is open")
+        try:
+            if self.hedger is not None and not params.get('stream'):
+                completion = self.hedger.run(lambda: self._dispatch(params, estimated))
+            else:
+                completion = self._dispatch(params, estimated)
+        except Exception as e:
+            if self.breaker is not None:
+                if self._is_upstream_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_ignored()
+            raise
+        if self.breaker is not None:
+            if params.get('stream'):
+                return MonitoredStream(completion, self.breaker, self._is_upstream_failure)
+            self.breaker.record_success()
+        return completion
+
+    def _is_upstream_failure(self, error: Exception) -> bool:
+        """Timeouts, connection errors and 5xx count against Groq. Our own rejections, bad requests and 429s do not:
+        a 429 is quota pressure, which the scheduler already handles by pausing admission for its retry-after."""
+        if isinstance(error, RateLimitExceeded):
+            return False
+        status_code = getattr(error, 'status_code', None)
+        return status_code is None or status_code >= 500
+
+    def _dispatch(self, params: Dict, estimated: int):
+        with span('groq_queue'):
+            self.acquire(estimated)
+        try:
+            raw = self.client.chat.completions.with_raw_response.create(**params)
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if getattr(e, 'status_code', None) == 429 and response is not None:
+                self._observe_headers(response.headers, rate_limited=True)
+            raise
+        self._observe_headers(raw.headers)
+        completion = raw.parse()
+
+        # Give back (or take) the difference between our estimate and what was actually used
+        usage = getattr(completion, 'usage', None)
+        if usage is not None and getattr(usage, 'total_tokens', None) is not None:
+            with self._cond:
+                self.tokens.consume(usage.total_tokens - estimated)
+        return completion
+
+    def _observe_headers(self, headers, rate_limited: bool = False):
+        """Adapt the buckets to the provider's view of our remaining budget"""
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        with self._cond:
+            now = time.monotonic()
+            limit_tokens = number('x-ratelimit-limit-tokens')
+            if limit_tokens:
+                self.tokens.resize(limit_tokens)
+            remaining_tokens = number('x-ratelimit-remaining-tokens')
+            if remaining_tokens is not None:
+                self.tokens.refill(now)
+                self.tokens.clamp(remaining_tokens)
+            remaining_requests = number('x-ratelimit-remaining-requests')
+            if remaining_requests is not None:
+                self.requests.refill(now)
+                self.requests.clamp(remaining_requests)
+
+            if rate_limited:
+                self.counters['rate_limited'] += 1
+                retry_after = number('retry-after')
+                if retry_after is None:
+                    retry_after = parse_reset_duration(headers.get('x-ratelimit-reset-tokens')) or 1.0
+                self._paused_until = max(self._paused_until, now + retry_after)
+                logger.warning(f"Groq rate limited, pausing admission for {retry_after:.2f}s")
+            self._cond.notify_all()
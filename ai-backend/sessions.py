@@ -0,0 +1,250 @@
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatSession:
+    """One conversation: the issue under discussion, its analysis and the recent turns"""
+    session_id: str
+    language: str
+    subject: str = ''
+    analysis: Optional[Dict] = None
+    # Older turns condensed into a few lines once the history grows past max_turns
+    summary: str = ''
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    last_active: float = field(default_factory=time.time)
+    compacting: bool = False
+
+    def history_bytes(self) -> int:
+        return len(self.summary.encode('utf-8')) + sum(len(turn['content'].encode('utf-8')) for turn in self.turns)
+
+
+class SessionStore:
+    """Chat sessions in a SQLite file shared by every worker process, with idle expiry, a bound on the number
+    of sessions and a per-session cap on history size"""
+
+    # A compaction claimed by a worker that died is given up after this long
+    COMPACTION_CLAIM_SECONDS = 120
+
+    def __init__(self, db_path: str, max_sessions: int = 1000, idle_seconds: float = 1800, max_turns: int = 12,
+                 keep_turns: int = 4, max_bytes: int = 16384):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_turns = max_turns
+        self.keep_turns = keep_turns
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.counters = {'created': 0, 'expired': 0, 'evicted': 0, 'compactions': 0, 'turns_dropped': 0, 'errors': 0}
+
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        # WAL lets every gunicorn worker read sessions while another appends a turn
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        # turns holds [{'seq', 'role', 'content'}]; seq numbers let a compaction remove exactly the turns it claimed
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS chat_sessions ('
+            "id TEXT PRIMARY KEY, language TEXT NOT NULL, subject TEXT NOT NULL DEFAULT '', analysis TEXT, "
+            "summary TEXT NOT NULL DEFAULT '', turns TEXT NOT NULL DEFAULT '[]', next_seq INTEGER NOT NULL DEFAULT 0, "
+            'compacting_through INTEGER, compacting_since REAL, last_active REAL NOT NULL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS chat_sessions_active ON chat_sessions (last_active)')
+        return db
+
+    def reconnect(self):
+        """Open a fresh SQLite connection, e.g. in a worker forked from a process that already had one"""
+        with self._lock:
+            self._db = self._connect()
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """A snapshot of a live session, or None when it is unknown or has idled out"""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute('SELECT * FROM chat_sessions WHERE id = ?', (session_id,)).fetchone()
+                if row is None:
+                    return None
+                if now - row['last_active'] >= self.idle_seconds:
+                    self._db.execute('DELETE FROM chat_sessions WHERE id = ?', (session_id,))
+                    self.counters['expired'] += 1
+                    return None
+                self._db.execute('UPDATE chat_sessions SET last_active = ? WHERE id = ?', (now, session_id))
+            except sqlite3.Error as e:
+                logger.warning(f"Chat session read failed: {str(e)}")
+                self.counters['errors'] += 1
+                return None
+        return ChatSession(
+            session_id=row['id'],
+            language=row['language'],
+            subject=row['subject'],
+            analysis=json.loads(row['analysis']) if row['analysis'] else None,
+            summary=row['summary'],
+            turns=[{'role': turn['role'], 'content': turn['content']} for turn in json.loads(row['turns'])],
+            last_active=now,
+            compacting=self._compacting(row, now)
+        )
+
+    def create(self, language: str) -> ChatSession:
+        session = ChatSession(session_id=uuid.uuid4().hex, language=language)
+        with self._lock:
+            try:
+                self._db.execute(
+                    'INSERT INTO chat_sessions (id, language, last_active) VALUES (?, ?, ?)',
+                    (session.session_id, language, session.last_active)
+                )
+                self.counters['created'] += 1
+                self._purge(session.last_active)
+            except sqlite3.Error as e:
+                logger.warning(f"Chat session write failed: {str(e)}")
+                self.counters['errors'] += 1
+        return session
+
+    def set_analysis(self, session_id: str, subject: str, analysis: Dict, language: str):
+        """Start discussing a new issue; the previous conversation no longer applies"""
+        with self._lock:
+            try:
+                self._db.execute(
+                    "UPDATE chat_sessions SET subject = ?, analysis = ?, language = ?, summary = '', turns = '[]', "
+                    'last_active = ? WHERE id = ?',
+                    (self._clip(subject), json.dumps(analysis, ensure_ascii=False), language, time.time(), session_id)
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Chat session write failed: {str(e)}")
+                self.counters['errors'] += 1
+
+    def add_turns(self, session_id: str, *turns: Tuple[str, str]) -> bool:
+        """Append (role, content) turns; returns True when the older turns should be compacted"""
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute('BEGIN IMMEDIATE')
+                row = self._db.execute('SELECT * FROM chat_sessions WHERE id = ?', (session_id,)).fetchone()
+                if row is None:
+                    self._db.execute('COMMIT')
+                    return False
+                stored, seq = json.loads(row['turns']), row['next_seq']
+                for role, content in turns:
+                    stored.append({'seq': seq, 'role': role, 'content': self._clip(content)})
+                    seq += 1
+                # Hard cap: compaction normally keeps the history well below this
+                summary_bytes = len(row['summary'].encode('utf-8'))
+                while stored and summary_bytes + sum(len(turn['content'].encode('utf-8')) for turn in stored) > self.max_bytes:
+                    stored.pop(0)
+                    self.counters['turns_dropped'] += 1
+                self._db.execute(
+                    'UPDATE chat_sessions SET turns = ?, next_seq = ?, last_active = ? WHERE id = ?',
+                    (json.dumps(stored, ensure_ascii=False), seq, now, session_id)
+                )
+                self._db.execute('COMMIT')
+            except sqlite3.Error as e:
+                self._rollback(e)
+                return False
+        return len(stored) > self.max_turns and not self._compacting(row, now)
+
+    def begin_compaction(self, session_id: str) -> Optional[Tuple[str, List[Dict[str, str]], str]]:
+        """Claim a session's older turns for compaction, returning (current summary, turns to fold in, language)"""
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute('BEGIN IMMEDIATE')
+                row = self._db.execute('SELECT * FROM chat_sessions WHERE id = ?', (session_id,)).fetchone()
+                stored = json.loads(row['turns']) if row is not None else []
+                if row is None or self._compacting(row, now) or len(stored) <= self.keep_turns:
+                    self._db.execute('COMMIT')
+                    return None
+                claimed = stored[:len(stored) - self.keep_turns]
+                self._db.execute(
+                    'UPDATE chat_sessions SET compacting_through = ?, compacting_since = ? WHERE id = ?',
+                    (claimed[-1]['seq'], now, session_id)
+                )
+                self._db.execute('COMMIT')
+            except sqlite3.Error as e:
+                self._rollback(e)
+                return None
+        return row['summary'], [{'role': turn['role'], 'content': turn['content']} for turn in claimed], row['language']
+
+    def finish_compaction(self, session_id: str, summary: Optional[str]):
+        """Replace the claimed turns with the new summary; a failed compaction passes summary=None"""
+        with self._lock:
+            try:
+                self._db.execute('BEGIN IMMEDIATE')
+                row = self._db.execute('SELECT * FROM chat_sessions WHERE id = ?', (session_id,)).fetchone()
+                if row is None or row['compacting_through'] is None:
+                    self._db.execute('COMMIT')
+                    return
+                stored = json.loads(row['turns'])
+                remaining = [turn for turn in stored if turn['seq'] > row['compacting_through']]
+                # A new issue or the hard cap may have replaced the claimed turns in the meantime
+                if summary is None or len(remaining) == len(stored):
+                    self._db.execute(
+                        'UPDATE chat_sessions SET compacting_through = NULL, compacting_since = NULL WHERE id = ?',
+                        (session_id,)
+                    )
+                else:
+                    self._db.execute(
+                        'UPDATE chat_sessions SET turns = ?, summary = ?, compacting_through = NULL, '
+                        'compacting_since = NULL WHERE id = ?',
+                        (json.dumps(remaining, ensure_ascii=False), self._clip(summary), session_id)
+                    )
+                    self.counters['compactions'] += 1
+                self._db.execute('COMMIT')
+            except sqlite3.Error as e:
+                self._rollback(e)
+
+    def stats(self) -> Dict:
+        """Counters are this process's; the session count covers every worker"""
+        with self._lock:
+            try:
+                sessions = self._db.execute(
+                    'SELECT COUNT(*) FROM chat_sessions WHERE last_active > ?', (time.time() - self.idle_seconds,)
+                ).fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Chat session count failed: {str(e)}")
+                sessions = None
+            return {
+                **self.counters,
+                'sessions': sessions,
+                'max_sessions': self.max_sessions,
+                'idle_seconds': self.idle_seconds
+            }
+
+    def _clip(self, text: str) -> str:
+        """Keep any one stored text to a quarter of the session cap"""
+        limit = self.max_bytes // 4
+        encoded = text.encode('utf-8')
+        return text if len(encoded) <= limit else encoded[:limit].decode('utf-8', 'ignore')
+
+    def _compacting(self, row: sqlite3.Row, now: float) -> bool:
+        return row['compacting_through'] is not None and now - row['compacting_since'] < self.COMPACTION_CLAIM_SECONDS
+
+    def _purge(self, now: float):
+        """Drop idle sessions, then the least recently active beyond max_sessions (lock held)"""
+        expired = self._db.execute(
+            'DELETE FROM chat_sessions WHERE last_active <= ?', (now - self.idle_seconds,)
+        ).rowcount
+        self.counters['expired'] += max(expired, 0)
+        evicted = self._db.execute(
+            'DELETE FROM chat_sessions WHERE id IN '
+            '(SELECT id FROM chat_sessions ORDER BY last_active DESC LIMIT -1 OFFSET ?)',
+            (self.max_sessions,)
+        ).rowcount
+        self.counters['evicted'] += max(evicted, 0)
+
+    def _rollback(self, error: sqlite3.Error):
+        """Log a failed session transaction and undo it (lock held)"""
+        logger.warning(f"Chat session write failed: {str(error)}")
+        self.counters['errors'] += 1
+        if self._db.in_transaction:
+            self._db.execute('ROLLBACK')
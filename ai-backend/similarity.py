@@ -0,0 +1,260 @@
+import re
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from cache import normalize_message
+
+logger = logging.getLogger(__name__)
+
+# Numbers identify a submission: an account number, amount or date
+NUMBER_PATTERN = re.compile(r'\d+')
+# Punctuation and symbols; letters and combining marks of every script are kept
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]|_')
+
+SHINGLE_SIZE = 4
+# One-permutation MinHash: 2**BIN_BITS bins of (32 - BIN_BITS)-bit values
+BIN_BITS = 6
+SIGNATURE_BINS = 1 << BIN_BITS
+VALUE_MASK = (1 << (32 - BIN_BITS)) - 1
+# LSH banding over the first BANDS * ROWS_PER_BAND bins; the full signature verifies candidates
+BANDS = 8
+ROWS_PER_BAND = 4
+
+
+def words(text: str) -> set:
+    return set(PUNCTUATION_PATTERN.sub(' ', normalize_message(text)).split())
+
+
+def shingles(message: str) -> set:
+    """Character n-grams of the normalized message; works the same for Latin and Indic scripts.
+    Digits are kept: messages that differ in an account number or amount are different submissions."""
+    text = ' '.join(PUNCTUATION_PATTERN.sub(' ', normalize_message(message)).split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(message: str) -> Optional[array]:
+    """One-permutation MinHash: each shingle is hashed once and kept as the minimum of its bin"""
+    tokens = shingles(message)
+    if not tokens:
+        return None
+    empty = VALUE_MASK + 1
+    signature = [empty] * SIGNATURE_BINS
+    for token in tokens:
+        # crc32 runs in C; the multiply spreads its bits before splitting into bin and value
+        hashed = (zlib.crc32(token.encode('utf-8')) * 0x9E3779B1) & 0xFFFFFFFF
+        index, value = hashed >> (32 - BIN_BITS), hashed & VALUE_MASK
+        if value < signature[index]:
+            signature[index] = value
+    # Short messages leave bins empty; borrow from the next filled bin so signatures stay comparable
+    for index in range(SIGNATURE_BINS):
+        if signature[index] == empty:
+            for offset in range(1, SIGNATURE_BINS):
+                borrowed = signature[(index + offset) % SIGNATURE_BINS]
+                if borrowed < empty:
+                    signature[index] = borrowed + offset * empty
+                    break
+    return array('L', signature)
+
+
+def reusable_for(stored_message: str, message: str, result: Dict) -> bool:
+    """Whether the analysis of stored_message may be served for message: both carry the same numbers (account
+    numbers, amounts, dates) and the analysis repeats no word of its own message that the new one lacks"""
+    if NUMBER_PATTERN.findall(stored_message) != NUMBER_PATTERN.findall(message):
+        return False
+    own = words(stored_message) - words(message)
+    if not own:
+        return True
+    text = ' '.join(value for value in result.values() if isinstance(value, str))
+    return own.isdisjoint(words(text))
+
+
+def estimate_similarity(left: array, right: array) -> float:
+    """Estimated Jaccard similarity: the share of bins holding the same minimum"""
+    return sum(1 for a, b in zip(left, right) if a == b) / SIGNATURE_BINS
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of analysed messages, with results stored in SQLite. Entries expire after ttl_seconds,
+    like the analysis cache, so an expired analysis is not served again through this tier."""
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 10000, db_path: str = ':memory:',
+                 ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Entry id -> (scope, signature, created_at), oldest first
+        self._signatures: 'OrderedDict[int, Tuple[str, array, float]]' = OrderedDict()
+        # Band key -> entry id, or a list of ids when several entries share a band
+        self._buckets: Dict[int, object] = {}
+        self.counters = {
+            'lookups': 0, 'hits': 0, 'candidates': 0, 'inserts': 0, 'evictions': 0, 'expirations': 0, 'private': 0
+        }
+
+        self._db = self._connect()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        if self.db_path != ':memory:':
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS near_duplicates ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT NOT NULL, message TEXT NOT NULL, '
+            'signature BLOB NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL, issue_id TEXT)'
+        )
+        if 'issue_id' not in {column[1] for column in db.execute('PRAGMA table_info(near_duplicates)')}:
+            # Files written before matches reported their source issue
+            db.execute('ALTER TABLE near_duplicates ADD COLUMN issue_id TEXT')
+        return db
+
+    def reconnect(self):
+        """Open a fresh connection to a persistent index after fork; an in-memory one is already private"""
+        if self.db_path != ':memory:':
+            with self._lock:
+                self._db = self._connect()
+
+    def lookup(self, message: str, scope: str) -> Optional[Tuple[Dict, Dict]]:
+        """Return (result, match) for the most similar stored message in scope above the threshold.
+        A match with other numbers, or whose analysis quotes words of its own message missing from this one (another
+        submitter's name), is never reused, so one user's details cannot reach another."""
+        signature = minhash_signature(message)
+        if signature is None:
+            return None
+        with self._lock:
+            self._expire(time.time())
+            self.counters['lookups'] += 1
+            candidates = set()
+            for key in self._band_keys(scope, signature):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                if isinstance(bucket, list):
+                    candidates.update(bucket)
+                else:
+                    candidates.add(bucket)
+            self.counters['candidates'] += len(candidates)
+
+            best_id, best_similarity = None, 0.0
+            for entry_id in candidates:
+                entry_scope, stored, _ = self._signatures[entry_id]
+                if entry_scope != scope:
+                    continue
+                similarity = estimate_similarity(signature, stored)
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None or best_similarity < self.threshold:
+                return None
+
+            row = self._db.execute(
+                'SELECT message, result, issue_id FROM near_duplicates WHERE id = ?', (best_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            result = json.loads(row[1])
+            if not reusable_for(row[0], message, result):
+                self.counters['private'] += 1
+                return None
+            self.counters['hits'] += 1
+        return result, {'issue_id': row[2], 'similarity': round(best_similarity, 4)}
+
+    def add(self, message: str, scope: str, result: Dict, issue_id: Optional[str] = None):
+        """Index an analysed message under the issue it was analysed for, evicting the oldest beyond max_entries"""
+        signature = minhash_signature(message)
+        if signature is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            try:
+                entry_id = self._db.execute(
+                    'INSERT INTO near_duplicates (scope, message, signature, result, created_at, issue_id) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (scope, message, signature.tobytes(), json.dumps(result, ensure_ascii=False), now, issue_id)
+                ).lastrowid
+            except sqlite3.Error as e:
+                logger.warning(f"Near-duplicate index write failed: {str(e)}")
+                return
+            self._insert(entry_id, scope, signature, now)
+            self.counters['inserts'] += 1
+            while len(self._signatures) > self.max_entries:
+                self._evict('evictions')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counters,
+                'entries': len(self._signatures),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'threshold': self.threshold
+            }
+
+    def _band_keys(self, scope: str, signature: array) -> List[int]:
+        return [
+            hash((scope, band, *signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+            for band in range(BANDS)
+        ]
+
+    def _insert(self, entry_id: int, scope: str, signature: array, created_at: float):
+        """Add an entry to the in-memory signatures and LSH buckets (lock held)"""
+        self._signatures[entry_id] = (scope, signature, created_at)
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self._buckets[key] = [bucket, entry_id]
+
+    def _expire(self, now: float):
+        """Drop entries older than ttl_seconds; insertion order puts them at the front (lock held)"""
+        while self._signatures:
+            created_at = next(iter(self._signatures.values()))[2]
+            if now - created_at < self.ttl_seconds:
+                break
+            self._evict('expirations')
+
+    def _evict(self, counter: str):
+        """Drop the oldest entry from memory and SQLite (lock held)"""
+        entry_id, (scope, signature, _) = self._signatures.popitem(last=False)
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if isinstance(bucket, list):
+                bucket.remove(entry_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+            elif bucket == entry_id:
+                del self._buckets[key]
+        try:
+            self._db.execute('DELETE FROM near_duplicates WHERE id = ?', (entry_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"Near-duplicate index eviction failed: {str(e)}")
+        self.counters[counter] += 1
+
+    def _load(self):
+        """Rebuild the in-memory index from the live entries of a persistent SQLite file"""
+        self._db.execute('DELETE FROM near_duplicates WHERE created_at <= ?', (time.time() - self.ttl_seconds,))
+        rows = self._db.execute(
+            'SELECT id, scope, signature, created_at FROM near_duplicates ORDER BY id DESC LIMIT ?', (self.max_entries,)
+        ).fetchall()
+        if len(rows) == self.max_entries:
+            self._db.execute('DELETE FROM near_duplicates WHERE id < ?', (rows[-1][0],))
+        for entry_id, scope, blob, created_at in reversed(rows):
+            signature = array('L')
+            signature.frombytes(blob)
+            self._insert(entry_id, scope, signature, created_at)
+        if rows:
+            logger.info(f"Loaded {len(rows)} entries into the near-duplicate index")
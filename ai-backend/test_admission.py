@@ -0,0 +1,79 @@
+"""
+Unit tests for admission control: concurrency slots, the bounded queue and deadline-based shedding
+Run with: python -m pytest test_admission.py
+"""
+
+import time
+import threading
+
+import pytest
+
+from admission import AdmissionGate, Overloaded
+
+def test_admits_up_to_the_limit_without_waiting():
+    gate = AdmissionGate('analyze', limit=2, max_queue=4)
+    assert gate.acquire(10) == 0.0
+    assert gate.acquire(10) == 0.0
+    assert gate.stats()['active'] == 2
+
+def test_sheds_when_queue_is_full():
+    """With every slot busy and no queue room, the request is refused at once with a retry estimate"""
+    gate = AdmissionGate('analyze', limit=1, max_queue=0, default_service_seconds=2.0)
+    gate.acquire(10)
+    with pytest.raises(Overloaded) as shed:
+        gate.acquire(10)
+    assert shed.value.reason == 'queue_full'
+    assert shed.value.retry_after == 2.0
+    assert gate.stats()['queue_full'] == 1
+
+def test_sheds_when_predicted_wait_overruns_the_deadline():
+    """Queueing is pointless when the wait plus the service time cannot finish in time"""
+    gate = AdmissionGate('analyze', limit=1, max_queue=8, default_service_seconds=2.0)
+    gate.acquire(10)
+    with pytest.raises(Overloaded) as shed:
+        gate.acquire(3.0)
+    assert shed.value.reason == 'deadline'
+    assert gate.stats()['waiting'] == 0
+
+def test_prediction_follows_observed_service_times():
+    """Released slots teach the gate how long requests take, which moves the deadline decision"""
+    gate = AdmissionGate('analyze', limit=1, max_queue=8, default_service_seconds=2.0)
+    gate.acquire(10)
+    gate.release(0.5)
+    gate.acquire(10)
+    assert gate.stats()['service_seconds'] == 0.5
+    with pytest.raises(Overloaded):
+        gate.acquire(0.9)
+
+def test_queued_request_times_out_when_slot_never_frees():
+    gate = AdmissionGate('analyze', limit=1, max_queue=8, default_service_seconds=0.05)
+    gate.acquire(10)
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as shed:
+        gate.acquire(0.2)
+    assert shed.value.reason == 'timeout'
+    assert time.monotonic() - started < 1.0
+    assert gate.stats()['waiting'] == 0
+
+def test_queued_request_gets_the_released_slot():
+    gate = AdmissionGate('analyze', limit=1, max_queue=8, default_service_seconds=0.05)
+    gate.acquire(10)
+    waits = []
+    waiter = threading.Thread(target=lambda: waits.append(gate.acquire(5)))
+    waiter.start()
+    while gate.stats()['waiting'] == 0:
+        time.sleep(0.01)
+    gate.release(0.05)
+    waiter.join(5)
+    assert len(waits) == 1 and waits[0] > 0
+    assert gate.stats()['active'] == 1
+    assert gate.stats()['queued'] == 1
+
+def test_admitted_context_releases_on_error():
+    gate = AdmissionGate('chat', limit=1, max_queue=0)
+    with pytest.raises(ValueError):
+        with gate.admitted(10):
+            raise ValueError('handler failed')
+    assert gate.stats()['active'] == 0
+    with gate.admitted(10) as waited:
+        assert waited == 0.0
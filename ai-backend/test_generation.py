@@ -0,0 +1,71 @@
+"""
+Unit tests for section generation control: the streaming cut-off parser, stop sequences and normalization
+Run with: python -m pytest test_generation.py
+"""
+
+from generation import STOP_SEQUENCES, SectionParser, normalize_section, section_complete
+
+SECTION = "# Fairness Analysis\n- Treats every applicant alike\n- Needs an appeal process\n"
+AI_SUGGESTION = "# AI Suggestion\n- Verify the transfer with the bank\n- Escalate if unresolved\nTRUTHFULNESS: 85\n"
+
+def feed_in_pieces(parser: SectionParser, text: str, size: int = 3):
+    """Feed text a few characters at a time like a token stream; returns the text read when the parser stopped"""
+    for start in range(0, len(text), size):
+        if parser.feed(text[start:start + size]):
+            return parser.text
+    return None
+
+def until_stop(text: str) -> str:
+    """What Groq returns for text with STOP_SEQUENCES set: everything before the first stop sequence"""
+    cut = min((text.find(stop) for stop in STOP_SEQUENCES if stop in text), default=len(text))
+    return text[:cut]
+
+def test_parser_waits_for_two_finished_bullets():
+    """The second bullet only counts once its line has ended"""
+    parser = SectionParser()
+    assert not parser.feed("# Fairness\n- First point\n- Second po")
+    assert not parser.feed("int")
+    assert parser.feed("\n")
+
+def test_parser_stops_stream_right_after_required_parts():
+    """A section followed by rambling is cut off at the end of its second bullet"""
+    stopped_at = feed_in_pieces(SectionParser(), SECTION + "- A third point nobody asked for\n" * 20)
+    assert stopped_at is not None
+    assert stopped_at.startswith(SECTION)
+    assert len(stopped_at) < len(SECTION) + 3
+
+def test_parser_waits_for_final_truthfulness_value():
+    """'TRUTHFULNESS: 8' might still become 85, so the value is final only once something follows it"""
+    parser = SectionParser(needs_truthfulness=True)
+    assert not parser.feed("# AI Suggestion\n- Verify\n- Escalate\n")
+    assert not parser.feed("TRUTHFULNESS: 8")
+    assert parser.feed("5\n")
+
+    parser = SectionParser(needs_truthfulness=True)
+    assert parser.feed("- a\n- b\nTRUTHFULNESS: 100")
+
+def test_parser_accepts_numbered_bullets_without_heading():
+    assert feed_in_pieces(SectionParser(), "1. Helps rural users\n2) Costs little\n\n") is not None
+
+def test_stop_sequences_cut_off_the_next_section():
+    """A model that starts the next heading or trails blank lines is stopped with the section intact"""
+    output = until_stop(SECTION + "\n# Impact Analysis\n- Something else\n")
+    assert output == SECTION.rstrip('\n')
+    assert section_complete(output)
+
+    output = until_stop(AI_SUGGESTION + "\n\n\nMore text")
+    assert 'More text' not in output
+    assert section_complete(output, needs_truthfulness=True)
+
+def test_section_complete_detects_truncated_output():
+    assert not section_complete("# Fairness\n- Only one point")
+    assert not section_complete("- a\n- b", needs_truthfulness=True)
+    assert section_complete("- a\n- b\nTRUTHFULNESS: 70", needs_truthfulness=True)
+
+def test_normalize_section_restores_documented_format():
+    """Missing headings are restored, prose stands in for bullets and extra bullets are dropped"""
+    text = "Treats everyone alike.\n* one\n* two\n* three\nTruthfulness is fine\nTRUTHFULNESS: **140**"
+    assert normalize_section(text, 'AI Suggestion', needs_truthfulness=True) == (
+        "# AI Suggestion\n- one\n- two\nTRUTHFULNESS: 100"
+    )
+    assert normalize_section("## Impact ##\nOnly prose here", 'Impact Analysis') == "# Impact\n- Only prose here"
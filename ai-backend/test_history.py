@@ -0,0 +1,133 @@
+"""
+Unit tests for the analysis history store: keyset pagination, filters and record ownership
+Run with: python -m pytest test_history.py
+"""
+
+import time
+
+import pytest
+
+import history
+from history import AnalysisHistory, decode_cursor, encode_cursor
+
+class FakeTime:
+    """Fixed wall-clock timestamps for records, so several can share one created_at"""
+
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return time.monotonic()
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(history, 'time', fake)
+    return fake
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalysisHistory(str(tmp_path / 'history.db'))
+
+def analysis(truthfulness: int = 50, language: str = 'en') -> dict:
+    return {
+        'language': language, 'truthfulness_percentage': truthfulness, 'confidence_score': 0.8,
+        'ai_suggestion': '# AI Suggestion\n- Check the records', 'metadata': {'engine': 'sections'}
+    }
+
+def write(store: AnalysisHistory, records):
+    """Record (issue_id, wallet, message, truthfulness) tuples and wait for the background writer"""
+    store.start()
+    for issue_id, wallet, message, truthfulness in records:
+        store.record(issue_id, wallet, message, analysis(truthfulness))
+    store.stop(timeout=10)
+
+def all_pages(store: AnalysisHistory, limit: int, **filters):
+    pages, cursor = [], None
+    while True:
+        page, cursor = store.list(limit=limit, cursor=cursor, **filters)
+        pages.append([record['issue_id'] for record in page])
+        if cursor is None:
+            return pages
+
+def test_cursor_round_trip_and_rejects_foreign_cursors():
+    assert decode_cursor(encode_cursor(1700000000.25, 42)) == (1700000000.25, 42)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+def test_pages_are_newest_first_without_gaps_or_repeats(clock, store):
+    """Records sharing a timestamp are ordered by rowid, so page boundaries inside a tie lose nothing"""
+    records = []
+    for index in range(7):
+        # Three records at each of the first two timestamps, one at the last
+        clock.now = 1700000000.0 + index // 3
+        records.append((f'issue-{index}', None, f'message {index}', 50))
+        write(store, records[-1:])
+
+    pages = all_pages(store, limit=2)
+    assert pages == [['issue-6', 'issue-5'], ['issue-4', 'issue-3'], ['issue-2', 'issue-1'], ['issue-0']]
+
+def test_cursor_is_stable_while_new_records_arrive(clock, store):
+    """Keyset pagination: records written after the first page do not shift the following pages"""
+    for index in range(4):
+        clock.now += 1
+        write(store, [(f'issue-{index}', None, f'message {index}', 50)])
+    first, cursor = store.list(limit=2)
+    assert [record['issue_id'] for record in first] == ['issue-3', 'issue-2']
+
+    clock.now += 1
+    write(store, [('issue-new', None, 'a newer message', 50)])
+    second, cursor = store.list(limit=2, cursor=cursor)
+    assert [record['issue_id'] for record in second] == ['issue-1', 'issue-0']
+    assert cursor is None
+
+def test_filters_apply_across_pages(clock, store):
+    for index in range(6):
+        clock.now += 1
+        wallet = '0xABC' if index % 2 else '0xdef'
+        write(store, [(f'issue-{index}', wallet, f'message {index}', index * 20)])
+
+    # Hex wallets compare case-insensitively
+    assert all_pages(store, limit=2, wallet='0xabc') == [['issue-5', 'issue-3'], ['issue-1']]
+    assert all_pages(store, limit=10, min_truthfulness=40, max_truthfulness=80) == [['issue-4', 'issue-3', 'issue-2']]
+
+def test_only_the_owning_wallet_replaces_a_record(clock, store):
+    """Knowing an issue_id is not enough to overwrite its analysis or add a language to it"""
+    write(store, [('owned', '0xAbC', 'original', 40), ('anonymous', None, 'first', 10)])
+    write(store, [('owned', '0xabc', 'owner re-analysis', 60), ('anonymous', None, 'anonymous refresh', 90)])
+    store.start()
+    assert not store.record('owned', '0x999', 'someone else', analysis(99))
+    assert not store.record('owned', None, 'no wallet', analysis(98))
+    assert not store.record('owned', '0x999', 'another language', analysis(97, language='ta'))
+    assert not store.record('anonymous', '0x999', 'claimed', analysis(96))
+    store.stop(timeout=10)
+
+    assert store.get('owned')[0]['message'] == 'owner re-analysis'
+    assert [record['message'] for record in store.get('anonymous')] == ['anonymous refresh']
+    stats = store.stats()
+    assert stats['conflicts'] == 4
+    assert stats['stored'] == 2
+
+def test_writer_rechecks_records_still_in_flight(clock, store):
+    """Two writers of a new issue in one batch: the second is refused by the writer itself"""
+    write(store, [('race', '0xabc', 'first', 40), ('race', '0x999', 'second', 60)])
+    assert store.get('race')[0]['message'] == 'first'
+    assert store.stats()['conflicts'] == 1
+
+def test_private_records_are_only_shown_to_their_wallet(clock, store):
+    """A proof's analysis stays with its uploader, like the proof record itself"""
+    store.start()
+    store.record('proof-issue', '0xAbC', 'proof text naming the uploader', analysis(), private=True)
+    store.record('anonymous-proof', None, 'proof text without a wallet', analysis(), private=True)
+    store.record('public-issue', None, 'proof text in a public complaint', analysis())
+    store.stop(timeout=10)
+
+    assert all_pages(store, limit=10) == [['public-issue']]
+    assert all_pages(store, limit=10, query='proof') == [['public-issue']]
+    assert all_pages(store, limit=10, wallet='0xabc') == [['proof-issue']]
+    assert store.get('proof-issue') == []
+    assert [record['issue_id'] for record in store.get('proof-issue', '0xABC')] == ['proof-issue']
+    assert store.get('anonymous-proof') == []
@@ -0,0 +1,108 @@
+"""
+Unit tests for the Groq circuit breaker's state transitions
+Run with: python -m pytest test_resilience.py
+"""
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker
+
+class FakeClock:
+    """Stands in for the time module so reset periods pass instantly"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, 'time', fake)
+    return fake
+
+def test_opens_after_consecutive_failures(clock):
+    """Only an unbroken run of failures opens the circuit; a success resets the count"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['opened'] == 1
+
+def test_open_circuit_short_circuits_until_reset(clock):
+    """While open, calls are refused; after reset_seconds one probe is let through"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, half_open_probes=1)
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert not breaker.is_open()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # The single probe slot is taken
+    assert not breaker.allow()
+    assert breaker.stats()['short_circuited'] == 3
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_half_open_probe_failure_reopens(clock):
+    """A failed probe reopens the circuit for a full reset period"""
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=5)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['opened'] == 2
+    clock.now += 4
+    assert not breaker.allow()
+
+def test_ignored_outcome_releases_the_probe(clock):
+    """A probe that says nothing about Groq's health (a bad request) frees its slot without closing"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_ignored()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+def test_late_failures_do_not_extend_the_open_period(clock):
+    """Calls sent before the circuit opened may fail afterwards; the reset period still counts from the opening"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 20
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.stats()['opened'] == 1
+    clock.now += 10
+    assert breaker.recovering()
+    assert breaker.allow()
+
+def test_recovering_reports_when_the_next_call_is_a_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5)
+    assert not breaker.recovering()
+    breaker.record_failure()
+    assert not breaker.recovering()
+    clock.now += 5
+    assert breaker.recovering()
+    assert breaker.allow()
+    assert breaker.recovering()
+    breaker.record_success()
+    assert not breaker.recovering()
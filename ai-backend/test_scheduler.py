@@ -0,0 +1,174 @@
+"""
+Unit tests for the Groq scheduler's token bucket, single-flight coalescing and circuit breaker accounting
+Run with: python -m pytest test_scheduler.py
+"""
+
+import time
+import threading
+
+import pytest
+
+from resilience import CircuitBreaker
+from scheduler import GroqScheduler, MonitoredStream, SingleFlight, TokenBucket
+
+def test_token_bucket_refills_continuously():
+    """A minute's capacity comes back at capacity/period per second, never above capacity"""
+    bucket = TokenBucket(60, period_seconds=60.0)
+    bucket.updated = 100.0
+    bucket.consume(60)
+    assert bucket.level == 0
+
+    bucket.refill(110.0)
+    assert bucket.level == pytest.approx(10)
+
+    bucket.refill(1000.0)
+    assert bucket.level == 60
+
+def test_token_bucket_time_until():
+    """Waits are predicted from the refill rate; amounts above capacity only need a full bucket"""
+    bucket = TokenBucket(30, period_seconds=60.0)
+    bucket.updated = 0.0
+    bucket.consume(30)
+
+    assert bucket.time_until(1) == pytest.approx(2.0)
+    assert bucket.time_until(100) == pytest.approx(60.0)
+    bucket.refill(60.0)
+    assert bucket.time_until(30) == 0.0
+
+def test_token_bucket_clamp_and_resize():
+    """Provider headers can only lower the level, and a smaller limit caps it"""
+    bucket = TokenBucket(1000)
+    bucket.clamp(400)
+    assert bucket.level == 400
+    bucket.clamp(900)
+    assert bucket.level == 400
+
+    bucket.resize(300)
+    assert (bucket.capacity, bucket.level) == (300, 300)
+    bucket.resize(0)
+    assert bucket.capacity == 300
+
+def test_single_flight_shares_one_call():
+    """Identical concurrent calls run the function once and every caller gets its result"""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'analysis'
+
+    def caller():
+        results.append(flights.do('key', work))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    # Followers register before the leader is released
+    while flights.coalesced < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [('analysis', False)] + [('analysis', True)] * 3
+
+def test_single_flight_shares_errors_and_forgets_finished_keys():
+    """A failure reaches every waiting caller, and the next call with the same key runs again"""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('upstream down')
+
+    def caller():
+        try:
+            flights.do('key', failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=caller)]
+    threads[0].start()
+    assert started.wait(5)
+    threads.append(threading.Thread(target=caller))
+    threads[1].start()
+    while flights.coalesced < 1:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ['upstream down'] * 2
+    assert flights.do('key', lambda: 'fresh') == ('fresh', False)
+
+class FakeStream:
+    """A Groq stream that yields two chunks, optionally failing between them"""
+
+    response = None
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    def __iter__(self):
+        yield 'first'
+        if self.error is not None:
+            raise self.error
+        yield 'second'
+
+def test_monitored_stream_records_mid_stream_failures():
+    """Errors while reading a stream count against Groq even though the stream opened fine"""
+    breaker = CircuitBreaker(failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            list(MonitoredStream(FakeStream(TimeoutError('read timeout')), breaker, lambda error: True))
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_monitored_stream_records_success_when_read_or_closed_early():
+    """A stream read to the end, or closed once the section is complete, is a success"""
+    breaker = CircuitBreaker()
+    assert list(MonitoredStream(FakeStream(), breaker, lambda error: True)) == ['first', 'second']
+    chunks = iter(MonitoredStream(FakeStream(), breaker, lambda error: True))
+    next(chunks)
+    chunks.close()
+    assert breaker.stats()['successes'] == 2
+    assert breaker.stats()['failures'] == 0
+
+class StatusError(Exception):
+    """An API error carrying an HTTP status, like the Groq client's"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class FailingClient:
+    """Stands in for the Groq client: every completion fails with the given error"""
+
+    def __init__(self, error: Exception):
+        self.chat = self.completions = self.with_raw_response = self
+        self.error = error
+
+    def create(self, **params):
+        raise self.error
+
+def test_rate_limits_do_not_trip_the_breaker():
+    """429s are quota pressure the scheduler handles itself; 5xx responses count against Groq"""
+    breaker = CircuitBreaker(failure_threshold=1)
+    scheduler = GroqScheduler(FailingClient(StatusError(429)), coalesce=False, breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(StatusError):
+            scheduler.create(messages=[{'role': 'user', 'content': 'hi'}], max_tokens=10)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    scheduler = GroqScheduler(FailingClient(StatusError(503)), coalesce=False, breaker=breaker)
+    with pytest.raises(StatusError):
+        scheduler.create(messages=[{'role': 'user', 'content': 'hi'}], max_tokens=10)
+    assert breaker.state == CircuitBreaker.OPEN
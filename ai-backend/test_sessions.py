@@ -0,0 +1,92 @@
+"""
+Unit tests for chat sessions shared between worker processes through SQLite
+Run with: python -m pytest test_sessions.py
+"""
+
+import pytest
+
+import sessions
+from sessions import SessionStore
+
+class FakeTime:
+    """Wall clock the tests move forward so sessions idle out instantly"""
+
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(sessions, 'time', fake)
+    return fake
+
+def workers(tmp_path, count: int = 2, **options):
+    """Stores in one SQLite file, standing in for gunicorn workers on one host"""
+    return [SessionStore(str(tmp_path / 'sessions.db'), **options) for _ in range(count)]
+
+def test_session_created_by_one_worker_is_continued_by_another(tmp_path):
+    first, second = workers(tmp_path)
+    session = first.create('ta')
+    first.set_analysis(session.session_id, 'Water supply cut', {'truthfulness_percentage': 70}, 'ta')
+    second.add_turns(session.session_id, ('user', 'Why?'), ('assistant', 'Because.'))
+
+    continued = first.get(session.session_id)
+    assert continued.subject == 'Water supply cut'
+    assert continued.analysis == {'truthfulness_percentage': 70}
+    assert continued.turns == [{'role': 'user', 'content': 'Why?'}, {'role': 'assistant', 'content': 'Because.'}]
+
+def test_unknown_and_idle_sessions_are_gone(clock, tmp_path):
+    first, second = workers(tmp_path, idle_seconds=60)
+    assert first.get('never-issued') is None
+    session = first.create('en')
+    clock.now += 59
+    assert second.get(session.session_id) is not None
+    clock.now += 60
+    assert second.get(session.session_id) is None
+    assert second.stats()['expired'] == 1
+
+def test_least_recently_active_sessions_are_evicted(clock, tmp_path):
+    store, = workers(tmp_path, count=1, max_sessions=2)
+    ids = []
+    for _ in range(3):
+        clock.now += 1
+        ids.append(store.create('en').session_id)
+    assert store.get(ids[0]) is None
+    assert store.get(ids[2]) is not None
+    assert store.stats()['sessions'] == 2
+
+def test_compaction_folds_only_the_claimed_turns(tmp_path):
+    """Turns added on another worker while the summary is written are kept verbatim"""
+    first, second = workers(tmp_path, max_turns=4, keep_turns=2)
+    session_id = first.create('en').session_id
+    first.set_analysis(session_id, 'Issue', {}, 'en')
+    for index in range(2):
+        assert not first.add_turns(session_id, ('user', f'q{index}'), ('assistant', f'a{index}'))
+    assert first.add_turns(session_id, ('user', 'q2'), ('assistant', 'a2'))
+
+    summary, claimed, language = second.begin_compaction(session_id)
+    assert [turn['content'] for turn in claimed] == ['q0', 'a0', 'q1', 'a1']
+    assert second.begin_compaction(session_id) is None
+    # Claimed: a further long history does not ask for a second compaction
+    assert not first.add_turns(session_id, ('user', 'q3'), ('assistant', 'a3'))
+
+    second.finish_compaction(session_id, '- asked q0 and q1')
+    session = first.get(session_id)
+    assert session.summary == '- asked q0 and q1'
+    assert [turn['content'] for turn in session.turns] == ['q2', 'a2', 'q3', 'a3']
+
+def test_new_issue_discards_an_in_flight_compaction(tmp_path):
+    store, = workers(tmp_path, count=1, max_turns=2, keep_turns=0)
+    session_id = store.create('en').session_id
+    store.add_turns(session_id, ('user', 'old'), ('assistant', 'reply'))
+    assert store.begin_compaction(session_id) is not None
+    store.set_analysis(session_id, 'Another issue', {}, 'en')
+    store.add_turns(session_id, ('user', 'new'), ('assistant', 'reply'))
+
+    store.finish_compaction(session_id, '- about the old issue')
+    session = store.get(session_id)
+    assert session.summary == ''
+    assert [turn['content'] for turn in session.turns] == ['new', 'reply']
@@ -0,0 +1,52 @@
+"""
+Unit tests for the near-duplicate index: matching, privacy checks and expiry
+Run with: python -m pytest test_similarity.py
+"""
+
+import pytest
+
+import similarity
+from similarity import NearDuplicateIndex
+
+MESSAGE = "I have not received the money in my account. My account number is 1234567890. Please check."
+RESULT = {'ai_suggestion': '# AI Suggestion\n- Contact the bank', 'truthfulness_percentage': 70}
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(similarity, 'time', fake)
+    return fake
+
+def test_near_copy_reuses_the_analysis_of_its_issue(clock):
+    index = NearDuplicateIndex(ttl_seconds=60)
+    index.add(MESSAGE, 'en', RESULT, 'issue-1')
+    result, match = index.lookup("Hi, " + MESSAGE, 'en')
+    assert result == RESULT
+    assert match['issue_id'] == 'issue-1'
+    assert index.lookup(MESSAGE.replace('1234567890', '9876543210'), 'en') is None
+    assert index.lookup(MESSAGE, 'ta') is None
+
+def test_entries_expire_with_the_analysis_cache_ttl(clock):
+    """Past the TTL even an exact resubmission is analysed again"""
+    index = NearDuplicateIndex(ttl_seconds=60)
+    index.add(MESSAGE, 'en', RESULT, 'issue-1')
+    clock.now += 59
+    assert index.lookup(MESSAGE, 'en') is not None
+    clock.now += 1
+    assert index.lookup(MESSAGE, 'en') is None
+    assert index.stats()['entries'] == 0
+    assert index.stats()['expirations'] == 1
+
+def test_reload_skips_expired_entries(clock, tmp_path):
+    path = str(tmp_path / 'near.db')
+    NearDuplicateIndex(ttl_seconds=60, db_path=path).add(MESSAGE, 'en', RESULT, 'issue-1')
+    assert NearDuplicateIndex(ttl_seconds=60, db_path=path).stats()['entries'] == 1
+    clock.now += 60
+    assert NearDuplicateIndex(ttl_seconds=60, db_path=path).stats()['entries'] == 0
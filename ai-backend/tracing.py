@@ -0,0 +1,138 @@
+import re
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Incoming X-Request-ID values are reused only when they are safe to put in logs and headers
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+
+@dataclass
+class Span:
+    """One timed stage; start is relative to the start of its trace"""
+    name: str
+    start: float
+    duration: float
+    thread: str
+    parent: Optional[str]
+    attributes: Dict = field(default_factory=dict)
+
+
+class Trace:
+    """Spans of one request, recorded from its own thread and from the pool threads it hands work to"""
+
+    def __init__(self, request_id: str, max_spans: int = 500):
+        self.request_id = request_id
+        self.max_spans = max_spans
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add(self, name: str, started: float, duration: float, parent: Optional[str], attributes: Dict):
+        """Record a span from perf_counter start and duration; long batches keep only the first max_spans"""
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append(Span(
+                name, started - self.started, duration, threading.current_thread().name, parent, attributes
+            ))
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: time per stage name (summed over parallel spans) plus the total so far"""
+        with self._lock:
+            totals: Dict[str, List[float]] = {}
+            for span in self.spans:
+                totals.setdefault(span.name, []).append(span.duration)
+        entries = []
+        for name, durations in totals.items():
+            count = f';desc="x{len(durations)}"' if len(durations) > 1 else ''
+            entries.append(f"{name}{count};dur={sum(durations) * 1000:.1f}")
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(entries)
+
+    def describe(self) -> str:
+        """Every span in start order, one per line, for the slow request log"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+            dropped = self.dropped
+        lines = []
+        for span in spans:
+            attributes = ' '.join(f"{key}={value}" for key, value in span.attributes.items())
+            lines.append(
+                f"  +{span.start * 1000:8.1f}ms {span.duration * 1000:9.1f}ms  {span.name:<24} "
+                f"[{span.thread}] parent={span.parent or '-'} {attributes}".rstrip()
+            )
+        if dropped:
+            lines.append(f"  ... {dropped} more spans not recorded")
+        return '\n'.join(lines)
+
+
+_trace = contextvars.ContextVar('request_trace', default=None)
+_span = contextvars.ContextVar('trace_span', default=None)
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """The caller's X-Request-ID when it is well formed, otherwise a fresh one"""
+    if incoming and REQUEST_ID_PATTERN.match(incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def start_trace(request_id: str, max_spans: int = 500) -> Trace:
+    """Trace everything run in this context from here on (and pools submitted to from it)"""
+    trace = Trace(request_id, max_spans)
+    _trace.set(trace)
+    _span.set(None)
+    return trace
+
+
+def end_trace():
+    _trace.set(None)
+    _span.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a stage of the current trace; yields its attributes so the block can add to them"""
+    trace = _trace.get()
+    if trace is None:
+        yield attributes
+        return
+    parent = _span.get()
+    token = _span.set(name)
+    started = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        _span.reset(token)
+        trace.add(name, started, time.perf_counter() - started, parent, attributes)
+
+
+def record_span(name: str, seconds: float, **attributes):
+    """Record a stage that was timed elsewhere and ended just now, such as a queue wait"""
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - seconds, seconds, _span.get(), attributes)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request's id to every log record as %(request_id)s"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = _trace.get()
+        record.request_id = trace.request_id if trace is not None else '-'
+        return True